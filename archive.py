@@ -0,0 +1,180 @@
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from models import db, Post, Review, PostArchive, ReviewArchive, CategoryCounter
+from cache import response_cache
+from pagination import clear_total_cache
+from events import events, post_event, POST_DEACTIVATED
+from suggest import suggestions
+
+logger = logging.getLogger(__name__)
+
+# Колонки, переносимые в архив как есть
+POST_COLUMNS = [column.name for column in Post.__table__.columns]
+REVIEW_COLUMNS = [column.name for column in Review.__table__.columns]
+
+
+def expiry_for(category, start=None):
+    """Когда истекает объявление категории (None - бессрочно)"""
+    config = current_app.config
+    days = config.get('POST_TTL_DAYS', {}).get(category, config.get('POST_TTL_DEFAULT_DAYS', 0))
+    if not days:
+        return None
+    return (start or datetime.utcnow()) + timedelta(days=days)
+
+
+def archivable(now, inactive_days):
+    """Условие переноса в архив: срок истек или объявление давно снято автором"""
+    criteria = Post.expires_at <= now
+    if inactive_days:
+        criteria = db.or_(criteria, db.and_(Post.is_active == db.false(),
+                                            Post.updated_at <= now - timedelta(days=inactive_days)))
+    return criteria
+
+
+def archive_candidates(now, batch_size, inactive_days):
+    """Пачка объявлений для переноса в архив с полями события снятия.
+
+    SKIP LOCKED (PostgreSQL): воркеры, запустившие архивацию одновременно, берут разные строки.
+    """
+    return (db.select(Post.id, Post.category, Post.title, Post.price, Post.is_active, Post.user_id, Post.updated_at)
+            .where(archivable(now, inactive_days)).limit(batch_size)
+            .with_for_update(skip_locked=True))
+
+
+def _copy(source, target, columns, criteria, now):
+    """INSERT ... SELECT строк source в target с отметкой archived_at"""
+    select = db.select(*[source.c[name] for name in columns], db.literal(now)).where(criteria)
+    return db.session.execute(target.insert().from_select(columns + ['archived_at'], select)).rowcount
+
+
+def archive_batch(now, batch_size, inactive_days):
+    """Перенос одной пачки объявлений с отзывами в отдельной транзакции; (объявлений, отзывов).
+
+    После commit подписчики ленты получают снятие каждого объявления, а
+    подсказки поиска этого процесса забывают их заголовки.
+    """
+    rows = db.session.execute(archive_candidates(now, batch_size, inactive_days)).all()
+    if not rows:
+        db.session.rollback()
+        return 0, 0
+    ids = [row.id for row in rows]
+
+    post, review = Post.__table__, Review.__table__
+    _copy(post, PostArchive.__table__, POST_COLUMNS, post.c.id.in_(ids), now)
+    reviews = _copy(review, ReviewArchive.__table__, REVIEW_COLUMNS, review.c.post_id.in_(ids), now)
+    db.session.execute(review.delete().where(review.c.post_id.in_(ids)))
+    db.session.execute(post.delete().where(post.c.id.in_(ids)))
+    db.session.commit()
+
+    for row in rows:
+        events.publish(POST_DEACTIVATED, dict(post_event(row), is_active=False))
+        suggestions.post_deleted(row.id)
+    return len(ids), reviews
+
+
+def archive_posts(batch_size=500, inactive_days=30, max_batches=None, now=None):
+    """Перенос истекших и давно снятых объявлений в архив пачками по batch_size.
+
+    Каждая пачка - короткая транзакция, поэтому запись на доске не ждет
+    окончания всей архивации. Рейтинги продавцов не меняются: архивные
+    отзывы в них учитываются. Возвращает (объявлений, отзывов).
+    """
+    now = now or datetime.utcnow()
+    posts = reviews = batches = 0
+    while max_batches is None or batches < max_batches:
+        moved, moved_reviews = archive_batch(now, batch_size, inactive_days)
+        if not moved:
+            break
+        posts += moved
+        reviews += moved_reviews
+        batches += 1
+
+    if posts:
+        # Массовое удаление счетчики не меняет - они пересчитываются один раз в конце
+        CategoryCounter.reconcile()
+        db.session.commit()
+        response_cache.invalidate()
+        clear_total_cache()
+    return posts, reviews
+
+
+def assign_expiry(batch_size=500):
+    """Срок для объявлений без expires_at (созданных до появления сроков), пачками"""
+    updated = 0
+    last_id = None
+    while True:
+        statement = db.select(Post.id, Post.category, Post.created_at, Post.updated_at).where(
+            Post.expires_at.is_(None)).order_by(Post.id).limit(batch_size)
+        if last_id is not None:
+            statement = statement.where(Post.id > last_id)
+        rows = db.session.execute(statement).all()
+        if not rows:
+            db.session.rollback()
+            break
+        last_id = rows[-1].id
+        # Срок отсчитывается от даты публикации; бессрочные категории остаются без срока.
+        # updated_at передается как есть: назначение срока - не правка объявления
+        values = [{'id': row.id, 'expires_at': expiry_for(row.category, row.created_at),
+                   'updated_at': row.updated_at} for row in rows]
+        values = [value for value in values if value['expires_at'] is not None]
+        if values:
+            db.session.execute(db.update(Post), values)
+        db.session.commit()
+        updated += len(values)
+    return updated
+
+
+class ArchiveScheduler:
+    """Фоновая архивация в каждом процессе раз в ARCHIVE_INTERVAL секунд.
+
+    Поток запускается при первом запросе процесса (после fork воркера
+    gunicorn), поэтому команды flask его не запускают.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.interval = 0
+        self._pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = app.config.get('ARCHIVE_INTERVAL', 0)
+        app.extensions['archive'] = self
+        if self.interval:
+            app.before_request(self._ensure_worker)
+
+    def _ensure_worker(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name='post-archive', daemon=True).start()
+
+    def _run(self):
+        # Воркеры стартуют одновременно - разносим их запуски по интервалу
+        time.sleep(random.uniform(0, self.interval))
+        while True:
+            with self.app.app_context():
+                config = self.app.config
+                try:
+                    posts, reviews = archive_posts(config.get('ARCHIVE_BATCH_SIZE', 500),
+                                                   config.get('ARCHIVE_INACTIVE_DAYS', 30))
+                    if posts:
+                        logger.info('В архив перенесено объявлений: %s, отзывов: %s', posts, reviews)
+                except Exception:
+                    db.session.rollback()
+                    logger.exception('Ошибка фоновой архивации объявлений')
+            time.sleep(self.interval)
+
+
+archive = ArchiveScheduler()
@@ -0,0 +1,110 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+from flask import url_for
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # без brotli собираются только gzip-копии
+    brotli = None
+
+BUILD_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+HASH_LENGTH = 12
+# Сжимаем только текстовые файлы: картинки и шрифты уже сжаты
+COMPRESSIBLE = ('.js', '.css', '.svg', '.json', '.txt', '.html')
+MIN_COMPRESS_SIZE = 256
+# Сжатые копии в порядке предпочтения: Content-Encoding и расширение файла
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def build(static_folder):
+    """Сборка статики: копии с хэшем содержимого в имени, сжатые gzip и brotli варианты и манифест.
+
+    Старые сборки не удаляются: страницы, закэшированные до выкладки,
+    продолжают ссылаться на существующие файлы. Возвращает манифест.
+    """
+    output = os.path.join(static_folder, BUILD_DIR)
+    manifest = {}
+    for dirpath, dirnames, filenames in os.walk(static_folder):
+        dirnames[:] = sorted(name for name in dirnames if os.path.join(dirpath, name) != output)
+        for name in sorted(filenames):
+            source = os.path.join(dirpath, name)
+            filename = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                data = f.read()
+
+            stem, ext = os.path.splitext(filename)
+            hashed = f'{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}'
+            target = os.path.join(output, hashed)
+            manifest[filename] = hashed
+            if os.path.exists(target):
+                continue
+
+            _write(target, data)
+            if ext in COMPRESSIBLE and len(data) >= MIN_COMPRESS_SIZE:
+                _write(target + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    _write(target + '.br', brotli.compress(data, quality=11))
+
+    _write(os.path.join(output, MANIFEST_NAME),
+           json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+
+class Assets:
+    """Ссылки на собранную статику (asset_url в шаблонах) и выбор сжатой копии при отдаче.
+
+    Без собранного манифеста (локальная разработка) ссылки ведут на
+    обычный /static.
+    """
+
+    def __init__(self, app=None):
+        self.output = None
+        self.manifest = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.output = os.path.join(app.static_folder, BUILD_DIR)
+        self.load()
+        app.extensions['assets'] = self
+        app.add_template_global(self.url, 'asset_url')
+
+    def load(self):
+        path = os.path.join(self.output, MANIFEST_NAME)
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        except FileNotFoundError:
+            self.manifest = {}
+
+    def url(self, filename):
+        hashed = self.manifest.get(filename)
+        if hashed is None:
+            return url_for('static', filename=filename)
+        return url_for('main.assets', filename=hashed)
+
+    def resolve(self, filename, accept_encodings):
+        """Файл для отдачи: (путь, MIME-тип, Content-Encoding или None) или None"""
+        path = safe_join(self.output, filename)
+        if path is None or not os.path.isfile(path) or filename == MANIFEST_NAME:
+            return None
+
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        for encoding, suffix in ENCODINGS:
+            if accept_encodings[encoding] and os.path.isfile(path + suffix):
+                return path + suffix, mimetype, encoding
+        return path, mimetype, None
+
+
+assets = Assets()
@@ -0,0 +1,152 @@
+import hashlib
+import hmac
+import json
+import time
+from collections import namedtuple
+from urllib.parse import parse_qsl
+from flask import current_app, request, g
+from itsdangerous import URLSafeTimedSerializer, BadSignature
+from cache import LocalCache, SESSION_COOKIE
+from models import db, User, insert_on_conflict
+
+SESSION_SALT = 'telegram-session'
+# Поля профиля, которые обновляются из Telegram при каждом входе
+PROFILE_FIELDS = ('username', 'first_name', 'last_name')
+
+# Данные текущего пользователя, которые нужны маршрутам (без обращения к БД)
+Identity = namedtuple('Identity', 'id telegram_id is_admin first_name username')
+
+
+class TelegramAuthError(Exception):
+    """initData не прошли проверку подписи или устарели"""
+
+
+def validate_init_data(init_data, bot_token, max_age=86400):
+    """Проверка подписи Telegram WebApp initData; возвращает словарь пользователя Telegram"""
+    params = dict(parse_qsl(init_data or '', keep_blank_values=True))
+    received_hash = params.pop('hash', None)
+    if not received_hash:
+        raise TelegramAuthError('Отсутствует подпись initData')
+
+    check_string = '\n'.join(f'{key}={params[key]}' for key in sorted(params))
+    secret_key = hmac.new(b'WebAppData', bot_token.encode(), hashlib.sha256).digest()
+    expected_hash = hmac.new(secret_key, check_string.encode(), hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(expected_hash, received_hash):
+        raise TelegramAuthError('Неверная подпись initData')
+
+    try:
+        auth_date = int(params.get('auth_date', 0))
+        user = json.loads(params.get('user', '{}'))
+    except ValueError:
+        raise TelegramAuthError('Некорректные initData')
+    if max_age and time.time() - auth_date > max_age:
+        raise TelegramAuthError('initData устарели')
+    if not user.get('id'):
+        raise TelegramAuthError('В initData нет пользователя')
+
+    return user
+
+
+def resolve_user(telegram_user):
+    """Пользователь по данным Telegram одним запросом INSERT ... ON CONFLICT DO UPDATE ... RETURNING.
+
+    Новый пользователь создается, у существующего обновляются поля профиля;
+    одновременные первые входы не падают на уникальности telegram_id.
+    Версию доски вход не меняет: имена авторов в ответах обновятся со
+    следующим изменением доски. Без commit.
+    """
+    values = {field: telegram_user.get(field) for field in PROFILE_FIELDS}
+    statement = insert_on_conflict(User).values(telegram_id=telegram_user['id'], **values)
+    statement = statement.on_conflict_do_update(
+        index_elements=[User.telegram_id],
+        set_={field: statement.excluded[field] for field in PROFILE_FIELDS}
+    ).returning(User)
+    return db.session.scalars(statement, execution_options={
+        'populate_existing': True, 'board_version': False
+    }).one()
+
+
+def _serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt=SESSION_SALT)
+
+
+def issue_session_token(user):
+    """Подписанный токен сессии для пользователя"""
+    return _serializer().dumps({'uid': user.id, 'tid': user.telegram_id})
+
+
+def load_session_token(token):
+    """Содержимое токена сессии или None, если токен поддельный или истек"""
+    try:
+        return _serializer().loads(token, max_age=current_app.config['SESSION_TOKEN_MAX_AGE'])
+    except BadSignature:
+        return None
+
+
+# Методы, для которых действует cookie сессии
+COOKIE_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+
+
+def request_session_token():
+    """Токен из заголовка Authorization: Bearer ... или из cookie сессии.
+
+    Cookie (SameSite=None - иначе ее не получит Mini App в iframe Telegram Web)
+    браузер отправляет и с форм чужих сайтов, поэтому она подтверждает только
+    чтение: изменения принимаются с токеном в заголовке, который выставляет
+    только скрипт самого приложения (authFetch).
+    """
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Bearer '):
+        return header[len('Bearer '):].strip()
+    if request.method not in COOKIE_METHODS:
+        return None
+    return request.cookies.get(SESSION_COOKIE)
+
+
+class IdentityCache:
+    """Ограниченный по размеру кэш пользователей в памяти воркера"""
+
+    def __init__(self, max_entries=1024, ttl=300):
+        self.configure(max_entries, ttl)
+
+    def configure(self, max_entries, ttl):
+        self.ttl = ttl
+        self._cache = LocalCache(max_entries)
+
+    def get(self, user_id):
+        identity = self._cache.get(user_id)
+        if identity is None:
+            user = db.session.get(User, user_id)
+            if user is None:
+                return None
+            identity = self.remember(user)
+        return identity
+
+    def remember(self, user):
+        identity = Identity(user.id, user.telegram_id, bool(user.is_admin), user.first_name, user.username)
+        self._cache.set(user.id, identity, self.ttl)
+        return identity
+
+    def clear(self):
+        self._cache.clear()
+
+
+identity_cache = IdentityCache()
+
+
+def init_auth(app):
+    identity_cache.configure(app.config.get('IDENTITY_CACHE_SIZE', 1024),
+                             app.config.get('IDENTITY_CACHE_TTL', 300))
+
+
+def current_identity():
+    """Пользователь текущего запроса (проверка токена без запроса к БД при попадании в кэш)"""
+    if 'identity' not in g:
+        g.identity = None
+        token = request_session_token()
+        payload = load_session_token(token) if token else None
+        if payload:
+            identity = identity_cache.get(payload['uid'])
+            if identity is not None and identity.telegram_id == payload['tid']:
+                g.identity = identity
+    return g.identity
@@ -0,0 +1,340 @@
+import json
+import math
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from models import db, User, Post, Review, CategoryCounter
+from ids import uuid7
+from prices import parse_price
+
+# Доли категорий и оценок, близкие к реальной доске объявлений
+CATEGORY_WEIGHTS = {
+    'продажа': 40,
+    'услуги': 20,
+    'поиск': 15,
+    'даром': 10,
+    'другое': 10,
+    'инфо': 5
+}
+RATING_WEIGHTS = {5: 50, 4: 25, 3: 8, 2: 5, 1: 12}
+APPROVED_SHARE = 0.8
+ACTIVE_SHARE = 0.9
+SEED_DAYS = 90
+CHUNK_SIZE = 1000
+
+FIRST_NAMES = ['Алексей', 'Мария', 'Иван', 'Ольга', 'Дмитрий', 'Анна', 'Сергей', 'Елена', 'Павел', 'Наталья']
+LAST_NAMES = ['Иванов', 'Смирнова', 'Кузнецов', 'Попова', 'Соколов', 'Лебедева', 'Козлов', 'Новикова']
+TITLE_WORDS = {
+    'продажа': ['Продам велосипед', 'Продаю диван', 'Продам телефон', 'Продам коляску', 'Продаю зимние шины'],
+    'услуги': ['Ремонт квартир', 'Репетитор по математике', 'Грузоперевозки', 'Маникюр на дому', 'Ремонт компьютеров'],
+    'поиск': ['Ищу квартиру', 'Ищу работу', 'Ищу попутчика', 'Ищу няню', 'Ищу гараж'],
+    'даром': ['Отдам котенка', 'Отдам детские вещи', 'Отдам книги', 'Отдам шкаф', 'Отдам рассаду'],
+    'инфо': ['Отключение воды', 'Собрание жильцов', 'Найдены ключи', 'Ярмарка выходного дня', 'Субботник'],
+    'другое': ['Обмен', 'Вопрос соседям', 'Потерялась собака', 'Совместная покупка', 'Клуб по интересам']
+}
+CONTENT_WORDS = ('хорошее состояние срочно недорого район центр доставка самовывоз звоните пишите '
+                 'новый почти торг уместен оригинал гарантия качество быстро аккуратно опыт отзывы '
+                 'выходные вечером документы фото подробности').split()
+COMMENTS = ['Все отлично, рекомендую', 'Быстро договорились', 'Товар как в описании',
+            'Были задержки, но все решили', 'Не пришел на встречу', None]
+
+# Сколько разных значений параметров перебирать для маршрутов с аргументами
+SAMPLE_SIZE = 20
+
+# Замер старта в отдельном процессе: импорт, создание приложения и первый запрос
+STARTUP_SCRIPT = '''
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app(cli=False)
+created = time.perf_counter()
+status = application.test_client().get(sys.argv[1]).status_code
+finished = time.perf_counter()
+print(json.dumps({
+    'import': imported - started,
+    'create_app': created - imported,
+    'first_request': finished - created,
+    'total': finished - started,
+    'status': status
+}))
+'''
+STARTUP_PHASES = ('import', 'create_app', 'first_request', 'total')
+
+
+def _weighted(rng, weights, k):
+    return rng.choices(list(weights), weights=list(weights.values()), k=k)
+
+
+def _insert(model, rows):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.session.execute(db.insert(model), rows[start:start + CHUNK_SIZE])
+
+
+def seed(users=1000, posts=10000, reviews=20000, seed=42):
+    """Массовая генерация пользователей, объявлений и отзывов (без commit).
+
+    Telegram id новых пользователей идут после существующих, поэтому
+    повторный запуск дополняет базу, а не падает на уникальности.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    base = (db.session.query(db.func.max(User.telegram_id)).scalar() or 0) + 1
+
+    _insert(User, [{
+        'telegram_id': base + i,
+        'username': f'bench_user_{base + i}' if rng.random() < 0.7 else None,
+        'first_name': rng.choice(FIRST_NAMES),
+        'last_name': rng.choice(LAST_NAMES),
+        'created_at': now - timedelta(days=rng.uniform(SEED_DAYS, 2 * SEED_DAYS))
+    } for i in range(users)])
+    user_ids = db.session.scalars(db.select(User.id).where(User.telegram_id >= base).order_by(User.id)).all()
+    if not user_ids:
+        return {'users': 0, 'posts': 0, 'reviews': 0}
+
+    # Немногие активные авторы пишут большую часть объявлений (распределение Ципфа)
+    author_weights = [1 / (rank + 1) for rank in range(len(user_ids))]
+    authors = rng.choices(user_ids, weights=author_weights, k=posts)
+
+    post_rows = []
+    for author_id, category in zip(authors, _weighted(rng, CATEGORY_WEIGHTS, posts)):
+        price = None
+        if category in ('продажа', 'услуги'):
+            price = f'{rng.randrange(100, 100000, 50)} руб.' if rng.random() < 0.85 else 'Договорная'
+        price_amount, price_currency = parse_price(price)
+        created_at = now - timedelta(seconds=rng.uniform(0, SEED_DAYS * 86400))
+        post_rows.append({
+            'id': uuid7(created_at, rng.getrandbits(80)),
+            'title': f'{rng.choice(TITLE_WORDS[category])} {rng.choice(CONTENT_WORDS)}',
+            'content': ' '.join(rng.choices(CONTENT_WORDS, k=rng.randint(10, 80))).capitalize(),
+            'category': category,
+            'price': price,
+            'price_amount': price_amount,
+            'price_currency': price_currency,
+            'contact_info': f'@bench_user_{author_id}',
+            'created_at': created_at,
+            'user_id': author_id,
+            'is_active': rng.random() < ACTIVE_SHARE
+        })
+    _insert(Post, post_rows)
+
+    review_rows = []
+    seen = set()
+    attempts = 0
+    while post_rows and len(review_rows) < reviews and attempts < reviews * 3:
+        attempts += 1
+        post = rng.choice(post_rows)
+        buyer_id = rng.choice(user_ids)
+        if buyer_id == post['user_id'] or (buyer_id, post['id']) in seen:
+            continue
+        seen.add((buyer_id, post['id']))
+        review_rows.append({
+            'rating': _weighted(rng, RATING_WEIGHTS, 1)[0],
+            'comment': rng.choice(COMMENTS),
+            'created_at': post['created_at'] + timedelta(seconds=rng.uniform(0, (now - post['created_at']).total_seconds())),
+            'is_approved': rng.random() < APPROVED_SHARE,
+            'buyer_id': buyer_id,
+            'seller_id': post['user_id'],
+            'post_id': post['id']
+        })
+    _insert(Review, review_rows)
+
+    User.rebuild_ratings(user_ids)
+    CategoryCounter.reconcile()
+    return {'users': len(user_ids), 'posts': len(post_rows), 'reviews': len(review_rows)}
+
+
+def percentile(values, percent):
+    """Перцентиль по методу ближайшего ранга"""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def build_scenarios(admin_headers=None):
+    """Маршруты для замера: (название, URL, заголовки) с реальными id из базы"""
+    rng = random.Random(0)
+    post_ids = db.session.scalars(
+        db.select(Post.id).where(Post.is_active.is_(True)).order_by(Post.created_at.desc()).limit(500)).all()
+    telegram_ids = db.session.scalars(
+        db.select(User.telegram_id).join(Post, Post.user_id == User.id).distinct().limit(500)).all()
+    titles = db.session.scalars(db.select(Post.title).limit(500)).all()
+    if not post_ids:
+        return []
+
+    posts_sample = rng.sample(post_ids, min(SAMPLE_SIZE, len(post_ids)))
+    users_sample = rng.sample(telegram_ids, min(SAMPLE_SIZE, len(telegram_ids)))
+    words = [title.split()[-1] for title in rng.sample(titles, min(SAMPLE_SIZE, len(titles)))]
+    categories = [value for value, _ in Post.CATEGORIES]
+
+    scenarios = [
+        ('index', ['/']),
+        ('posts', ['/posts']),
+        ('posts (category)', [f'/posts?category={category}' for category in categories]),
+        ('posts (page 5)', ['/posts?page=5']),
+        ('post_detail', [f'/post/{post_id}' for post_id in posts_sample]),
+        ('manage_post GET', [f'/api/post/{post_id}' for post_id in posts_sample]),
+        ('get_user_posts', [f'/api/user/{telegram_id}/posts' for telegram_id in users_sample]),
+        ('get_user_reviews', [f'/api/user/{telegram_id}/reviews' for telegram_id in users_sample]),
+        ('get_approved_reviews', [f'/api/reviews/approved?post_id={post_id}' for post_id in posts_sample]),
+        ('api_posts', ['/api/posts']),
+        ('api_posts (category)', [f'/api/posts?category={category}' for category in categories]),
+        ('api_posts (price sort)', ['/api/posts?sort=price_asc', '/api/posts?sort=price_desc']),
+        ('api_posts (price range)', [f'/api/posts?category={category}&min_price=1000&max_price=20000&sort=price_asc'
+                                     for category in ('продажа', 'услуги')]),
+        ('api_categories', ['/api/categories']),
+        ('search_posts', [f'/search?q={word}' for word in words]),
+        ('api_search', [f'/api/search?q={word}' for word in words]),
+        ('api_search_suggest', [f'/api/search/suggest?q={word[:3]}' for word in words]),
+        ('create_post GET', ['/create']),
+        ('my_posts', ['/my_posts']),
+        ('about', ['/about'])
+    ]
+    result = [(name, urls, None) for name, urls in scenarios]
+    if admin_headers:
+        result.append(('admin_reviews', ['/admin/reviews'], admin_headers))
+    return result
+
+
+class StatementCounter:
+    """Подсчет SQL-запросов к движкам базы (основной и репликам) из текущего потока:
+    фоновые потоки приложения (архивация, индекс подсказок) не учитываются"""
+
+    def __init__(self, *engines):
+        self.engines = engines
+        self.count = 0
+        self.thread = threading.get_ident()
+
+    def _on_execute(self, *args):
+        if threading.get_ident() == self.thread:
+            self.count += 1
+
+    def __enter__(self):
+        for engine in self.engines:
+            event.listen(engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        for engine in self.engines:
+            event.remove(engine, 'before_cursor_execute', self._on_execute)
+
+
+def isolated_get(app, client, url, headers=None):
+    """GET тестовым клиентом в отдельном контексте приложения, как в бою.
+
+    Иначе запрос переиспользует текущий контекст (например, команды flask)
+    вместе с flask.g и сессией БД, и результаты предыдущих запросов влияют на следующие.
+    """
+    with app.app_context():
+        return client.get(url, headers=headers)
+
+
+def _summarize(timings, statements, sizes, statuses):
+    latencies = [value * 1000 for value in timings]
+    return {
+        'requests': len(timings),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'queries_per_request': round(statistics.fmean(statements), 2) if statements else None,
+        'max_queries': max(statements) if statements else None,
+        'payload_bytes': round(statistics.fmean(sizes)),
+        'statuses': {str(status): statuses.count(status) for status in sorted(set(statuses))}
+    }
+
+
+def run(app, scenarios, iterations=50, warmup=5, base_url=None):
+    """Прогон маршрутов через тестовый клиент Flask или по HTTP (base_url, например gunicorn).
+
+    Число SQL-запросов считается только для тестового клиента: при замере
+    по HTTP приложение работает в другом процессе.
+    """
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    if base_url:
+        import requests
+        session = requests.Session()
+
+        def fetch(url, headers):
+            response = session.get(base_url.rstrip('/') + url, headers=headers, allow_redirects=False)
+            return response.status_code, len(response.content)
+    else:
+        client = app.test_client()
+
+        def fetch(url, headers):
+            response = isolated_get(app, client, url, headers)
+            return response.status_code, len(response.get_data())
+
+    results = {}
+    for name, urls, headers in scenarios:
+        for i in range(warmup):
+            fetch(urls[i % len(urls)], headers)
+
+        timings, statements, sizes, statuses = [], [], [], []
+        for i in range(iterations):
+            url = urls[i % len(urls)]
+            if base_url:
+                started = time.perf_counter()
+                status, size = fetch(url, headers)
+                timings.append(time.perf_counter() - started)
+            else:
+                with StatementCounter(*engines) as counter:
+                    started = time.perf_counter()
+                    status, size = fetch(url, headers)
+                    timings.append(time.perf_counter() - started)
+                statements.append(counter.count)
+            sizes.append(size)
+            statuses.append(status)
+        results[name] = _summarize(timings, statements, sizes, statuses)
+    return results
+
+
+def startup(runs=5, url='/'):
+    """Время от импорта приложения до первого ответа, каждый замер в новом процессе (как у воркера)"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    samples = []
+    for _ in range(runs):
+        completed = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT, url], cwd=root,
+                                   capture_output=True, text=True, check=True)
+        samples.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    results = {}
+    for phase in STARTUP_PHASES:
+        values = [sample[phase] * 1000 for sample in samples]
+        results[phase] = {'p50_ms': round(percentile(values, 50), 1), 'max_ms': round(max(values), 1)}
+    statuses = [sample['status'] for sample in samples]
+    return results, {str(status): statuses.count(status) for status in sorted(set(statuses))}
+
+
+def compare(results, baseline, tolerance=0.2):
+    """Регрессии относительно сохраненного отчета: рост p95 больше tolerance или новые запросы к БД"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if previous['p95_ms'] and current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']} -> {current['p95_ms']} мс")
+        if (previous.get('max_queries') is not None and current.get('max_queries') is not None
+                and current['max_queries'] > previous['max_queries']):
+            regressions.append(f"{name}: запросов к БД {previous['max_queries']} -> {current['max_queries']}")
+    return regressions
+
+
+def report(results, **meta):
+    """Отчет в формате JSON"""
+    return json.dumps({
+        'generated_at': datetime.utcnow().isoformat(timespec='seconds'),
+        **meta,
+        'routes': results
+    }, ensure_ascii=False, indent=2)
@@ -0,0 +1,165 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+from flask import request, make_response
+from models import BoardState
+
+VERSION_KEY = 'board-version'
+SESSION_COOKIE = 'tg_session'
+
+
+class LocalCache:
+    """LRU-кэш в памяти процесса с TTL для каждой записи"""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._counters = {}  # счетчики не вытесняются из LRU
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def counter(self, key):
+        return self._counters.get(key, 0)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+
+class SharedCache:
+    """Общий для всех воркеров кэш поверх клиента с интерфейсом Redis (get/set/incr)"""
+
+    def __init__(self, client, prefix='board:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return pickle.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=ttl)
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+    def counter(self, key):
+        return int(self.client.get(self.prefix + key) or 0)
+
+    def clear(self):
+        self.incr(VERSION_KEY)
+
+
+def create_backend(app):
+    """Выбор бэкенда кэша по настройкам приложения"""
+    url = app.config.get('CACHE_REDIS_URL')
+    if url:
+        try:
+            import redis
+        except ImportError:
+            app.logger.warning('CACHE_REDIS_URL задан, но пакет redis не установлен - используется локальный кэш')
+        else:
+            return SharedCache(redis.Redis.from_url(url))
+    return LocalCache(app.config.get('CACHE_MAX_ENTRIES', 512))
+
+
+def is_anonymous_request():
+    """Запрос без токена сессии (ни в заголовке, ни в cookie)"""
+    return 'Authorization' not in request.headers and SESSION_COOKIE not in request.cookies
+
+
+class ResponseCache:
+    """Кэш готовых ответов для запросов на чтение.
+
+    Ключ включает маршрут, аргументы запроса и версию доски из board_state:
+    запись в любом процессе увеличивает ее в своей транзакции, и старые записи
+    перестают находиться во всех воркерах (ETag из conditional строится по той
+    же версии). Счетчик бэкенда (invalidate()) дополнительно сбрасывает ответы
+    после изменений, не меняющих версию доски.
+    """
+
+    def __init__(self, app=None, backend=None):
+        self.backend = backend
+        self.timeout = 60
+        self.enabled = True
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, backend=None):
+        self.backend = backend or self.backend or create_backend(app)
+        self.timeout = app.config.get('CACHE_TIMEOUT', 60)
+        self.enabled = app.config.get('CACHE_ENABLED', True)
+        app.extensions['response_cache'] = self
+
+    @property
+    def version(self):
+        return f'{BoardState.for_request()[0]}.{self.backend.counter(VERSION_KEY)}'
+
+    def make_key(self):
+        args = urlencode(sorted(request.args.items(multi=True)))
+        return f'view:{self.version}:{request.endpoint}:{request.path}?{args}'
+
+    def cached(self, view=None, anonymous_only=False):
+        """Декоратор GET-маршрута: отдает сохраненный ответ.
+
+        anonymous_only=True - для страниц, зависящих от пользователя:
+        кэшируются только ответы для запросов без сессии.
+        """
+        if view is None:
+            return lambda view: self.cached(view, anonymous_only)
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if (not self.enabled or request.method != 'GET'
+                    or (anonymous_only and not is_anonymous_request())):
+                return view(*args, **kwargs)
+
+            key = self.make_key()
+            entry = self.backend.get(key)
+            if entry is not None:
+                body, status, headers = entry
+                return make_response(body, status, headers)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.direct_passthrough:
+                headers = {'Content-Type': response.headers.get('Content-Type')}
+                self.backend.set(key, (response.get_data(), response.status_code, headers), self.timeout)
+            return response
+
+        return wrapper
+
+    def invalidate(self):
+        """Сброс всех закэшированных ответов после изменения данных"""
+        if self.backend is not None:
+            self.backend.incr(VERSION_KEY)
+
+
+response_cache = ResponseCache()
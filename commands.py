@@ -0,0 +1,388 @@
+from flask import Blueprint, current_app
+from flask_migrate import upgrade
+from models import db, User, Post, Review, CategoryCounter
+from search import rebuild_index
+from pagination import clear_total_cache, keyset_order, keyset_after
+from query_plans import explain, full_scans
+from cache import response_cache
+from assets import assets, build as build_assets
+from archive import archive_posts, assign_expiry, archive_candidates, expiry_for
+from purge import purge_user, clear_posts
+from prices import backfill_prices
+from suggest import suggestions
+from transfer import export_ndjson, export_csv, read_ndjson, read_csv, import_data
+from auth import identity_cache, issue_session_token
+from queries import (latest_posts, active_posts, post_by_id, post_reviews, buyer_review, user_by_telegram_id,
+                     user_posts, seller_reviews, pending_reviews, apply_price_filter, build_search_query)
+from datetime import datetime
+import benchmark
+import json
+import os
+import sys
+import time
+import click
+
+# Только команды flask: воркеры веб-сервера этот модуль не загружают (см. create_app)
+bp = Blueprint('commands', __name__, cli_group=None)
+
+
+@bp.cli.command('init-db')
+def init_db_command():
+    """Инициализация базы данных (применение всех миграций)"""
+    upgrade()
+    print('База данных инициализирована.')
+
+
+@bp.cli.command('clear-posts')
+def clear_posts_command():
+    """Очистка всех объявлений (с отзывами к ним)"""
+    deleted = clear_posts(current_app.config['ARCHIVE_BATCH_SIZE'])
+    print(f'Все объявления удалены: {deleted}.')
+
+
+@bp.cli.command('purge-user')
+@click.argument('telegram_id', type=int)
+@click.option('--batch-size', type=int, default=None, help='Строк в одной транзакции (ARCHIVE_BATCH_SIZE)')
+def purge_user_command(telegram_id, batch_size):
+    """Удаление пользователя со всеми объявлениями и отзывами, включая архивные"""
+    user_id = db.session.scalar(db.select(User.id).filter_by(telegram_id=telegram_id))
+    if user_id is None:
+        print('Пользователь не найден')
+        return
+
+    started = time.perf_counter()
+    counts = purge_user(user_id, batch_size or current_app.config['ARCHIVE_BATCH_SIZE'])
+    for table, deleted in counts.items():
+        print(f'{table}: {deleted}')
+    print(f'Удалено строк: {sum(counts.values())} за {time.perf_counter() - started:.1f} с')
+
+
+@bp.cli.command('make-admin')
+@click.argument('telegram_id')
+def make_admin_command(telegram_id):
+    """Назначение пользователя администратором"""
+    user = User.query.filter_by(telegram_id=telegram_id).first()
+    if user:
+        user.is_admin = True
+        db.session.commit()
+        print(f'Пользователь {user.first_name} назначен администратором')
+    else:
+        print('Пользователь не найден')
+
+
+@bp.cli.command('rebuild-ratings')
+def rebuild_ratings_command():
+    """Пересчет рейтингов продавцов по одобренным отзывам"""
+    updated = User.rebuild_ratings()
+    db.session.commit()
+    print(f'Рейтинги пересчитаны для {updated} пользователей.')
+
+
+@bp.cli.command('reconcile-categories')
+def reconcile_categories_command():
+    """Сверка счетчиков объявлений по категориям с объявлениями и исправление расхождений"""
+    fixed = CategoryCounter.reconcile()
+    db.session.commit()
+    if fixed:
+        response_cache.invalidate()
+    for category, ((total, recent), (new_total, new_recent)) in sorted(fixed.items()):
+        print(f'{category}: {total} -> {new_total}, за сутки {recent} -> {new_recent}')
+    print(f'Исправлено категорий: {len(fixed)}.')
+
+
+@bp.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Создание и заполнение полнотекстового индекса объявлений"""
+    dialect = rebuild_index()
+    print(f'Поисковый индекс перестроен ({dialect}).')
+
+
+@bp.cli.command('build-assets')
+def build_assets_command():
+    """Сборка статики: имена с хэшем содержимого, сжатые gzip и brotli копии и манифест"""
+    manifest = build_assets(current_app.static_folder)
+    assets.load()
+    for filename, hashed in sorted(manifest.items()):
+        print(f'{filename} -> {hashed}')
+    print(f'Собрано файлов: {len(manifest)}.')
+
+
+@bp.cli.command('archive-posts')
+@click.option('--batch-size', type=int, default=None, help='Объявлений в одной транзакции (ARCHIVE_BATCH_SIZE)')
+@click.option('--inactive-days', type=int, default=None, help='Через сколько дней архивировать снятые (ARCHIVE_INACTIVE_DAYS)')
+@click.option('--max-batches', type=int, default=None, help='Остановиться после стольких пачек')
+@click.option('--backfill', is_flag=True, help='Сначала назначить срок объявлениям без expires_at')
+def archive_posts_command(batch_size, inactive_days, max_batches, backfill):
+    """Перенос истекших и давно снятых объявлений с отзывами в архив"""
+    config = current_app.config
+    batch_size = batch_size or config['ARCHIVE_BATCH_SIZE']
+    if inactive_days is None:
+        inactive_days = config['ARCHIVE_INACTIVE_DAYS']
+
+    if backfill:
+        print(f'Назначен срок объявлениям: {assign_expiry(batch_size)}')
+    started = time.perf_counter()
+    posts, reviews = archive_posts(batch_size, inactive_days, max_batches)
+    print(f'В архив перенесено объявлений: {posts}, отзывов: {reviews} '
+          f'за {time.perf_counter() - started:.1f} с')
+
+
+@bp.cli.command('backfill-prices')
+@click.option('--batch-size', default=500, show_default=True, help='Объявлений в одной транзакции')
+@click.option('--all', 'reparse', is_flag=True, help='Разобрать заново все цены, а не только еще не разобранные')
+def backfill_prices_command(batch_size, reparse):
+    """Разбор текста цены объявлений в сумму и валюту для фильтра и сортировки"""
+    started = time.perf_counter()
+    updated = backfill_prices(batch_size, only_missing=not reparse)
+    if updated:
+        response_cache.invalidate()
+        clear_total_cache()
+    print(f'Разобрано цен: {updated} за {time.perf_counter() - started:.1f} с')
+
+
+@bp.cli.command('export-data')
+@click.argument('output')
+@click.option('--format', 'data_format', type=click.Choice(['ndjson', 'csv']), default='ndjson', show_default=True,
+              help='ndjson - один файл (- для stdout), csv - каталог с файлом на таблицу')
+@click.option('--batch-size', default=1000, show_default=True, help='Строк на одно чтение курсора')
+def export_data_command(output, data_format, batch_size):
+    """Выгрузка пользователей, объявлений и отзывов (потоково, в постоянной памяти)"""
+    started = time.perf_counter()
+    if data_format == 'csv':
+        counts = export_csv(output, batch_size)
+    elif output == '-':
+        counts = export_ndjson(sys.stdout, batch_size)
+    else:
+        with open(output, 'w', encoding='utf-8') as stream:
+            counts = export_ndjson(stream, batch_size)
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    for table, rows in counts.items():
+        click.echo(f'{table}: {rows}', err=True)
+    click.echo(f'Выгружено строк: {total} за {elapsed:.1f} с ({total / max(elapsed, 1e-9):.0f} строк/с)', err=True)
+
+
+@bp.cli.command('import-data')
+@click.argument('source', type=click.Path(exists=True, allow_dash=True))
+@click.option('--batch-size', default=1000, show_default=True, help='Строк в одной вставке и транзакции')
+def import_data_command(source, batch_size):
+    """Загрузка выгрузки export-data: файл NDJSON (- для stdin) или каталог CSV"""
+    if os.path.isdir(source):
+        stats = import_data(read_csv(source), batch_size)
+    elif source == '-':
+        stats = import_data(read_ndjson(sys.stdin), batch_size)
+    else:
+        with open(source, encoding='utf-8') as stream:
+            stats = import_data(read_ndjson(stream), batch_size)
+    for table, values in stats.items():
+        rate = values['rows'] / max(values['seconds'], 1e-9)
+        print(f"{table}: {values['rows']} строк, пропущено {values['skipped']}, "
+              f"{values['seconds']:.1f} с ({rate:.0f} строк/с)")
+
+
+@bp.cli.command('explain-queries')
+def explain_queries_command():
+    """Проверка планов основных запросов маршрутов: полный просмотр таблиц недопустим"""
+    post = Post.query.filter_by(is_active=True).first()
+    if not post:
+        print('База пуста: сначала заполните ее тестовыми данными.')
+        raise SystemExit(1)
+    author = post.author
+    now = datetime.utcnow()
+
+    feed = keyset_order(active_posts())
+    pending = keyset_order(pending_reviews(), Review)
+    # Лимиты - как у маршрутов: страница по умолчанию плюс одна строка (есть ли следующая)
+    route_queries = {
+        'index': latest_posts(),
+        'posts / api_posts': feed.limit(21),
+        'posts / api_posts (category)': keyset_order(active_posts(post.category)).limit(21),
+        'posts / api_posts (cursor)': keyset_after(feed, now, post.id).limit(21),
+        'post_detail': post_by_id(post.id),
+        'post_detail (reviews)': post_reviews(post.id),
+        'post_detail (can_review)': buyer_review(post.id, author.id),
+        'current user': user_by_telegram_id(author.telegram_id),
+        'get_user_posts': user_posts(author.id),
+        'get_user_reviews': seller_reviews(author.id),
+        'admin_reviews': pending.limit(51),
+        'admin_reviews (cursor)': keyset_after(pending, now, 0, Review).limit(51),
+        'archive-posts': archive_candidates(now, 500, 30),
+        'search_posts': build_search_query(post.title, '').limit(21),
+        'search_posts (category)': build_search_query(post.title, post.category).limit(21),
+        'api_posts (price sort)': apply_price_filter(
+            active_posts(), {'sort': 'price_asc', 'currency': 'RUB'}).limit(21),
+        'api_posts (category, price range)': apply_price_filter(
+            active_posts(post.category),
+            {'min_price': 1000, 'max_price': 5000, 'sort': 'price_desc', 'currency': 'RUB'}).limit(21)
+    }
+
+    failed = False
+    for name, query in route_queries.items():
+        plan = explain(query)
+        scans = full_scans(plan)
+        failed = failed or bool(scans)
+        print(f"{'FAIL' if scans else 'OK'} {name}")
+        for line in (scans if scans else []):
+            print(f'    {line}')
+    db.session.rollback()
+
+    if failed:
+        raise SystemExit(1)
+
+
+@bp.cli.command('check-queries')
+def check_queries_command():
+    """Проверка, что число SQL-запросов на список не растет с размером страницы"""
+    author = User.query.join(Post).first()
+    urls = [
+        ('/api/posts?per_page=1', '/api/posts?per_page=50'),
+        ('/api/posts?per_page=1&excerpt=1', '/api/posts?per_page=50&excerpt=1'),
+        ('/posts?category=продажа', '/posts'),
+        ('/search?q=а&category=продажа', '/search?q=а')
+    ]
+    if author:
+        urls.append((f'/api/user/{author.telegram_id}/posts?fields=id',
+                     f'/api/user/{author.telegram_id}/posts'))
+    admin = User.query.filter_by(is_admin=True).first()
+    if admin:
+        headers = {'Authorization': f'Bearer {issue_session_token(admin)}'}
+        urls.append(('/admin/reviews?per_page=1', '/admin/reviews', headers))
+
+    app = current_app._get_current_object()
+    client = app.test_client()
+    failed = False
+    for small, large, *headers in urls:
+        counts = []
+        for url in (small, large):
+            clear_total_cache()
+            response_cache.invalidate()
+            identity_cache.clear()
+            with benchmark.StatementCounter(*db.engines.values()) as counter:
+                benchmark.isolated_get(app, client, url, headers[0] if headers else None)
+            counts.append(counter.count)
+        status = 'OK' if counts[0] == counts[1] else 'FAIL'
+        failed = failed or status == 'FAIL'
+        print(f'{status} {small} -> {counts[0]}, {large} -> {counts[1]}')
+
+    if failed:
+        raise SystemExit(1)
+
+
+@bp.cli.command('seed-categories')
+def seed_categories_command():
+    """Заполнение базы тестовыми данными"""
+    # Создаем тестового пользователя (или берем созданного при прошлом запуске)
+    test_user = User.query.filter_by(telegram_id=123456789).first()
+    if not test_user:
+        test_user = User(
+            telegram_id=123456789,
+            username='test_user',
+            first_name='Тестовый',
+            last_name='Пользователь'
+        )
+        db.session.add(test_user)
+        db.session.flush()
+
+    # Создаем тестовые объявления (со сроком и в счетчиках категорий, как созданные через API)
+    categories = [cat[0] for cat in Post.CATEGORIES]
+    now = datetime.utcnow()
+    for i, category in enumerate(categories):
+        post = Post(
+            title=f'Тестовое объявление {i + 1}',
+            content=f'Это тестовое объявление в категории {category}',
+            category=category,
+            price=f'{100 * (i + 1)} руб.' if i % 2 == 0 else None,
+            contact_info='@test_user',
+            created_at=now,
+            expires_at=expiry_for(category, now),
+            user_id=test_user.id
+        )
+        db.session.add(post)
+        CategoryCounter.adjust(category, now, 1)
+
+    db.session.commit()
+    response_cache.invalidate()
+    print('Тестовые данные добавлены')
+
+
+@bp.cli.command('seed-bench')
+@click.option('--users', default=1000, show_default=True, help='Сколько пользователей создать')
+@click.option('--posts', default=10000, show_default=True, help='Сколько объявлений создать')
+@click.option('--reviews', default=20000, show_default=True, help='Сколько отзывов создать')
+@click.option('--seed', default=42, show_default=True, help='Зерно генератора (одинаковые данные при повторе)')
+def seed_bench_command(users, posts, reviews, seed):
+    """Массовое заполнение базы для нагрузочных замеров"""
+    started = time.perf_counter()
+    counts = benchmark.seed(users, posts, reviews, seed)
+    db.session.commit()
+    response_cache.invalidate()
+    clear_total_cache()
+    print(f"Добавлено: пользователей {counts['users']}, объявлений {counts['posts']}, "
+          f"отзывов {counts['reviews']} за {time.perf_counter() - started:.1f} с")
+
+
+@bp.cli.command('benchmark')
+@click.option('--iterations', default=50, show_default=True, help='Запросов на каждый маршрут')
+@click.option('--warmup', default=5, show_default=True, help='Прогревочных запросов на маршрут')
+@click.option('--url', 'base_url', default=None, help='Адрес запущенного сервера (например, gunicorn) вместо тестового клиента')
+@click.option('--cache/--no-cache', default=False, show_default=True, help='Замерять с кэшем ответов')
+@click.option('--output', type=click.Path(dir_okay=False), help='Сохранить отчет в файл')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), help='Сравнить с сохраненным отчетом')
+@click.option('--tolerance', default=0.2, show_default=True, help='Допустимый рост p95 относительно baseline')
+def benchmark_command(iterations, warmup, base_url, cache, output, baseline, tolerance):
+    """Замер задержек (p50/p95/p99), числа SQL-запросов и размера ответа всех маршрутов"""
+    admin = User.query.filter_by(is_admin=True).first()
+    admin_headers = {'Authorization': f'Bearer {issue_session_token(admin)}'} if admin else None
+    scenarios = benchmark.build_scenarios(admin_headers)
+    if not scenarios:
+        print('База пуста: сначала выполните flask seed-bench.')
+        raise SystemExit(1)
+
+    meta = {
+        'database': db.engine.dialect.name,
+        'rows': {
+            'users': User.query.count(),
+            'posts': Post.query.count(),
+            'reviews': Review.query.count()
+        },
+        'iterations': iterations,
+        'target': base_url or 'test-client',
+        # При замере по HTTP кэш настраивается на стороне сервера
+        'response_cache': None if base_url else cache
+    }
+
+    if not base_url and current_app.config.get('SUGGEST_ENABLED', True):
+        # Иначе индекс строится в фоне во время замера, и подсказки первых запросов пусты
+        suggestions.build_now()
+
+    cache_enabled = response_cache.enabled
+    response_cache.enabled = cache
+    try:
+        results = benchmark.run(current_app._get_current_object(), scenarios, iterations, warmup, base_url)
+    finally:
+        response_cache.enabled = cache_enabled
+
+    text = benchmark.report(results, **meta)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+
+    if baseline:
+        with open(baseline, encoding='utf-8') as f:
+            regressions = benchmark.compare(results, json.load(f)['routes'], tolerance)
+        for line in regressions:
+            print(f'REGRESSION {line}', file=sys.stderr)
+        if regressions:
+            raise SystemExit(1)
+
+
+@bp.cli.command('benchmark-startup')
+@click.option('--runs', default=5, show_default=True, help='Сколько раз запустить приложение')
+@click.option('--url', default='/', show_default=True, help='Первый запрос после старта')
+def benchmark_startup_command(runs, url):
+    """Замер холодного старта: импорт, create_app и первый запрос в новом процессе"""
+    results, statuses = benchmark.startup(runs, url)
+    for phase, values in results.items():
+        print(f"{phase:<14} p50 {values['p50_ms']:>8} мс   max {values['max_ms']:>8} мс")
+    print(f'Ответы {url}: {statuses}')
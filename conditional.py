@@ -0,0 +1,60 @@
+from datetime import timezone
+from functools import wraps
+from flask import request, make_response
+from models import BoardState
+from auth import current_identity
+
+
+def _matches(etag, last_modified):
+    """Совпадают ли валидаторы клиента с текущими (If-None-Match важнее If-Modified-Since)"""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified is not None:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def _set_validators(response, etag, last_modified, per_user):
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # Клиент хранит ответ, но перед использованием всегда сверяет версию
+    response.cache_control.no_cache = True
+    if per_user:
+        response.cache_control.private = True
+        response.vary.update(('Authorization', 'Cookie'))
+    return response
+
+
+def conditional(view=None, per_user=False):
+    """Декоратор GET-маршрута: ETag и Last-Modified по версии доски и ответ 304.
+
+    Проверка стоит одного запроса к board_state; при совпадении версии
+    маршрут не выполняется и ничего не сериализуется. per_user=True - для
+    ответов, зависящих от пользователя: его id входит в ETag.
+    """
+    if view is None:
+        return lambda view: conditional(view, per_user)
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view(*args, **kwargs)
+
+        version, updated_at = BoardState.for_request()
+        etag = f'v{version}'
+        if per_user:
+            identity = current_identity()
+            etag += f'-u{identity.id}' if identity else '-anon'
+        # В HTTP дата с точностью до секунды
+        last_modified = updated_at.replace(microsecond=0, tzinfo=timezone.utc) if updated_at else None
+
+        if _matches(etag, last_modified):
+            return _set_validators(make_response('', 304), etag, last_modified, per_user)
+
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200:
+            _set_validators(response, etag, last_modified, per_user)
+        return response
+
+    return wrapper
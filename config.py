@@ -4,14 +4,104 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def database_uri(url):
+    """Исправление схемы postgres:// (так ее отдает Render) для SQLAlchemy"""
+    if url.startswith('postgres://'):
+        return url.replace('postgres://', 'postgresql://', 1)
+    return url
+
+
+def engine_options(url):
+    """Параметры пула соединений; pool_pre_ping отбрасывает соединения, закрытые сервером БД"""
+    options = {
+        'pool_pre_ping': True,
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    }
+    if not url.startswith('sqlite'):
+        options.update(
+            pool_size=int(os.environ.get('DB_POOL_SIZE', 5)),
+            max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+            pool_timeout=int(os.environ.get('DB_POOL_TIMEOUT', 30))
+        )
+    return options
+
+
+def category_days(value):
+    """Сроки по категориям из строки вида "инфо=14,поиск=30" """
+    days = {}
+    for item in value.split(','):
+        category, _, count = item.partition('=')
+        if category.strip() and count.strip():
+            days[category.strip()] = int(count)
+    return days
+
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key'
     TELEGRAM_BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN')
+
+    # Уведомления через Bot API (TELEGRAM_API_URL можно направить на локальную заглушку)
+    TELEGRAM_API_URL = os.environ.get('TELEGRAM_API_URL', 'https://api.telegram.org')
+    NOTIFICATIONS_ENABLED = os.environ.get('NOTIFICATIONS_ENABLED', '1') == '1'
+
+    # Сессии пользователей: initData проверяются один раз и обмениваются на подписанный токен
+    TELEGRAM_INIT_DATA_MAX_AGE = int(os.environ.get('TELEGRAM_INIT_DATA_MAX_AGE', 86400))
+    SESSION_TOKEN_MAX_AGE = int(os.environ.get('SESSION_TOKEN_MAX_AGE', 3600))
+    IDENTITY_CACHE_SIZE = int(os.environ.get('IDENTITY_CACHE_SIZE', 1024))
+    IDENTITY_CACHE_TTL = int(os.environ.get('IDENTITY_CACHE_TTL', 300))
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
-    # Исправление для PostgreSQL на Render
-    database_url = os.environ.get('DATABASE_URL')
-    if database_url and database_url.startswith('postgres://'):
-        SQLALCHEMY_DATABASE_URI = database_url.replace('postgres://', 'postgresql://', 1)
-    else:
-        SQLALCHEMY_DATABASE_URI = database_url or 'sqlite:///site.db'
\ No newline at end of file
+    # Кэш ответов для анонимных пользователей (без CACHE_REDIS_URL - в памяти процесса)
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+    CACHE_TIMEOUT = int(os.environ.get('CACHE_TIMEOUT', 60))
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 512))
+
+    # Лента событий /api/posts/stream (SSE). Без EVENTS_REDIS_URL события видят только
+    # подписчики того же процесса; с ним - всех воркеров (Redis Streams)
+    EVENTS_REDIS_URL = os.environ.get('EVENTS_REDIS_URL') or CACHE_REDIS_URL
+    EVENTS_BUFFER_SIZE = int(os.environ.get('EVENTS_BUFFER_SIZE', 1000))
+    SSE_HEARTBEAT = int(os.environ.get('SSE_HEARTBEAT', 15))
+    SSE_MAX_DURATION = int(os.environ.get('SSE_MAX_DURATION', 300))
+    SSE_RETRY_MS = int(os.environ.get('SSE_RETRY_MS', 3000))
+    # Подписчиков на воркер; каждый занимает поток, выделенный сверх GUNICORN_THREADS (gunicorn.conf.py)
+    SSE_MAX_CLIENTS = int(os.environ.get('SSE_MAX_CLIENTS', 12))
+
+    # Подсказки поиска: индекс слов заголовков в памяти каждого воркера, перестраивается
+    # раз в SUGGEST_REFRESH секунд; вес слова убывает вдвое за SUGGEST_HALF_LIFE_DAYS
+    SUGGEST_ENABLED = os.environ.get('SUGGEST_ENABLED', '1') == '1'
+    SUGGEST_MAX_TERMS = int(os.environ.get('SUGGEST_MAX_TERMS', 50000))
+    SUGGEST_REFRESH = int(os.environ.get('SUGGEST_REFRESH', 600))
+    SUGGEST_HALF_LIFE_DAYS = int(os.environ.get('SUGGEST_HALF_LIFE_DAYS', 7))
+
+    # Изображения объявлений (на Render каталог должен быть на постоянном диске)
+    UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER')
+    IMAGE_MAX_BYTES = int(os.environ.get('IMAGE_MAX_BYTES', 10 * 1024 * 1024))
+    MAX_CONTENT_LENGTH = IMAGE_MAX_BYTES + 1024 * 1024  # изображение и поля формы
+
+    # Метрики маршрутов (/metrics в формате Prometheus; METRICS_TOKEN закрывает доступ)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_SLOW_QUERY_MS = int(os.environ.get('METRICS_SLOW_QUERY_MS', 200))
+    # Профиль отдельного запроса по ?_profile=1 (только для администраторов)
+    PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED') == '1'
+
+    # Срок жизни объявлений в днях (0 - бессрочно): по умолчанию и для отдельных категорий
+    POST_TTL_DEFAULT_DAYS = int(os.environ.get('POST_TTL_DEFAULT_DAYS', 60))
+    POST_TTL_DAYS = category_days(os.environ.get('POST_TTL_DAYS', 'инфо=14,поиск=30,услуги=90'))
+    # Архивация: снятые автором объявления уходят в архив через ARCHIVE_INACTIVE_DAYS дней
+    # (0 - не уходят); ARCHIVE_INTERVAL - период фонового запуска в секундах (0 - только командой)
+    ARCHIVE_INACTIVE_DAYS = int(os.environ.get('ARCHIVE_INACTIVE_DAYS', 30))
+    ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', 500))
+    ARCHIVE_INTERVAL = int(os.environ.get('ARCHIVE_INTERVAL', 3600))
+
+    SQLALCHEMY_DATABASE_URI = database_uri(os.environ.get('DATABASE_URL') or 'sqlite:///site.db')
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+
+    # Реплики только для чтения (через запятую): GET-запросы читают с них.
+    # Flask-SQLAlchemy не применяет SQLALCHEMY_ENGINE_OPTIONS к binds - параметры пула задаются явно
+    DATABASE_REPLICA_URLS = [database_uri(url.strip())
+                             for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    SQLALCHEMY_BINDS = {f'replica_{i}': {'url': url, **engine_options(url)}
+                        for i, url in enumerate(DATABASE_REPLICA_URLS)}
+    # Сколько секунд после записи пользователь читает из основной базы
+    REPLICA_LAG_SECONDS = int(os.environ.get('REPLICA_LAG_SECONDS', 5))
\ No newline at end of file
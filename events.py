@@ -0,0 +1,252 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from flask import Response
+
+logger = logging.getLogger(__name__)
+
+# Типы событий ленты
+POST_CREATED = 'post-created'
+POST_UPDATED = 'post-updated'
+POST_DEACTIVATED = 'post-deactivated'
+# Last-Event-ID неизвестен (старый или из другого процесса): клиенту нужно перечитать ленту
+RESET = 'reset'
+
+STREAM_KEY = 'board:events'
+
+
+def post_event(post):
+    """Компактное описание объявления для события (без текста и автора)"""
+    return {
+        'id': str(post.id),
+        'category': post.category,
+        'title': post.title,
+        'price': post.price,
+        'is_active': bool(post.is_active),
+        'user_id': post.user_id,
+        'updated_at': post.updated_at.isoformat() if post.updated_at else None
+    }
+
+
+class EventLog:
+    """Последние события процесса в кольцевом буфере; подписчики ждут новых на условии.
+
+    id событий - строки: без общего бэкенда "<эпоха процесса>-<номер>",
+    поэтому id из другого процесса или до перезапуска не совпадет ни с одним.
+    """
+
+    def __init__(self, max_events=1000):
+        self._events = deque(maxlen=max_events)
+        self._condition = threading.Condition()
+        self._epoch = f'{os.getpid():x}{int(time.time()):x}'
+        self._sequence = 0
+
+    @property
+    def last_id(self):
+        with self._condition:
+            return self._events[-1][0] if self._events else None
+
+    def append(self, name, data, event_id=None):
+        with self._condition:
+            if event_id is None:
+                self._sequence += 1
+                event_id = f'{self._epoch}-{self._sequence}'
+            self._events.append((event_id, name, data))
+            self._condition.notify_all()
+        return event_id
+
+    def _after(self, last_id):
+        if last_id is None:
+            return []
+        for index in range(len(self._events) - 1, -1, -1):
+            if self._events[index][0] == last_id:
+                return list(self._events)[index + 1:]
+        return None
+
+    def since(self, last_id):
+        """События после last_id; None, если last_id в буфере нет"""
+        with self._condition:
+            return self._after(last_id)
+
+    def wait(self, last_id, timeout):
+        """События после last_id, ожидая их не дольше timeout секунд (None - last_id потерян)"""
+        with self._condition:
+            events = self._after(last_id) if last_id is not None else list(self._events)
+            if events == []:
+                self._condition.wait(timeout)
+                events = self._after(last_id) if last_id is not None else list(self._events)
+            return events
+
+
+class RedisEventRelay:
+    """Общая для воркеров лента событий в Redis Stream.
+
+    publish() добавляет событие в поток (XADD с ограничением длины), а поток
+    каждого процесса читает его (XREAD BLOCK) в локальный EventLog с id из
+    Redis: Last-Event-ID подходит любому воркеру. Подходит любой клиент с
+    интерфейсом Redis (xadd/xread), например локальная заглушка.
+    """
+
+    def __init__(self, client, log, max_events=1000):
+        self.client = client
+        self.log = log
+        self.max_events = max_events
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def publish(self, name, data):
+        self.client.xadd(STREAM_KEY, {'event': name, 'data': json.dumps(data, ensure_ascii=False)},
+                         maxlen=self.max_events, approximate=True)
+
+    def ensure_running(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name='event-relay', daemon=True).start()
+
+    def _run(self):
+        last_id = '$'
+        while True:
+            try:
+                for _, entries in self.client.xread({STREAM_KEY: last_id}, block=5000, count=100) or []:
+                    for entry_id, fields in entries:
+                        last_id = _text(entry_id)
+                        fields = {_text(key): _text(value) for key, value in fields.items()}
+                        self.log.append(fields['event'], json.loads(fields['data']), last_id)
+            except Exception:
+                logger.exception('Ошибка чтения событий из Redis')
+                time.sleep(1)
+
+
+def _text(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def format_event(name, data, event_id=None):
+    """Событие в формате text/event-stream"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {name}')
+    lines.append(f'data: {json.dumps(data, ensure_ascii=False, separators=(",", ":"))}')
+    return '\n'.join(lines) + '\n\n'
+
+
+class EventBroker:
+    """Публикация событий ленты и их раздача подписчикам SSE.
+
+    Без EVENTS_REDIS_URL события расходятся только внутри процесса (один
+    воркер или разработка). Поток подписчика не обращается к базе и
+    закрывается через SSE_MAX_DURATION секунд - браузер переподключится
+    с Last-Event-ID. Одновременных потоков в процессе не больше
+    SSE_MAX_CLIENTS: каждый занимает поток воркера gthread, добавленный
+    к потокам обычных запросов (см. gunicorn.conf.py).
+    """
+
+    def __init__(self, app=None):
+        self.log = EventLog()
+        self.relay = None
+        self.heartbeat = 15
+        self.max_duration = 300
+        self.max_clients = 12
+        self.retry_ms = 3000
+        self._clients = 0
+        self._clients_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        self.log = EventLog(config.get('EVENTS_BUFFER_SIZE', 1000))
+        self.heartbeat = config.get('SSE_HEARTBEAT', 15)
+        self.max_duration = config.get('SSE_MAX_DURATION', 300)
+        self.max_clients = config.get('SSE_MAX_CLIENTS', 12)
+        self.retry_ms = config.get('SSE_RETRY_MS', 3000)
+        self.relay = self._create_relay(app)
+        app.extensions['events'] = self
+
+    def _create_relay(self, app):
+        url = app.config.get('EVENTS_REDIS_URL')
+        if not url:
+            return None
+        try:
+            import redis
+        except ImportError:
+            app.logger.warning('EVENTS_REDIS_URL задан, но пакет redis не установлен - события только внутри процесса')
+            return None
+        return RedisEventRelay(redis.Redis.from_url(url), self.log, app.config.get('EVENTS_BUFFER_SIZE', 1000))
+
+    def publish(self, name, data):
+        """Публикация события после commit; ошибки доставки не ломают запрос"""
+        try:
+            if self.relay is not None:
+                self.relay.publish(name, data)
+            else:
+                self.log.append(name, data)
+        except Exception:
+            logger.exception('Не удалось опубликовать событие %s', name)
+
+    def _acquire_client(self):
+        with self._clients_lock:
+            if self._clients >= self.max_clients:
+                return False
+            self._clients += 1
+            return True
+
+    def _release_client(self):
+        with self._clients_lock:
+            self._clients -= 1
+
+    def stream(self, last_event_id=None, category=None):
+        """Ответ text/event-stream с событиями после last_event_id (или с текущего момента)"""
+        if self.relay is not None:
+            self.relay.ensure_running()
+        response = Response(self._generate(last_event_id, category), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        # nginx и прокси Render не должны буферизовать поток
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+
+    def _generate(self, last_event_id, category):
+        # Место занимается при первой итерации: не начатый генератор finally не выполнит
+        if not self._acquire_client():
+            # Мест нет: браузер переподключится позже сам (на 503 EventSource сдается навсегда)
+            yield f'retry: {self.retry_ms * 10}\n\n'
+            return
+        try:
+            yield f'retry: {self.retry_ms}\n\n'
+            cursor = last_event_id
+            if cursor is not None and self.log.since(cursor) is None:
+                yield format_event(RESET, {}, self.log.last_id)
+                cursor = None
+            if cursor is None:
+                cursor = self.log.last_id
+
+            deadline = time.monotonic() + self.max_duration
+            while time.monotonic() < deadline:
+                events = self.log.wait(cursor, self.heartbeat)
+                if events is None:
+                    # Подписчик отстал больше чем на размер буфера
+                    cursor = self.log.last_id
+                    yield format_event(RESET, {}, cursor)
+                    continue
+                if not events:
+                    yield ': ping\n\n'
+                    continue
+                for event_id, name, data in events:
+                    cursor = event_id
+                    # Перенесенное в другую категорию объявление видят подписчики обеих
+                    if category and category not in (data.get('category'), data.get('previous_category')):
+                        continue
+                    yield format_event(name, data, event_id)
+        finally:
+            self._release_client()
+
+
+events = EventBroker()
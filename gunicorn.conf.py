@@ -0,0 +1,41 @@
+import os
+
+# Конфигурация gunicorn (читается из текущего каталога автоматически)
+wsgi_app = 'app:create_app(cli=False)'
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+# Потоки воркера gthread. Подписчик /api/posts/stream держит поток все время
+# соединения (до SSE_MAX_DURATION), поэтому потоки под подписчиков добавляются
+# к потокам обычных запросов, а не отнимаются у них: обычным запросам всегда
+# остается GUNICORN_THREADS потоков на воркер, подписчиков не больше
+# SSE_MAX_CLIENTS на воркер (лишние получают retry и переподключаются позже).
+#
+# Емкость: WEB_CONCURRENCY * SSE_MAX_CLIENTS одновременных подписчиков. Ждущий
+# подписчик не держит соединение с базой и не тратит CPU (heartbeat раз в
+# SSE_HEARTBEAT секунд) - его цена в основном стек потока, поэтому при росте
+# числа вкладок Mini App увеличивается SSE_MAX_CLIENTS, а не GUNICORN_THREADS
+# и не пул соединений с базой.
+request_threads = int(os.environ.get('GUNICORN_THREADS', 8))
+stream_threads = int(os.environ.get('SSE_MAX_CLIENTS', 12))
+threads = request_threads + stream_threads
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+# Приложение импортируется один раз в мастере, воркеры получают его через fork:
+# быстрее старт и общая память под код
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+
+def post_fork(server, worker):
+    """Пулы соединений, открытые в мастере до fork, не должны использоваться воркерами.
+
+    dispose(close=False) забывает унаследованные соединения, не закрывая их:
+    сокеты остаются у мастера, воркер открывает свои.
+    """
+    if not preload_app:
+        return
+    from models import db
+
+    app = worker.app.wsgi()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
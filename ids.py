@@ -0,0 +1,62 @@
+import os
+import time
+import uuid
+from datetime import timezone
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.types import TypeDecorator, LargeBinary
+
+
+def uuid7(moment=None, random_bits=None):
+    """UUID версии 7 (RFC 9562): 48 бит времени в миллисекундах, затем случайные биты.
+
+    Новые ключи растут со временем, поэтому вставка идет в конец индекса,
+    а не в случайную страницу B-дерева. moment (datetime в UTC) и
+    random_bits (80 бит) - для воспроизводимой генерации тестовых данных.
+    """
+    if moment is None:
+        milliseconds = time.time_ns() // 1_000_000
+    else:
+        milliseconds = int(moment.replace(tzinfo=timezone.utc).timestamp() * 1000)
+    if random_bits is None:
+        random_bits = int.from_bytes(os.urandom(10), 'big')
+    value = milliseconds << 80 | random_bits
+    value = value & ~(0xF << 76) | 0x7 << 76  # версия
+    value = value & ~(0x3 << 62) | 0x2 << 62  # вариант RFC
+    return uuid.UUID(int=value)
+
+
+def parse_uuid(value):
+    """UUID из строки запроса или JSON; None, если значение некорректно"""
+    if isinstance(value, uuid.UUID):
+        return value
+    try:
+        return uuid.UUID(str(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class UUIDType(TypeDecorator):
+    """UUID: тип uuid в PostgreSQL, 16 байт (BLOB) в остальных базах.
+
+    В Python значения - uuid.UUID; при записи принимаются и строки
+    (старые ссылки вида 8-4-4-4-12).
+    """
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=True))
+        return dialect.type_descriptor(LargeBinary(16))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if not isinstance(value, uuid.UUID):
+            value = uuid.UUID(str(value))
+        return value if dialect.name == 'postgresql' else value.bytes
+
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, uuid.UUID):
+            return value
+        return uuid.UUID(bytes=bytes(value))
@@ -0,0 +1,228 @@
+import hashlib
+import importlib.util
+import io
+import logging
+import os
+import queue
+import re
+import tempfile
+import threading
+import time
+from flask import url_for
+
+# Без Pillow изображения отдаются без уменьшения. Сам Pillow загружается лениво,
+# в фоновом потоке при первой обработке - это не замедляет старт воркера
+PILLOW_AVAILABLE = importlib.util.find_spec('PIL') is not None
+
+logger = logging.getLogger(__name__)
+
+# Варианты изображения: наибольшая сторона в пикселях
+VARIANTS = {
+    'thumb': 400,
+    'detail': 1280
+}
+# Форматы вариантов: формат Pillow, MIME-тип и параметры сохранения
+FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True})
+}
+ORIGINAL_TYPES = {
+    'jpg': 'image/jpeg',
+    'png': 'image/png',
+    'gif': 'image/gif',
+    'webp': 'image/webp'
+}
+# Ключ изображения: sha256 содержимого и расширение оригинала
+KEY_RE = re.compile(r'^[0-9a-f]{64}\.(jpg|png|gif|webp)$')
+
+
+class ImageError(ValueError):
+    """Загруженный файл не подходит как изображение объявления"""
+
+
+def detect_format(data):
+    """Формат изображения по сигнатуре файла (расширение и Content-Type не проверяются)"""
+    if data.startswith(b'\xff\xd8\xff'):
+        return 'jpg'
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def _write_atomic(path, data):
+    """Запись через временный файл: читатели не увидят недописанный файл"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class ImageStore:
+    """Хранилище изображений объявлений с адресацией по содержимому.
+
+    Оригинал сохраняется под sha256 своего содержимого, поэтому повторная
+    загрузка того же файла ничего не записывает. Уменьшенные варианты (WebP и
+    JPEG) готовит фоновый поток; URL вариантов не меняется вместе с
+    содержимым, поэтому они отдаются с долгим неизменяемым кэшированием.
+    """
+
+    def __init__(self, app=None):
+        self.root = None
+        self._pid = None
+        self._queue = None
+        self._pending = set()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.root = app.config.get('UPLOAD_FOLDER') or os.path.join(app.instance_path, 'uploads')
+        self.max_bytes = app.config.get('IMAGE_MAX_BYTES', 10 * 1024 * 1024)
+        self.max_pixels = app.config.get('IMAGE_MAX_PIXELS', 40_000_000)
+        app.extensions['images'] = self
+        app.add_template_global(image_src)
+        if not PILLOW_AVAILABLE:
+            app.logger.warning('Pillow не установлен - изображения отдаются без уменьшения')
+
+    # ПУТИ
+    def original_path(self, key):
+        return os.path.join(self.root, 'originals', key[:2], key)
+
+    def variant_path(self, key, variant, fmt):
+        digest = key.split('.')[0]
+        return os.path.join(self.root, 'variants', key[:2], f'{digest}-{variant}.{fmt}')
+
+    def has_variants(self, key):
+        return all(os.path.exists(self.variant_path(key, variant, fmt))
+                   for variant in VARIANTS for fmt in FORMATS)
+
+    # ЗАГРУЗКА
+    def save(self, file):
+        """Сохранение загруженного файла (werkzeug FileStorage); возвращает ключ изображения"""
+        data = file.read(self.max_bytes + 1)
+        if not data:
+            raise ImageError('Файл изображения пуст')
+        if len(data) > self.max_bytes:
+            raise ImageError(f'Изображение больше {self.max_bytes // (1024 * 1024)} МБ')
+
+        fmt = detect_format(data)
+        if fmt is None:
+            raise ImageError('Поддерживаются изображения JPEG, PNG, GIF и WebP')
+
+        key = f'{hashlib.sha256(data).hexdigest()}.{fmt}'
+        path = self.original_path(key)
+        if not os.path.exists(path):
+            _write_atomic(path, data)
+        if not self.has_variants(key):
+            self.enqueue(key)
+        return key
+
+    # ОТДАЧА
+    def resolve(self, key, variant, accept_webp=True):
+        """Файл для отдачи: (путь, MIME-тип, неизменяемый ли) или None.
+
+        Пока вариант не готов, отдается оригинал (без неизменяемого
+        кэширования), а вариант снова ставится в очередь.
+        """
+        if not KEY_RE.match(key) or (variant != 'original' and variant not in VARIANTS):
+            return None
+        original = self.original_path(key)
+        if variant == 'original':
+            return (original, ORIGINAL_TYPES[key.rsplit('.', 1)[1]], True) if os.path.exists(original) else None
+
+        fmt = 'webp' if accept_webp else 'jpg'
+        path = self.variant_path(key, variant, fmt)
+        if os.path.exists(path):
+            return path, FORMATS[fmt][1], True
+        if not os.path.exists(original):
+            return None
+        self.enqueue(key)
+        return original, ORIGINAL_TYPES[key.rsplit('.', 1)[1]], False
+
+    # ФОНОВАЯ ОБРАБОТКА
+    def enqueue(self, key):
+        if not PILLOW_AVAILABLE:
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                # Новый процесс (воркер gunicorn после fork) - свой поток и очередь
+                self._pid = os.getpid()
+                self._queue = queue.Queue()
+                self._pending = set()
+                threading.Thread(target=self._run, name='image-variants', daemon=True).start()
+            if key in self._pending:
+                return
+            self._pending.add(key)
+        self._queue.put(key)
+
+    def wait(self, timeout=None):
+        """Дождаться обработки очереди (для команд и проверок)"""
+        if self._queue is None or self._pid != os.getpid():
+            return True
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def _run(self):
+        while True:
+            key = self._queue.get()
+            try:
+                self.generate_variants(key)
+            except Exception:
+                logger.exception('Не удалось подготовить варианты изображения %s', key)
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+                self._queue.task_done()
+
+    def generate_variants(self, key):
+        """Уменьшенные копии оригинала во всех форматах (нужен Pillow)"""
+        from PIL import Image, ImageOps
+
+        Image.MAX_IMAGE_PIXELS = self.max_pixels
+        with Image.open(self.original_path(key)) as source:
+            source.seek(0)  # для анимированных GIF и WebP - первый кадр
+            image = ImageOps.exif_transpose(source)
+            image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+
+            for variant, size in VARIANTS.items():
+                resized = image.copy()
+                resized.thumbnail((size, size), Image.LANCZOS)
+                for fmt, (pil_format, _, options) in FORMATS.items():
+                    path = self.variant_path(key, variant, fmt)
+                    if os.path.exists(path):
+                        continue
+                    output = resized
+                    if pil_format == 'JPEG' and output.mode != 'RGB':
+                        # JPEG без прозрачности: подкладываем белый фон
+                        output = Image.new('RGB', resized.size, (255, 255, 255))
+                        output.paste(resized, mask=resized.getchannel('A'))
+                    _write_atomic(path, _encode(output, pil_format, options))
+
+
+def _encode(image, pil_format, options):
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def image_src(post, variant='thumb'):
+    """URL изображения объявления: загруженного (вариант) или внешней ссылки"""
+    if post.image_key:
+        return url_for('main.media', key=post.image_key, variant=variant)
+    return post.image_url
+
+
+images = ImageStore()
@@ -0,0 +1,236 @@
+import logging
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограмм
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50)
+SIZE_BUCKETS = (1000, 10000, 50000, 100000, 500000, 1000000)
+
+# Метка для запросов, не попавших ни в один маршрут (иначе каждый путь - новая серия)
+UNMATCHED = 'unmatched'
+
+
+class Histogram:
+    """Гистограмма в формате Prometheus: счетчики по корзинам, сумма и количество"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels):
+        lines = []
+        for bound, count in zip(self.buckets, self.counts):
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class SamplingProfiler:
+    """Сэмплирующий профилировщик одного потока: каждые interval секунд снимает его стек"""
+
+    def __init__(self, thread_id, interval=0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({code.co_filename}:{frame.f_lineno})')
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+
+def format_collapsed(samples):
+    """Стеки в формате collapsed (flamegraph.pl, speedscope): "a;b;c count" """
+    return '\n'.join(f'{stack} {count}' for stack, count in samples.most_common()) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class RequestMetrics:
+    """Метрики запросов по маршрутам: задержка, число SQL-запросов, время в БД и размер ответа.
+
+    Метрики хранятся в памяти процесса: при нескольких воркерах gunicorn
+    каждый отдает свои значения.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.slow_query_threshold = 0.2
+        self.profiler_enabled = False
+        self.profiler_interval = 0.001
+        self._lock = threading.Lock()
+        self._reset()
+        if app is not None:
+            self.init_app(app)
+
+    def _reset(self):
+        self.requests = Counter()
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.statements = defaultdict(lambda: Histogram(STATEMENT_BUCKETS))
+        self.db_time = defaultdict(float)
+        self.response_size = defaultdict(lambda: Histogram(SIZE_BUCKETS))
+        self.slow_queries = Counter()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('METRICS_ENABLED', True)
+        self.slow_query_threshold = app.config.get('METRICS_SLOW_QUERY_MS', 200) / 1000
+        self.profiler_enabled = app.config.get('PROFILER_ENABLED', False)
+        self.profiler_interval = app.config.get('PROFILER_INTERVAL', 0.001)
+        app.extensions['metrics'] = self
+        if not self.enabled:
+            return
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        # Слушаем все движки, чтобы учитывать и будущие подключения (например, реплики)
+        if not event.contains(Engine, 'before_cursor_execute', self._before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    # ЖИЗНЕННЫЙ ЦИКЛ ЗАПРОСА
+    def _before_request(self):
+        g.metrics_started_at = time.perf_counter()
+        g.metrics_statements = 0
+        g.metrics_db_time = 0.0
+        if self.profiler_enabled and request.args.get('_profile') == '1' and self._can_profile():
+            g.metrics_profiler = SamplingProfiler(threading.get_ident(), self.profiler_interval).start()
+
+    def _after_request(self, response):
+        started_at = g.pop('metrics_started_at', None)
+        if started_at is None:
+            return response
+        elapsed = time.perf_counter() - started_at
+        key = (request.endpoint or UNMATCHED, request.method)
+
+        size = None if response.direct_passthrough else response.calculate_content_length()
+        with self._lock:
+            self.requests[key + (response.status_code,)] += 1
+            self.latency[key].observe(elapsed)
+            self.statements[key].observe(g.get('metrics_statements', 0))
+            self.db_time[key] += g.get('metrics_db_time', 0.0)
+            if size is not None:
+                self.response_size[key].observe(size)
+
+        profiler = g.pop('metrics_profiler', None)
+        if profiler is not None:
+            response = self._profile_response(profiler.stop(), response)
+        return response
+
+    def _can_profile(self):
+        """Профиль запроса доступен только администраторам"""
+        from auth import current_identity
+
+        identity = current_identity()
+        return bool(identity and identity.is_admin)
+
+    def _profile_response(self, samples, response):
+        """Замена ответа профилем запроса"""
+        profile = response.__class__(format_collapsed(samples), mimetype='text/plain')
+        profile.headers['X-Profile-Samples'] = str(sum(samples.values()))
+        profile.headers['X-Profile-Interval'] = str(self.profiler_interval)
+        profile.headers['Cache-Control'] = 'no-store'
+        return profile
+
+    # СОБЫТИЯ ДВИЖКА БД
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('metrics_query_start')
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        if not has_request_context():
+            return
+
+        g.metrics_statements = g.get('metrics_statements', 0) + 1
+        g.metrics_db_time = g.get('metrics_db_time', 0.0) + elapsed
+        if elapsed >= self.slow_query_threshold:
+            endpoint = request.endpoint or UNMATCHED
+            with self._lock:
+                self.slow_queries[endpoint] += 1
+            logger.warning('Медленный SQL-запрос (%.1f мс) в %s %s: %s',
+                           elapsed * 1000, request.method, endpoint, ' '.join(statement.split())[:1000])
+
+    # ЭКСПОРТ
+    def render(self):
+        """Метрики в текстовом формате Prometheus"""
+        with self._lock:
+            lines = [
+                '# HELP board_requests_total Количество обработанных запросов.',
+                '# TYPE board_requests_total counter'
+            ]
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                lines.append(f'board_requests_total{{endpoint="{_escape(endpoint)}",method="{method}",'
+                             f'status="{status}"}} {count}')
+
+            for name, kind, help_text, series in (
+                ('board_request_duration_seconds', 'histogram', 'Время обработки запроса.', self.latency),
+                ('board_request_sql_statements', 'histogram', 'SQL-запросов на один HTTP-запрос.', self.statements),
+                ('board_response_size_bytes', 'histogram', 'Размер тела ответа.', self.response_size)
+            ):
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+                for (endpoint, method), histogram in sorted(series.items()):
+                    lines += histogram.render(name, f'endpoint="{_escape(endpoint)}",method="{method}"')
+
+            lines += [
+                '# HELP board_request_db_seconds_total Суммарное время SQL-запросов.',
+                '# TYPE board_request_db_seconds_total counter'
+            ]
+            for (endpoint, method), seconds in sorted(self.db_time.items()):
+                lines.append(f'board_request_db_seconds_total{{endpoint="{_escape(endpoint)}",'
+                             f'method="{method}"}} {seconds}')
+
+            lines += [
+                '# HELP board_slow_sql_statements_total SQL-запросы дольше порога METRICS_SLOW_QUERY_MS.',
+                '# TYPE board_slow_sql_statements_total counter'
+            ]
+            for endpoint, count in sorted(self.slow_queries.items()):
+                lines.append(f'board_slow_sql_statements_total{{endpoint="{_escape(endpoint)}"}} {count}')
+
+        return '\n'.join(lines) + '\n'
+
+
+metrics = RequestMetrics()
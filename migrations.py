@@ -3,6 +3,18 @@ from flask_migrate import Migrate
 from models import db
 import os
 
+# Объекты полнотекстового поиска создаются DDL-ом (см. search.py) и не описаны в моделях
+SEARCH_OBJECTS = ('post_fts', 'search_vector', 'ix_post_search_vector')
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Не даем autogenerate удалять объекты, которых нет в моделях"""
+    if reflected and compare_to is None and name and name.startswith(SEARCH_OBJECTS):
+        return False
+    return True
+
+
 def init_migrations(app):
-    migrate = Migrate(app, db)
-    return migrate
\ No newline at end of file
+    # render_as_batch: SQLite не умеет ALTER COLUMN/DROP CONSTRAINT без пересоздания таблицы
+    migrate = Migrate(app, db, render_as_batch=True, include_object=include_object)
+    return migrate
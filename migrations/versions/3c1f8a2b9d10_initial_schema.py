@@ -0,0 +1,83 @@
+"""initial schema
+
+Revision ID: 3c1f8a2b9d10
+Revises: 
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c1f8a2b9d10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Базы, созданные через db.create_all(), уже содержат эти таблицы
+    existing = sa.inspect(op.get_bind()).get_table_names()
+
+    if 'user' not in existing:
+        op.create_table(
+            'user',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('telegram_id', sa.BigInteger(), nullable=False),
+            sa.Column('username', sa.String(length=80), nullable=True),
+            sa.Column('first_name', sa.String(length=100), nullable=True),
+            sa.Column('last_name', sa.String(length=100), nullable=True),
+            sa.Column('phone', sa.String(length=20), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('is_admin', sa.Boolean(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('user', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_user_telegram_id'), ['telegram_id'], unique=True)
+
+    if 'post' not in existing:
+        op.create_table(
+            'post',
+            sa.Column('id', sa.String(length=36), nullable=False),
+            sa.Column('title', sa.String(length=200), nullable=False),
+            sa.Column('content', sa.Text(), nullable=False),
+            sa.Column('category', sa.String(length=50), nullable=False),
+            sa.Column('price', sa.String(length=50), nullable=True),
+            sa.Column('contact_info', sa.String(length=200), nullable=True),
+            sa.Column('image_url', sa.String(length=500), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'review' not in existing:
+        op.create_table(
+            'review',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('rating', sa.Integer(), nullable=False),
+            sa.Column('comment', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('is_approved', sa.Boolean(), nullable=True),
+            sa.Column('moderated_by', sa.Integer(), nullable=True),
+            sa.Column('moderated_at', sa.DateTime(), nullable=True),
+            sa.Column('buyer_id', sa.Integer(), nullable=False),
+            sa.Column('seller_id', sa.Integer(), nullable=False),
+            sa.Column('post_id', sa.String(length=36), nullable=False),
+            sa.ForeignKeyConstraint(['buyer_id'], ['user.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['moderated_by'], ['user.id']),
+            sa.ForeignKeyConstraint(['post_id'], ['post.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['seller_id'], ['user.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('buyer_id', 'post_id', name='unique_review_per_buyer_post')
+        )
+
+
+def downgrade():
+    op.drop_table('review')
+    op.drop_table('post')
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_telegram_id'))
+    op.drop_table('user')
@@ -0,0 +1,27 @@
+"""uploaded image key for posts
+
+Revision ID: 4d9b1e7c3a52
+Revises: e8f4a6c2d917
+Create Date: 2026-10-18 14:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4d9b1e7c3a52'
+down_revision = 'e8f4a6c2d917'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('post')}
+    if 'image_key' not in existing:
+        op.add_column('post', sa.Column('image_key', sa.String(length=80), nullable=True))
+
+
+def downgrade():
+    # Без batch-режима: пересоздание таблицы в SQLite удалило бы триггеры post_fts
+    op.drop_column('post', 'image_key')
@@ -0,0 +1,84 @@
+"""post expiry and archive tables
+
+Revision ID: 5f1a7d3e9b20
+Revises: 9c2e5f8a1d47
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5f1a7d3e9b20'
+down_revision = '9c2e5f8a1d47'
+branch_labels = None
+depends_on = None
+
+INACTIVE_POSTS = dict(postgresql_where=sa.text('is_active = false'), sqlite_where=sa.text('is_active = 0'))
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    # Без batch-режима: пересоздание таблицы post в SQLite удалило бы триггеры post_fts.
+    # Срок существующим объявлениям назначает flask archive-posts --backfill
+    if 'expires_at' not in {column['name'] for column in inspector.get_columns('post')}:
+        op.add_column('post', sa.Column('expires_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_post_expires_at', 'post', ['expires_at'], if_not_exists=True)
+    op.create_index('ix_post_inactive_updated', 'post', ['updated_at'], if_not_exists=True, **INACTIVE_POSTS)
+
+    if not inspector.has_table('post_archive'):
+        op.create_table(
+            'post_archive',
+            sa.Column('id', sa.String(length=36), nullable=False),
+            sa.Column('title', sa.String(length=200), nullable=False),
+            sa.Column('content', sa.Text(), nullable=False),
+            sa.Column('category', sa.String(length=50), nullable=False),
+            sa.Column('price', sa.String(length=50), nullable=True),
+            sa.Column('contact_info', sa.String(length=200), nullable=True),
+            sa.Column('image_url', sa.String(length=500), nullable=True),
+            sa.Column('image_key', sa.String(length=80), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.Column('expires_at', sa.DateTime(), nullable=True),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('archived_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id')
+        )
+    op.create_index('ix_post_archive_user_created', 'post_archive', ['user_id', 'created_at'], if_not_exists=True)
+
+    if not inspector.has_table('review_archive'):
+        op.create_table(
+            'review_archive',
+            sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('rating', sa.Integer(), nullable=False),
+            sa.Column('comment', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.Column('is_approved', sa.Boolean(), nullable=True),
+            sa.Column('moderated_by', sa.Integer(), nullable=True),
+            sa.Column('moderated_at', sa.DateTime(), nullable=True),
+            sa.Column('buyer_id', sa.Integer(), nullable=False),
+            sa.Column('seller_id', sa.Integer(), nullable=False),
+            sa.Column('post_id', sa.String(length=36), nullable=False),
+            sa.Column('archived_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['buyer_id'], ['user.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['moderated_by'], ['user.id']),
+            sa.ForeignKeyConstraint(['post_id'], ['post_archive.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['seller_id'], ['user.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id')
+        )
+    op.create_index('ix_review_archive_seller_approved_created', 'review_archive',
+                    ['seller_id', 'is_approved', 'created_at'], if_not_exists=True)
+    op.create_index('ix_review_archive_post', 'review_archive', ['post_id'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_table('review_archive')
+    op.drop_table('post_archive')
+    op.drop_index('ix_post_inactive_updated', table_name='post', if_exists=True)
+    op.drop_index('ix_post_expires_at', table_name='post', if_exists=True)
+    op.drop_column('post', 'expires_at')
@@ -0,0 +1,43 @@
+"""seller rating aggregates
+
+Revision ID: 7a9e2c4d1b33
+Revises: 3c1f8a2b9d10
+Create Date: 2026-10-18 10:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a9e2c4d1b33'
+down_revision = '3c1f8a2b9d10'
+branch_labels = None
+depends_on = None
+
+RATING_COLUMNS = ['rating_sum', 'rating_count', 'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5']
+
+
+def upgrade():
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('user')}
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        for name in RATING_COLUMNS:
+            if name not in existing:
+                batch_op.add_column(sa.Column(name, sa.Integer(), nullable=False, server_default='0'))
+
+    # Заполняем агрегаты по уже одобренным отзывам
+    approved = 'FROM review WHERE review.seller_id = "user".id AND review.is_approved = TRUE'
+    assignments = [
+        f'rating_sum = (SELECT coalesce(sum(rating), 0) {approved})',
+        f'rating_count = (SELECT count(*) {approved})'
+    ]
+    for stars in range(1, 6):
+        assignments.append(f'rating_{stars} = (SELECT count(*) {approved} AND review.rating = {stars})')
+    op.execute('UPDATE "user" SET ' + ', '.join(assignments))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        for name in reversed(RATING_COLUMNS):
+            batch_op.drop_column(name)
@@ -0,0 +1,47 @@
+"""updated_at for posts and reviews, board version counter
+
+Revision ID: 9c2e5f8a1d47
+Revises: 4d9b1e7c3a52
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c2e5f8a1d47'
+down_revision = '4d9b1e7c3a52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    # Без batch-режима: пересоздание таблицы post в SQLite удалило бы триггеры post_fts
+    if 'updated_at' not in {column['name'] for column in inspector.get_columns('post')}:
+        op.add_column('post', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    if 'updated_at' not in {column['name'] for column in inspector.get_columns('review')}:
+        op.add_column('review', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute('UPDATE post SET updated_at = created_at WHERE updated_at IS NULL')
+    op.execute('UPDATE review SET updated_at = COALESCE(moderated_at, created_at) WHERE updated_at IS NULL')
+
+    if not inspector.has_table('board_state'):
+        op.create_table(
+            'board_state',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('version', sa.BigInteger(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+    board_state = sa.table('board_state', sa.column('id'), sa.column('version'), sa.column('updated_at'))
+    if op.get_bind().execute(sa.select(sa.func.count()).select_from(board_state)).scalar() == 0:
+        op.bulk_insert(board_state, [{'id': 1, 'version': 1, 'updated_at': datetime.utcnow()}])
+
+
+def downgrade():
+    op.drop_table('board_state')
+    op.drop_column('review', 'updated_at')
+    op.drop_column('post', 'updated_at')
@@ -0,0 +1,24 @@
+"""review_archive buyer index for cascading user deletes
+
+Revision ID: a3d8c5e1f702
+Revises: 5f1a7d3e9b20
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d8c5e1f702'
+down_revision = '5f1a7d3e9b20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Остальные внешние ключи на user и post уже покрыты индексами
+    op.create_index('ix_review_archive_buyer', 'review_archive', ['buyer_id'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_review_archive_buyer', table_name='review_archive', if_exists=True)
@@ -0,0 +1,60 @@
+"""post full-text search
+
+Revision ID: b52d7e0f6a84
+Revises: 7a9e2c4d1b33
+Create Date: 2026-10-18 10:10:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b52d7e0f6a84'
+down_revision = '7a9e2c4d1b33'
+branch_labels = None
+depends_on = None
+
+POSTGRES_UPGRADE = [
+    """ALTER TABLE post ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('russian', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('russian', coalesce(content, '')), 'B')
+        ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_post_search_vector ON post USING GIN (search_vector)"
+]
+
+SQLITE_UPGRADE = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS post_fts USING fts5(
+        post_id UNINDEXED, title, content, tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS post_fts_insert AFTER INSERT ON post BEGIN
+        INSERT INTO post_fts (post_id, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS post_fts_delete AFTER DELETE ON post BEGIN
+        DELETE FROM post_fts WHERE post_id = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS post_fts_update AFTER UPDATE OF id, title, content ON post BEGIN
+        DELETE FROM post_fts WHERE post_id = old.id;
+        INSERT INTO post_fts (post_id, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+    "DELETE FROM post_fts",
+    "INSERT INTO post_fts (post_id, title, content) SELECT id, title, content FROM post"
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    statements = {'postgresql': POSTGRES_UPGRADE, 'sqlite': SQLITE_UPGRADE}.get(dialect, [])
+    for statement in statements:
+        op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_post_search_vector')
+        op.execute('ALTER TABLE post DROP COLUMN IF EXISTS search_vector')
+    elif dialect == 'sqlite':
+        for trigger in ('post_fts_insert', 'post_fts_delete', 'post_fts_update'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS post_fts')
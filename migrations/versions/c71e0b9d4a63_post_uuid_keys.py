@@ -0,0 +1,143 @@
+"""post ids as native UUID (PostgreSQL) and 16-byte blobs (SQLite)
+
+Revision ID: c71e0b9d4a63
+Revises: a3d8c5e1f702
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+import uuid
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c71e0b9d4a63'
+down_revision = 'a3d8c5e1f702'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+# (таблица, колонка с id объявления, первичный ключ таблицы)
+POST_ID_COLUMNS = [
+    ('post', 'id', 'id'),
+    ('post_archive', 'id', 'id'),
+    ('review', 'post_id', 'id'),
+    ('review_archive', 'post_id', 'id'),
+]
+# Родительская таблица -> колонки ссылающихся на нее таблиц
+REFERENCES = {
+    'post': [('review', 'post_id')],
+    'post_archive': [('review_archive', 'post_id')],
+}
+
+SQLITE_FTS_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS post_fts_insert AFTER INSERT ON post BEGIN
+        INSERT INTO post_fts (post_id, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS post_fts_delete AFTER DELETE ON post BEGIN
+        DELETE FROM post_fts WHERE post_id = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS post_fts_update AFTER UPDATE OF id, title, content ON post BEGIN
+        DELETE FROM post_fts WHERE post_id = old.id;
+        INSERT INTO post_fts (post_id, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+]
+
+
+def _convert_sqlite(source_type, convert):
+    """Замена значений id объявлений пачками: в post (post_archive) и ссылках на него.
+
+    Типы колонок в SQLite не меняются (тип значения определяет само
+    значение), поэтому таблицы не пересоздаются. Проверка внешних ключей
+    откладывается до конца транзакции: родитель и ссылки меняются вместе.
+    """
+    bind = op.get_bind()
+    has_fts = sa.inspect(bind).has_table('post_fts')
+    if has_fts:
+        # Триггер обновления искал бы каждую строку полным просмотром post_fts - индекс пересобирается ниже
+        for trigger in ('post_fts_insert', 'post_fts_delete', 'post_fts_update'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+
+    # pysqlite открывает транзакцию только перед DML, а отложенная проверка действует до ее конца
+    if not bind.connection.dbapi_connection.in_transaction:
+        op.execute('BEGIN')
+    op.execute('PRAGMA defer_foreign_keys = ON')
+    for parent, references in REFERENCES.items():
+        select = sa.text(f'SELECT id FROM {parent} WHERE typeof(id) = :source_type LIMIT :limit')
+        while True:
+            ids = bind.execute(select, {'source_type': source_type, 'limit': BATCH_SIZE}).scalars().all()
+            if not ids:
+                break
+            params = [{'old': value, 'new': convert(value)} for value in ids]
+            for table, column in [(parent, 'id')] + references:
+                bind.execute(sa.text(f'UPDATE {table} SET {column} = :new WHERE {column} = :old'), params)
+
+    if has_fts:
+        for statement in SQLITE_FTS_TRIGGERS:
+            op.execute(statement)
+        op.execute('DELETE FROM post_fts')
+        op.execute('INSERT INTO post_fts (post_id, title, content) SELECT id, title, content FROM post')
+
+
+def _upgrade_postgresql():
+    # Новые колонки uuid заполняются пачками с фиксацией каждой пачки:
+    # таблицы не блокируются на время всей конвертации
+    with op.get_context().autocommit_block():
+        for table, column, key in POST_ID_COLUMNS:
+            op.execute(f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column}_uuid uuid')
+            while op.get_bind().execute(sa.text(
+                f"""UPDATE {table} SET {column}_uuid = {column}::uuid WHERE {key} IN (
+                    SELECT {key} FROM {table} WHERE {column}_uuid IS NULL LIMIT :limit)"""
+            ), {'limit': BATCH_SIZE}).rowcount:
+                pass
+
+    # Короткая замена колонок; строки, записанные во время заполнения, дописываются под блокировкой
+    op.execute('LOCK TABLE post, post_archive, review, review_archive IN ACCESS EXCLUSIVE MODE')
+    for table, column, key in POST_ID_COLUMNS:
+        op.execute(f'UPDATE {table} SET {column}_uuid = {column}::uuid WHERE {column}_uuid IS NULL')
+
+    # Вместе со старыми колонками удаляются их ключи, ограничения и индексы - они создаются заново
+    for table, column in ('review', 'post_id'), ('review_archive', 'post_id'):
+        op.execute(f'ALTER TABLE {table} DROP COLUMN {column}')
+        op.execute(f'ALTER TABLE {table} RENAME COLUMN {column}_uuid TO {column}')
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL')
+    for table in REFERENCES:
+        op.execute(f'ALTER TABLE {table} DROP COLUMN id')
+        op.execute(f'ALTER TABLE {table} RENAME COLUMN id_uuid TO id')
+        op.execute(f'ALTER TABLE {table} ADD PRIMARY KEY (id)')
+
+    op.create_foreign_key('review_post_id_fkey', 'review', 'post', ['post_id'], ['id'], ondelete='CASCADE')
+    op.create_foreign_key('review_archive_post_id_fkey', 'review_archive', 'post_archive',
+                          ['post_id'], ['id'], ondelete='CASCADE')
+    op.create_unique_constraint('unique_review_per_buyer_post', 'review', ['buyer_id', 'post_id'])
+    op.create_index('ix_review_post_approved_created', 'review', ['post_id', 'is_approved', 'created_at'])
+    op.create_index('ix_review_archive_post', 'review_archive', ['post_id'])
+
+
+def _downgrade_postgresql():
+    op.drop_constraint('review_post_id_fkey', 'review', type_='foreignkey')
+    op.drop_constraint('review_archive_post_id_fkey', 'review_archive', type_='foreignkey')
+    for table, column, key in POST_ID_COLUMNS:
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN {column} TYPE varchar(36) USING {column}::text')
+    op.create_foreign_key('review_post_id_fkey', 'review', 'post', ['post_id'], ['id'], ondelete='CASCADE')
+    op.create_foreign_key('review_archive_post_id_fkey', 'review_archive', 'post_archive',
+                          ['post_id'], ['id'], ondelete='CASCADE')
+
+
+def upgrade():
+    # Значения сохраняются: старые ссылки /post/<id> продолжают работать,
+    # новые объявления получают UUIDv7
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        _upgrade_postgresql()
+    elif dialect == 'sqlite':
+        _convert_sqlite('text', lambda value: uuid.UUID(value).bytes)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        _downgrade_postgresql()
+    elif dialect == 'sqlite':
+        _convert_sqlite('blob', lambda value: str(uuid.UUID(bytes=value)))
@@ -0,0 +1,56 @@
+"""per-category active post counters
+
+Revision ID: d94b2f6e1c58
+Revises: c71e0b9d4a63
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from datetime import datetime, timedelta
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd94b2f6e1c58'
+down_revision = 'c71e0b9d4a63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'category_counter',
+        sa.Column('category', sa.String(length=50), nullable=False),
+        sa.Column('active_count', sa.Integer(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('category')
+    )
+    op.create_table(
+        'category_hour_counter',
+        sa.Column('category', sa.String(length=50), nullable=False),
+        sa.Column('hour', sa.DateTime(), nullable=False),
+        sa.Column('active_count', sa.Integer(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('category', 'hour')
+    )
+
+    # Начальные значения по текущим объявлениям; дальше их ведет приложение
+    op.execute("""INSERT INTO category_counter (category, active_count)
+                  SELECT category, count(*) FROM post WHERE is_active = true GROUP BY category""")
+    bind = op.get_bind()
+    start = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(hours=23)
+    hours = {}
+    recent = sa.text('SELECT category, created_at FROM post WHERE is_active = true AND created_at >= :start')
+    recent = recent.bindparams(sa.bindparam('start', start, type_=sa.DateTime()))
+    for category, created_at in bind.execute(recent.columns(sa.column('category'),
+                                                            sa.column('created_at', sa.DateTime()))):
+        key = (category, created_at.replace(minute=0, second=0, microsecond=0))
+        hours[key] = hours.get(key, 0) + 1
+    if hours:
+        table = sa.table('category_hour_counter', sa.column('category'), sa.column('hour', sa.DateTime()),
+                         sa.column('active_count'))
+        op.bulk_insert(table, [{'category': category, 'hour': hour, 'active_count': count}
+                               for (category, hour), count in hours.items()])
+
+
+def downgrade():
+    op.drop_table('category_hour_counter')
+    op.drop_table('category_counter')
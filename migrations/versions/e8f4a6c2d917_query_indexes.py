@@ -0,0 +1,43 @@
+"""composite and partial indexes for feed, review and moderation queries
+
+Revision ID: e8f4a6c2d917
+Revises: b52d7e0f6a84
+Create Date: 2026-10-18 10:15:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8f4a6c2d917'
+down_revision = 'b52d7e0f6a84'
+branch_labels = None
+depends_on = None
+
+ACTIVE_POSTS = dict(postgresql_where=sa.text('is_active = true'), sqlite_where=sa.text('is_active = 1'))
+PENDING_REVIEWS = dict(postgresql_where=sa.text('is_approved = false'), sqlite_where=sa.text('is_approved = 0'))
+
+
+def upgrade():
+    op.create_index('ix_post_active_category_created', 'post', ['category', 'created_at', 'id'],
+                    if_not_exists=True, **ACTIVE_POSTS)
+    op.create_index('ix_post_active_created', 'post', ['created_at', 'id'],
+                    if_not_exists=True, **ACTIVE_POSTS)
+    op.create_index('ix_post_user_created', 'post', ['user_id', 'created_at'], if_not_exists=True)
+
+    op.create_index('ix_review_post_approved_created', 'review', ['post_id', 'is_approved', 'created_at'],
+                    if_not_exists=True)
+    op.create_index('ix_review_seller_approved_created', 'review', ['seller_id', 'is_approved', 'created_at'],
+                    if_not_exists=True)
+    op.create_index('ix_review_pending_created', 'review', ['created_at'],
+                    if_not_exists=True, **PENDING_REVIEWS)
+
+
+def downgrade():
+    op.drop_index('ix_review_pending_created', table_name='review', if_exists=True)
+    op.drop_index('ix_review_seller_approved_created', table_name='review', if_exists=True)
+    op.drop_index('ix_review_post_approved_created', table_name='review', if_exists=True)
+    op.drop_index('ix_post_user_created', table_name='post', if_exists=True)
+    op.drop_index('ix_post_active_created', table_name='post', if_exists=True)
+    op.drop_index('ix_post_active_category_created', table_name='post', if_exists=True)
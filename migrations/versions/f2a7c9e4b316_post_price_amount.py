@@ -0,0 +1,43 @@
+"""parsed post price amount and currency
+
+Revision ID: f2a7c9e4b316
+Revises: d94b2f6e1c58
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a7c9e4b316'
+down_revision = 'd94b2f6e1c58'
+branch_labels = None
+depends_on = None
+
+ACTIVE_POSTS = dict(postgresql_where=sa.text('is_active = true'), sqlite_where=sa.text('is_active = 1'))
+PRICE_TABLES = ('post', 'post_archive')
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    # Без batch-режима (см. 5f1a7d3e9b20). Существующие цены разбирает flask backfill-prices
+    for table in PRICE_TABLES:
+        columns = {column['name'] for column in inspector.get_columns(table)}
+        if 'price_amount' not in columns:
+            op.add_column(table, sa.Column('price_amount', sa.Integer(), nullable=True))
+        if 'price_currency' not in columns:
+            op.add_column(table, sa.Column('price_currency', sa.String(length=3), nullable=True))
+
+    op.create_index('ix_post_active_category_price', 'post', ['category', 'price_amount', 'id'],
+                    if_not_exists=True, **ACTIVE_POSTS)
+    op.create_index('ix_post_active_price', 'post', ['price_amount', 'id'], if_not_exists=True, **ACTIVE_POSTS)
+
+
+def downgrade():
+    op.drop_index('ix_post_active_price', table_name='post', if_exists=True)
+    op.drop_index('ix_post_active_category_price', table_name='post', if_exists=True)
+    for table in PRICE_TABLES:
+        op.drop_column(table, 'price_currency')
+        op.drop_column(table, 'price_amount')
@@ -1,12 +1,25 @@
 # models.py - ОБНОВЛЕННАЯ ВЕРСИЯ
+from flask import g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
-import uuid
+from datetime import datetime, timedelta
 from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
 from sqlite3 import Connection as SQLite3Connection
+from replicas import RoutingSession
+from ids import UUIDType, uuid7
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+RATING_VALUES = range(1, 6)
+
+
+def insert_on_conflict(model):
+    """insert() с ON CONFLICT ... DO UPDATE / DO NOTHING для текущей базы (PostgreSQL, SQLite)"""
+    if db.engine.dialect.name == 'postgresql':
+        return postgresql.insert(model)
+    return sqlite.insert(model)
 
 
 # Для SQLite включить поддержку внешних ключей
@@ -28,45 +41,124 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_admin = db.Column(db.Boolean, default=False)  # НОВОЕ: права администратора
 
-    posts = db.relationship('Post', backref='author', lazy=True, cascade='all, delete-orphan')
+    # Агрегаты рейтинга продавца (только одобренные отзывы), обновляются вместе с отзывами
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_1 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_2 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_3 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_4 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_5 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    # Дочерние строки удаляет база (ON DELETE CASCADE): ORM их не загружает
+    posts = db.relationship('Post', backref='author', lazy=True, cascade='all, delete-orphan',
+                            passive_deletes=True)
 
     # Исправленные отношения с каскадным удалением
     reviews_received = db.relationship('Review',
                                        foreign_keys='Review.seller_id',
                                        backref='seller',
                                        lazy=True,
-                                       cascade='all, delete-orphan')
+                                       cascade='all, delete-orphan',
+                                       passive_deletes=True)
     reviews_given = db.relationship('Review',
                                     foreign_keys='Review.buyer_id',
                                     backref='buyer',
                                     lazy=True,
-                                    cascade='all, delete-orphan')
+                                    cascade='all, delete-orphan',
+                                    passive_deletes=True)
 
     @property
     def average_rating(self):
-        reviews = Review.query.filter_by(seller_id=self.id).all()
-        if not reviews:
+        if not self.rating_count:
             return 0
-        total = sum(review.rating for review in reviews)
-        return round(total / len(reviews), 1)
+        return round(self.rating_sum / self.rating_count, 1)
 
     @property
     def reviews_count(self):
-        return Review.query.filter_by(seller_id=self.id).count()
+        return self.rating_count or 0
+
+    @property
+    def rating_histogram(self):
+        return {stars: getattr(self, f'rating_{stars}') or 0 for stars in RATING_VALUES}
+
+    @staticmethod
+    def adjust_rating(seller_id, rating, delta=1):
+        """Изменение агрегатов рейтинга продавца в текущей транзакции (без commit)"""
+        bucket = getattr(User, f'rating_{rating}')
+        User.query.filter_by(id=seller_id).update({
+            User.rating_sum: User.rating_sum + rating * delta,
+            User.rating_count: User.rating_count + delta,
+            bucket: bucket + delta
+        })
+
+    @staticmethod
+    def rebuild_ratings(user_ids=None):
+        """Пересчет агрегатов рейтинга продавцов (всех или user_ids) по одобренным отзывам,
+        включая архивные: репутация продавца не пропадает вместе со старыми объявлениями"""
+        reviews = db.union_all(
+            db.select(Review.seller_id, Review.rating).where(Review.is_approved.is_(True)),
+            db.select(ReviewArchive.seller_id, ReviewArchive.rating).where(ReviewArchive.is_approved.is_(True))
+        ).subquery()
+
+        def approved(*criteria):
+            return db.select(db.func.count()).select_from(reviews).where(
+                reviews.c.seller_id == User.id, *criteria
+            ).scalar_subquery()
+
+        values = {
+            User.rating_sum: db.select(db.func.coalesce(db.func.sum(reviews.c.rating), 0)).where(
+                reviews.c.seller_id == User.id
+            ).scalar_subquery(),
+            User.rating_count: approved()
+        }
+        for stars in RATING_VALUES:
+            values[getattr(User, f'rating_{stars}')] = approved(reviews.c.rating == stars)
+
+        statement = db.update(User).values(values).execution_options(synchronize_session=False)
+        if user_ids is not None:
+            statement = statement.where(User.id.in_(user_ids))
+        return db.session.execute(statement).rowcount
 
 
 class Post(db.Model):
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = db.Column(UUIDType, primary_key=True, default=uuid7)  # UUIDv7: ключи растут со временем
     title = db.Column(db.String(200), nullable=False)
     content = db.Column(db.Text, nullable=False)
     category = db.Column(db.String(50), nullable=False)
     price = db.Column(db.String(50))
+    # Разобранная цена для фильтра и сортировки (см. prices.py); текст price показывается как есть
+    price_amount = db.Column(db.Integer)
+    price_currency = db.Column(db.String(3))
     contact_info = db.Column(db.String(200))
     image_url = db.Column(db.String(500))
+    image_key = db.Column(db.String(80))  # загруженное изображение (см. images.py)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    expires_at = db.Column(db.DateTime)  # после этого момента объявление уходит в архив (см. archive.py)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
     is_active = db.Column(db.Boolean, default=True)
-    reviews = db.relationship('Review', backref='post', lazy=True, cascade='all, delete-orphan')
+    reviews = db.relationship('Review', backref='post', lazy=True, cascade='all, delete-orphan',
+                              passive_deletes=True)
+
+    __table_args__ = (
+        # Лента активных объявлений: с фильтром по категории и без, сортировка по дате
+        db.Index('ix_post_active_category_created', 'category', 'created_at', 'id',
+                 postgresql_where=db.text('is_active = true'), sqlite_where=db.text('is_active = 1')),
+        db.Index('ix_post_active_created', 'created_at', 'id',
+                 postgresql_where=db.text('is_active = true'), sqlite_where=db.text('is_active = 1')),
+        # Фильтр и сортировка по цене: с категорией и без
+        db.Index('ix_post_active_category_price', 'category', 'price_amount', 'id',
+                 postgresql_where=db.text('is_active = true'), sqlite_where=db.text('is_active = 1')),
+        db.Index('ix_post_active_price', 'price_amount', 'id',
+                 postgresql_where=db.text('is_active = true'), sqlite_where=db.text('is_active = 1')),
+        # Объявления пользователя
+        db.Index('ix_post_user_created', 'user_id', 'created_at'),
+        # Кандидаты в архив: истекшие и давно снятые с публикации
+        db.Index('ix_post_expires_at', 'expires_at'),
+        db.Index('ix_post_inactive_updated', 'updated_at',
+                 postgresql_where=db.text('is_active = false'), sqlite_where=db.text('is_active = 0')),
+    )
 
     CATEGORIES = [
         ('услуги', 'Услуги'),
@@ -93,16 +185,267 @@ class Review(db.Model):
     rating = db.Column(db.Integer, nullable=False)
     comment = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     is_approved = db.Column(db.Boolean, default=False)  # НОВОЕ: модерация отзывов
     moderated_by = db.Column(db.Integer, db.ForeignKey('user.id'))  # НОВОЕ: кто модерировал
     moderated_at = db.Column(db.DateTime)  # НОВОЕ: когда модерировали
 
     buyer_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
     seller_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
-    post_id = db.Column(db.String(36), db.ForeignKey('post.id', ondelete='CASCADE'), nullable=False)
+    post_id = db.Column(UUIDType, db.ForeignKey('post.id', ondelete='CASCADE'), nullable=False)
 
     # Уникальность: один пользователь может оставить только один отзыв на объявление
-    __table_args__ = (db.UniqueConstraint('buyer_id', 'post_id', name='unique_review_per_buyer_post'),)
+    __table_args__ = (
+        db.UniqueConstraint('buyer_id', 'post_id', name='unique_review_per_buyer_post'),
+        # Отзывы к объявлению и отзывы о продавце (одобренные, по дате)
+        db.Index('ix_review_post_approved_created', 'post_id', 'is_approved', 'created_at'),
+        db.Index('ix_review_seller_approved_created', 'seller_id', 'is_approved', 'created_at'),
+        # Очередь модерации
+        db.Index('ix_review_pending_created', 'created_at',
+                 postgresql_where=db.text('is_approved = false'), sqlite_where=db.text('is_approved = 0')),
+    )
 
     # Связь с модератором
     moderator = db.relationship('User', foreign_keys=[moderated_by], backref='moderated_reviews')
+
+
+class PostArchive(db.Model):
+    """Архив объявлений: те же колонки, что у post, и время переноса (см. archive.py)"""
+    __tablename__ = 'post_archive'
+
+    id = db.Column(UUIDType, primary_key=True)
+    title = db.Column(db.String(200), nullable=False)
+    content = db.Column(db.Text, nullable=False)
+    category = db.Column(db.String(50), nullable=False)
+    price = db.Column(db.String(50))
+    price_amount = db.Column(db.Integer)
+    price_currency = db.Column(db.String(3))
+    contact_info = db.Column(db.String(200))
+    image_url = db.Column(db.String(500))
+    image_key = db.Column(db.String(80))
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    expires_at = db.Column(db.DateTime)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    is_active = db.Column(db.Boolean)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    author = db.relationship('User')
+
+    __table_args__ = (
+        db.Index('ix_post_archive_user_created', 'user_id', 'created_at'),
+    )
+
+
+class ReviewArchive(db.Model):
+    """Архив отзывов к архивным объявлениям (id сохраняется)"""
+    __tablename__ = 'review_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    rating = db.Column(db.Integer, nullable=False)
+    comment = db.Column(db.Text)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    is_approved = db.Column(db.Boolean)
+    moderated_by = db.Column(db.Integer, db.ForeignKey('user.id'))
+    moderated_at = db.Column(db.DateTime)
+    buyer_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    seller_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    post_id = db.Column(UUIDType, db.ForeignKey('post_archive.id', ondelete='CASCADE'), nullable=False)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    buyer = db.relationship('User', foreign_keys=[buyer_id])
+    post = db.relationship('PostArchive')
+
+    __table_args__ = (
+        db.Index('ix_review_archive_seller_approved_created', 'seller_id', 'is_approved', 'created_at'),
+        db.Index('ix_review_archive_post', 'post_id'),
+        # Отзывы покупателя (удаление пользователя)
+        db.Index('ix_review_archive_buyer', 'buyer_id'),
+    )
+
+
+def _recent_start(now=None):
+    """Начало окна "за сутки": текущий неполный час и 23 предыдущих"""
+    return (now or datetime.utcnow()).replace(minute=0, second=0, microsecond=0) - timedelta(hours=23)
+
+
+def _increment(model, keys, delta):
+    """Прибавление delta к active_count строки keys (строка создается при первом изменении)"""
+    statement = insert_on_conflict(model).values(**keys, active_count=delta)
+    statement = statement.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={'active_count': model.__table__.c.active_count + statement.excluded.active_count}
+    )
+    db.session.execute(statement)
+
+
+def _store(model, keys, count):
+    """Запись точного значения счетчика (создание или замена)"""
+    statement = insert_on_conflict(model).values(**keys, active_count=count)
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=list(keys), set_={'active_count': statement.excluded.active_count}))
+
+
+class CategoryCounter(db.Model):
+    """Число активных объявлений категории: меняется в транзакции вместе с объявлением,
+    поэтому /api/categories не считает объявления. Расхождения исправляет reconcile()."""
+    __tablename__ = 'category_counter'
+
+    category = db.Column(db.String(50), primary_key=True)
+    active_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    @staticmethod
+    def adjust(category, created_at, delta):
+        """Изменение счетчиков категории в текущей транзакции (без commit).
+
+        created_at - дата публикации: объявления последних суток учитываются
+        еще и в часовой строке CategoryHourCounter.
+        """
+        _increment(CategoryCounter, {'category': category}, delta)
+        hour = (created_at or datetime.utcnow()).replace(minute=0, second=0, microsecond=0)
+        if hour >= _recent_start():
+            _increment(CategoryHourCounter, {'category': category, 'hour': hour}, delta)
+
+    @staticmethod
+    def counts(now=None):
+        """{категория: (активных, активных за сутки)}"""
+        totals = dict(db.session.execute(db.select(CategoryCounter.category, CategoryCounter.active_count)).all())
+        recent = dict(db.session.execute(
+            db.select(CategoryHourCounter.category, db.func.sum(CategoryHourCounter.active_count))
+            .where(CategoryHourCounter.hour >= _recent_start(now))
+            .group_by(CategoryHourCounter.category)
+        ).all())
+        return {category: (totals.get(category, 0), recent.get(category, 0) or 0)
+                for category in totals.keys() | recent.keys()}
+
+    @staticmethod
+    def reconcile(now=None):
+        """Пересчет счетчиков по активным объявлениям (после массовых операций и для
+        исправления расхождений) и удаление часовых строк старше суток.
+
+        Меняются только расходящиеся строки. Возвращает
+        {категория: ((было, было за сутки), (стало, стало за сутки))} для исправленных.
+        """
+        start = _recent_start(now)
+        active = Post.is_active == db.true()
+        totals = dict(db.session.execute(
+            db.select(Post.category, db.func.count()).where(active).group_by(Post.category)
+        ).all())
+        # Объявлений за сутки немного - часы считаются в Python одинаково для всех баз
+        hours = {}
+        for category, created_at in db.session.execute(
+                db.select(Post.category, Post.created_at).where(active, Post.created_at >= start)):
+            key = (category, created_at.replace(minute=0, second=0, microsecond=0))
+            hours[key] = hours.get(key, 0) + 1
+
+        before = CategoryCounter.counts(now)
+        stored_totals = dict(db.session.execute(
+            db.select(CategoryCounter.category, CategoryCounter.active_count)).all())
+        stored_hours = {(row.category, row.hour): row.active_count for row in db.session.execute(
+            db.select(CategoryHourCounter.category, CategoryHourCounter.hour, CategoryHourCounter.active_count)
+            .where(CategoryHourCounter.hour >= start))}
+
+        for category in totals.keys() | stored_totals.keys():
+            if totals.get(category, 0) != stored_totals.get(category):
+                _store(CategoryCounter, {'category': category}, totals.get(category, 0))
+        for (category, hour) in hours.keys() | stored_hours.keys():
+            if hours.get((category, hour), 0) != stored_hours.get((category, hour)):
+                _store(CategoryHourCounter, {'category': category, 'hour': hour}, hours.get((category, hour), 0))
+        db.session.execute(db.delete(CategoryHourCounter).where(CategoryHourCounter.hour < start))
+
+        after = CategoryCounter.counts(now)
+        return {category: (before.get(category, (0, 0)), after.get(category, (0, 0)))
+                for category in before.keys() | after.keys()
+                if before.get(category, (0, 0)) != after.get(category, (0, 0))}
+
+
+class CategoryHourCounter(db.Model):
+    """Активные объявления категории, опубликованные в данный час (только последние сутки)"""
+    __tablename__ = 'category_hour_counter'
+
+    category = db.Column(db.String(50), primary_key=True)
+    hour = db.Column(db.DateTime, primary_key=True)
+    active_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+
+class BoardState(db.Model):
+    """Версия данных доски: увеличивается в каждой транзакции, изменившей пользователей,
+    объявления, отзывы или счетчики категорий. Служит валидатором HTTP-кэша (ETag,
+    Last-Modified) и входит в ключ кэша ответов - общая для всех воркеров."""
+    __tablename__ = 'board_state'
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    ROW_ID = 1
+
+    @staticmethod
+    def current():
+        """(версия, время последнего изменения); (0, None), если строки еще нет"""
+        row = db.session.execute(
+            db.select(BoardState.version, BoardState.updated_at).where(BoardState.id == BoardState.ROW_ID)
+        ).first()
+        return tuple(row) if row else (0, None)
+
+    @staticmethod
+    def for_request():
+        """current(), прочитанная один раз за запрос: ETag и ключ кэша ответов
+        одного запроса построены по одной и той же версии"""
+        if not has_request_context():
+            return BoardState.current()
+        if 'board_state' not in g:
+            g.board_state = BoardState.current()
+        return g.board_state
+
+    @staticmethod
+    def bump(connection):
+        """Увеличение версии в транзакции соединения.
+
+        Выполняется через Core, чтобы само обновление не считалось изменением данных.
+        """
+        table = BoardState.__table__
+        now = datetime.utcnow()
+        result = connection.execute(
+            table.update().where(table.c.id == BoardState.ROW_ID).values(version=table.c.version + 1, updated_at=now)
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(id=BoardState.ROW_ID, version=1, updated_at=now))
+
+
+# Изменения этих таблиц меняют версию доски
+VERSIONED_TABLES = frozenset(model.__tablename__ for model in (User, Post, Review, CategoryCounter))
+
+
+@event.listens_for(Session, 'before_flush')
+def _track_flush(session, flush_context, instances):
+    changed = [obj for obj in session.new | session.deleted if isinstance(obj, (User, Post, Review))]
+    changed += [obj for obj in session.dirty
+                if isinstance(obj, (User, Post, Review)) and session.is_modified(obj)]
+    if changed:
+        session.info['board_changed'] = True
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _track_statement(orm_execute_state):
+    # Массовые UPDATE/DELETE/INSERT (модерация, пересчет рейтингов, генерация данных)
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return
+    if not orm_execute_state.execution_options.get('board_version', True):
+        return
+    table = getattr(orm_execute_state.statement, 'table', None)
+    if table is not None and getattr(table, 'name', None) in VERSIONED_TABLES:
+        orm_execute_state.session.info['board_changed'] = True
+
+
+@event.listens_for(Session, 'before_commit')
+def _bump_board_version(session):
+    session.flush()
+    if session.info.pop('board_changed', False):
+        BoardState.bump(session.connection())
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changes(session):
+    session.info.pop('board_changed', None)
@@ -0,0 +1,237 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict, namedtuple
+from models import User
+
+logger = logging.getLogger(__name__)
+
+# Получатель ADMINS - все администраторы, иначе id пользователя в нашей базе
+ADMINS = 'admins'
+MESSAGE_LIMIT = 4096  # максимальная длина сообщения Telegram
+
+Notification = namedtuple('Notification', 'recipient text')
+
+
+class TokenBucket:
+    """Ограничитель частоты: rate токенов в секунду, не более capacity подряд"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def delay(self):
+        """Сколько ждать до появления токена (0 - токен взят сразу)"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        while True:
+            wait = self.delay()
+            if not wait:
+                return
+            time.sleep(wait)
+
+
+def build_digest(texts):
+    """Объединение нескольких уведомлений одному получателю в сообщения-дайджесты"""
+    if len(texts) == 1:
+        return [texts[0][:MESSAGE_LIMIT]]
+
+    messages = []
+    current = f'🔔 Новых уведомлений: {len(texts)}'
+    for text in texts:
+        entry = f'\n\n{text}'
+        if len(current) + len(entry) > MESSAGE_LIMIT:
+            messages.append(current)
+            current = text[:MESSAGE_LIMIT]
+        else:
+            current += entry
+    messages.append(current)
+    return messages
+
+
+class NotificationDispatcher:
+    """Отправка уведомлений через Telegram Bot API в фоновом потоке.
+
+    Уведомления складываются в очередь и не задерживают запрос. Поток
+    собирает уведомления за COALESCE_WINDOW секунд, объединяет их по
+    получателям в дайджесты и отправляет с учетом лимитов Telegram
+    (глобального и на каждый чат), повторяя неудачные попытки с задержкой.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self._pid = None
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        config = app.config
+        self.token = config.get('TELEGRAM_BOT_TOKEN')
+        self.enabled = bool(self.token) and config.get('NOTIFICATIONS_ENABLED', True)
+        self.api_url = config.get('TELEGRAM_API_URL', 'https://api.telegram.org').rstrip('/')
+        self.coalesce_window = config.get('NOTIFICATIONS_COALESCE_WINDOW', 2.0)
+        self.max_attempts = config.get('NOTIFICATIONS_MAX_ATTEMPTS', 5)
+        self.backoff = config.get('NOTIFICATIONS_BACKOFF', 1.0)
+        self.timeout = config.get('NOTIFICATIONS_HTTP_TIMEOUT', 10)
+        self.global_rate = config.get('NOTIFICATIONS_GLOBAL_RATE', 30)
+        self.chat_rate = config.get('NOTIFICATIONS_CHAT_RATE', 1)
+        app.extensions['notifications'] = self
+        atexit.register(self.flush, 5)
+
+    # ОЧЕРЕДЬ
+    def _ensure_worker(self):
+        """Запуск потока в текущем процессе (после fork воркера gunicorn - заново)"""
+        if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._queue = queue.Queue()
+            self._global_bucket = TokenBucket(self.global_rate, capacity=self.global_rate)
+            self._chat_buckets = {}
+            self._session = self._create_session()
+            self._thread = threading.Thread(target=self._run, name='telegram-notifications', daemon=True)
+            self._thread.start()
+
+    def _create_session(self):
+        # requests загружается при первом уведомлении, а не при старте воркера
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def notify(self, recipient, text):
+        """Поставить уведомление в очередь (recipient - id пользователя или ADMINS)"""
+        if not self.enabled:
+            return
+        self._ensure_worker()
+        self._queue.put(Notification(recipient, text))
+
+    def notify_admins(self, text):
+        self.notify(ADMINS, text)
+
+    def flush(self, timeout=None):
+        """Дождаться отправки всех уведомлений из очереди; True, если очередь пуста"""
+        if self._queue is None or self._pid != os.getpid():
+            return True
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    # ФОНОВЫЙ ПОТОК
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            # Собираем всплеск уведомлений в один пакет
+            deadline = time.monotonic() + self.coalesce_window
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                with self.app.app_context():
+                    self._dispatch(batch)
+            except Exception:
+                logger.exception('Ошибка при отправке уведомлений')
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _resolve_chats(self, batch):
+        """Сопоставление получателей с чатами Telegram (не более двух запросов к БД)"""
+        user_ids = {item.recipient for item in batch if item.recipient != ADMINS}
+        chats = {}
+        if user_ids:
+            rows = User.query.with_entities(User.id, User.telegram_id).filter(User.id.in_(user_ids)).all()
+            chats = {user_id: [telegram_id] for user_id, telegram_id in rows}
+        if any(item.recipient == ADMINS for item in batch):
+            chats[ADMINS] = [telegram_id for (telegram_id,) in
+                             User.query.with_entities(User.telegram_id).filter_by(is_admin=True)]
+        return chats
+
+    def _dispatch(self, batch):
+        chats = self._resolve_chats(batch)
+        texts_by_chat = defaultdict(list)
+        for item in batch:
+            for chat_id in chats.get(item.recipient, []):
+                texts_by_chat[chat_id].append(item.text)
+
+        for chat_id, texts in texts_by_chat.items():
+            for text in build_digest(texts):
+                self._send(chat_id, text)
+
+    def _chat_bucket(self, chat_id):
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) > 10000:
+                self._chat_buckets.clear()
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate)
+        return bucket
+
+    def _send(self, chat_id, text):
+        """Отправка одного сообщения с повторами; False, если доставить не удалось"""
+        import requests
+
+        url = f'{self.api_url}/bot{self.token}/sendMessage'
+        for attempt in range(1, self.max_attempts + 1):
+            self._chat_bucket(chat_id).acquire()
+            self._global_bucket.acquire()
+
+            retry_after = self.backoff * 2 ** (attempt - 1)
+            try:
+                response = self._session.post(url, json={'chat_id': chat_id, 'text': text}, timeout=self.timeout)
+            except requests.RequestException as e:
+                logger.warning('Telegram API недоступен (попытка %s): %s', attempt, e)
+            else:
+                if response.ok:
+                    return True
+                if response.status_code == 429:
+                    try:
+                        retry_after = response.json().get('parameters', {}).get('retry_after', retry_after)
+                    except ValueError:
+                        pass
+                elif response.status_code < 500:
+                    # Бот заблокирован, чат не найден и т.п. - повтор не поможет
+                    logger.warning('Telegram отклонил сообщение для %s: %s %s',
+                                   chat_id, response.status_code, response.text[:200])
+                    return False
+            if attempt < self.max_attempts:
+                time.sleep(retry_after)
+
+        logger.error('Не удалось отправить уведомление в чат %s', chat_id)
+        return False
+
+
+notifications = NotificationDispatcher()
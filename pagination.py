@@ -0,0 +1,179 @@
+import base64
+import json
+import math
+import time
+from datetime import datetime
+from flask import request, abort
+from models import db, Post
+from ids import parse_uuid
+
+MAX_PER_PAGE = 100
+TOTAL_CACHE_TTL = 60  # секунд
+TOTAL_CACHE_SIZE = 256
+
+# Кэш приблизительного количества объявлений: ключ -> (время истечения, количество)
+_total_cache = {}
+
+
+class Page:
+    """Страница результатов (совместима с шаблонами, использующими paginate())"""
+
+    def __init__(self, items, page, per_page, has_next, total=None, total_is_estimate=False, next_cursor=None):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.has_next = has_next
+        self.total = total
+        self.total_is_estimate = total_is_estimate
+        self.next_cursor = next_cursor
+
+    @property
+    def has_prev(self):
+        return bool(self.page and self.page > 1)
+
+    @property
+    def prev_num(self):
+        return self.page - 1 if self.has_prev else None
+
+    @property
+    def next_num(self):
+        return self.page + 1 if self.page and self.has_next else None
+
+    @property
+    def pages(self):
+        if self.total is None:
+            return None
+        return max(1, math.ceil(self.total / self.per_page))
+
+
+def encode_cursor(position):
+    """Упаковка позиции в непрозрачный токен"""
+    raw = json.dumps(position, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Распаковка токена; ValueError, если токен поврежден"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        position = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError('Некорректный курсор') from e
+    if not isinstance(position, dict):
+        raise ValueError('Некорректный курсор')
+    return position
+
+
+def _position(item):
+    # id объявлений - UUID, в курсоре хранится строкой
+    item_id = item.id if isinstance(item.id, int) else str(item.id)
+    return {'t': item.created_at.isoformat(), 'i': item_id}
+
+
+def approximate_total(key, query):
+    """Количество строк запроса, кэшируемое на TOTAL_CACHE_TTL секунд"""
+    now = time.monotonic()
+    cached = _total_cache.get(key)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    if len(_total_cache) >= TOTAL_CACHE_SIZE:
+        _total_cache.clear()
+
+    total = query.order_by(None).count()
+    _total_cache[key] = (now + TOTAL_CACHE_TTL, total)
+    return total
+
+
+def clear_total_cache():
+    _total_cache.clear()
+
+
+def keyset_order(query, model=Post):
+    """Порядок ленты для курсора: новые первыми, при равной дате - по id"""
+    return query.order_by(model.created_at.desc(), model.id.desc())
+
+
+def keyset_after(query, created_at, last_id, model=Post):
+    """Записи после позиции курсора (в порядке keyset_order)"""
+    return query.filter(db.tuple_(model.created_at, model.id) < (created_at, last_id))
+
+
+def paginate(query, per_page, cursor=None, page=1, with_total=False, total_key=None, keyset=True, model=Post):
+    """Постраничная выборка объявлений (или других записей model с created_at и id).
+
+    cursor=None - режим номеров страниц (OFFSET), иначе режим курсора
+    (пустая строка - первая страница). При keyset=True выборка сортируется по
+    (created_at, id) и курсор кодирует последнюю позицию; иначе запрос уже
+    отсортирован (например, по релевантности), и курсор хранит смещение.
+    Точное количество считается только при with_total, иначе берется
+    приблизительное из кэша по total_key (или не считается вовсе).
+    """
+    if keyset:
+        query = keyset_order(query, model)
+    counted = query
+
+    offset = 0
+    if cursor is not None:
+        page = None
+        position = decode_cursor(cursor) if cursor else {}
+        if keyset and position:
+            created_at = datetime.fromisoformat(position['t'])
+            last_id = position['i'] if isinstance(position['i'], int) else parse_uuid(position['i'])
+            if last_id is None:
+                raise ValueError('Некорректный курсор')
+            query = keyset_after(query, created_at, last_id, model)
+        elif not keyset:
+            offset = int(position.get('o', 0))
+    else:
+        page = max(page or 1, 1)
+        offset = (page - 1) * per_page
+
+    rows = query.offset(offset).limit(per_page + 1).all()
+    has_next = len(rows) > per_page
+    items = rows[:per_page]
+
+    next_cursor = None
+    if has_next:
+        next_cursor = encode_cursor(_position(items[-1]) if keyset else {'o': offset + per_page})
+
+    total = None
+    total_is_estimate = False
+    if with_total:
+        total = counted.order_by(None).count()
+    elif total_key is not None:
+        total = approximate_total(total_key, counted)
+        total_is_estimate = True
+
+    return Page(items, page, per_page, has_next, total, total_is_estimate, next_cursor)
+
+
+def paginate_request(query, per_page=20, total_key=None, keyset=True, model=Post):
+    """Пагинация по параметрам запроса: cursor, page, per_page, include_total"""
+    per_page = max(1, min(request.args.get('per_page', per_page, type=int), MAX_PER_PAGE))
+    try:
+        return paginate(
+            query,
+            per_page,
+            cursor=request.args.get('cursor'),
+            page=request.args.get('page', 1, type=int),
+            with_total=request.args.get('include_total', '').lower() in ('1', 'true', 'yes'),
+            total_key=total_key,
+            keyset=keyset,
+            model=model
+        )
+    except (ValueError, KeyError):
+        abort(400)
+
+
+def page_meta(page):
+    """Поля пагинации для JSON-ответа"""
+    return {
+        'has_next': page.has_next,
+        'has_prev': page.has_prev,
+        'page': page.page,
+        'pages': page.pages,
+        'total': page.total,
+        'total_is_estimate': page.total_is_estimate,
+        'next_cursor': page.next_cursor
+    }
@@ -0,0 +1,94 @@
+import re
+from sqlalchemy import event
+from models import db, Post
+
+# Цена объявления хранится текстом как есть ("1 500 руб.", "Договорная") для показа,
+# а для фильтра и сортировки рядом лежат разобранные сумма и валюта
+
+DEFAULT_CURRENCY = 'RUB'
+MAX_AMOUNT = 2 ** 31 - 1  # колонка Integer; суммы в целых единицах валюты
+
+_FREE = re.compile(r'бесплатн|даром|\bfree\b')
+# Число: с разделителями тысяч (пробелы) или без, с дробной частью через точку или запятую
+_NUMBER = re.compile(r'(\d{1,3}(?:[ \u00a0\u202f]\d{3})+|\d+)(?:[.,](\d+))?')
+_MULTIPLIER = re.compile(r'\s*(млн|тыс|т\.?\s?р|[кk](?![а-яa-z]))')
+_MULTIPLIERS = {'млн': 1_000_000, 'тыс': 1000, 'к': 1000, 'k': 1000}
+_CURRENCIES = [
+    ('USD', re.compile(r'\$|usd|долл')),
+    ('EUR', re.compile(r'€|eur|евро')),
+    ('RUB', re.compile(r'₽|руб|\bр\b|rub')),
+]
+
+
+def parse_price(text):
+    """(сумма, валюта) из текста цены; (None, None), если суммы в тексте нет.
+
+    Берется первое число ("от 500", "500-700" - 500); "тыс", "к" и "млн"
+    умножают его; без указания валюты - рубли; "Бесплатно" и "Даром" - 0.
+    """
+    if not text:
+        return None, None
+    text = text.lower().replace('ё', 'е')
+
+    currency = next((code for code, pattern in _CURRENCIES if pattern.search(text)), DEFAULT_CURRENCY)
+    match = _NUMBER.search(text)
+    if match is None:
+        return (0, currency) if _FREE.search(text) else (None, None)
+
+    whole, fraction = match.group(1), match.group(2)
+    multiplier = _MULTIPLIER.match(text, match.end())
+    amount = int(re.sub(r'\D', '', whole))
+    if fraction and not multiplier and len(fraction) == 3:
+        # "1.500" и "1,500" - разделитель тысяч, а не дробь
+        amount = amount * 1000 + int(fraction)
+    elif fraction:
+        amount += int(fraction) / 10 ** len(fraction)
+
+    if multiplier:
+        unit = multiplier.group(1)
+        amount *= _MULTIPLIERS.get(unit, 1000)  # "т.р." - тысячи рублей
+
+    amount = round(amount)
+    if amount > MAX_AMOUNT:
+        return None, None
+    return amount, currency
+
+
+@event.listens_for(Post.price, 'set')
+def _parse_on_set(post, value, oldvalue, initiator):
+    """Сумма и валюта обновляются при каждой записи Post.price через ORM"""
+    post.price_amount, post.price_currency = parse_price(value)
+
+
+def backfill_prices(batch_size=500, only_missing=True):
+    """Разбор текста цены объявлений пачками по batch_size (каждая - своя транзакция).
+
+    only_missing=False - пересчет всех цен (после изменения правил разбора).
+    Возвращает число объявлений, у которых изменились сумма или валюта.
+    """
+    updated = 0
+    last_id = None
+    while True:
+        statement = db.select(Post.id, Post.price, Post.price_amount, Post.price_currency,
+                              Post.updated_at).where(Post.price.is_not(None)).order_by(Post.id).limit(batch_size)
+        if only_missing:
+            statement = statement.where(Post.price_amount.is_(None))
+        if last_id is not None:
+            statement = statement.where(Post.id > last_id)
+        rows = db.session.execute(statement).all()
+        if not rows:
+            db.session.rollback()
+            break
+        last_id = rows[-1].id
+        values = []
+        for row in rows:
+            amount, currency = parse_price(row.price)
+            if (amount, currency) != (row.price_amount, row.price_currency):
+                # updated_at передается как есть: разбор цены - не правка объявления
+                values.append({'id': row.id, 'price_amount': amount, 'price_currency': currency,
+                               'updated_at': row.updated_at})
+        if values:
+            db.session.execute(db.update(Post), values)
+        db.session.commit()
+        updated += len(values)
+    return updated
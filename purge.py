@@ -0,0 +1,85 @@
+from models import db, User, Post, Review, PostArchive, ReviewArchive, CategoryCounter
+from cache import response_cache
+from pagination import clear_total_cache
+
+
+def delete_in_batches(table, criteria, batch_size=500):
+    """Удаление строк table по условию пачками, каждая пачка - отдельная транзакция.
+
+    Дочерние строки удаляет база (ON DELETE CASCADE). Возвращает число
+    удаленных строк самой таблицы.
+    """
+    deleted = 0
+    while True:
+        ids = db.session.scalars(db.select(table.c.id).where(criteria).limit(batch_size)).all()
+        if not ids:
+            db.session.rollback()
+            return deleted
+        deleted += db.session.execute(table.delete().where(table.c.id.in_(ids))).rowcount
+        db.session.commit()
+
+
+def _delete_reviews(model, user_id, batch_size):
+    """Удаление отзывов пользователя (оставленных и полученных) пачками.
+
+    Рейтинги продавцов, потерявших одобренные отзывы, пересчитываются
+    в той же транзакции, что и удаление пачки.
+    """
+    deleted = 0
+    while True:
+        rows = db.session.execute(
+            db.select(model.id, model.seller_id, model.is_approved)
+            .where(db.or_(model.buyer_id == user_id, model.seller_id == user_id)).limit(batch_size)
+        ).all()
+        if not rows:
+            db.session.rollback()
+            return deleted
+        table = model.__table__
+        deleted += db.session.execute(table.delete().where(table.c.id.in_([row.id for row in rows]))).rowcount
+        sellers = {row.seller_id for row in rows if row.is_approved and row.seller_id != user_id}
+        if sellers:
+            User.rebuild_ratings(sellers)
+        db.session.commit()
+
+
+def purge_user(user_id, batch_size=500):
+    """Удаление пользователя со всеми объявлениями и отзывами, включая архивные.
+
+    Данные удаляются короткими транзакциями по batch_size строк, поэтому
+    у активного пользователя удаление не блокирует доску надолго.
+    Возвращает число удаленных строк по таблицам.
+    """
+    counts = {
+        'review_archive': _delete_reviews(ReviewArchive, user_id, batch_size),
+        'post_archive': delete_in_batches(PostArchive.__table__, PostArchive.user_id == user_id, batch_size),
+        'review': _delete_reviews(Review, user_id, batch_size),
+        'post': delete_in_batches(Post.__table__, Post.user_id == user_id, batch_size),
+    }
+
+    # Отзывы, которые пользователь модерировал, остаются без модератора
+    for model in (Review, ReviewArchive):
+        db.session.execute(
+            db.update(model).where(model.moderated_by == user_id)
+            .values(moderated_by=None, updated_at=model.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+    counts['user'] = db.session.execute(db.delete(User).where(User.id == user_id)).rowcount
+    CategoryCounter.reconcile()
+    db.session.commit()
+
+    response_cache.invalidate()
+    clear_total_cache()
+    return counts
+
+
+def clear_posts(batch_size=500):
+    """Удаление всех объявлений пачками; отзывы к ним удаляет база"""
+    deleted = delete_in_batches(Post.__table__, db.true(), batch_size)
+    # Архивные отзывы остаются, поэтому рейтинги пересчитываются, а не обнуляются
+    User.rebuild_ratings()
+    CategoryCounter.reconcile()
+    db.session.commit()
+
+    response_cache.invalidate()
+    clear_total_cache()
+    return deleted
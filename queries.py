@@ -0,0 +1,81 @@
+from models import User, Post, Review
+from serializers import with_authors
+from search import apply_search
+
+# Запросы маршрутов доски. Маршруты (views.py) и проверка планов (flask explain-queries)
+# строят их одними и теми же функциями: план проверяется у того запроса, который выполняется
+
+
+def latest_posts(limit=10):
+    """Последние активные объявления для главной страницы"""
+    return Post.query.filter_by(is_active=True).order_by(Post.created_at.desc()).limit(limit)
+
+
+def active_posts(category=''):
+    """Лента активных объявлений с авторами (порядок и страницу задает пагинация)"""
+    query = with_authors(Post.query.filter_by(is_active=True))
+    if category:
+        query = query.filter_by(category=category)
+    return query
+
+
+def post_by_id(post_id):
+    return Post.query.filter_by(id=post_id)
+
+
+def post_reviews(post_id):
+    """Одобренные отзывы объявления, новые первыми"""
+    return Review.query.filter_by(post_id=post_id, is_approved=True).order_by(Review.created_at.desc())
+
+
+def buyer_review(post_id, buyer_id):
+    """Отзыв покупателя на объявление (не больше одного)"""
+    return Review.query.filter_by(post_id=post_id, buyer_id=buyer_id)
+
+
+def user_by_telegram_id(telegram_id):
+    return User.query.filter_by(telegram_id=telegram_id)
+
+
+def user_posts(user_id):
+    """Объявления пользователя (и снятые с публикации), новые первыми"""
+    return with_authors(Post.query.filter_by(user_id=user_id)).order_by(Post.created_at.desc())
+
+
+def seller_reviews(seller_id, model=Review):
+    """Одобренные отзывы о продавце (model=ReviewArchive - к архивным объявлениям)"""
+    return model.query.filter_by(seller_id=seller_id, is_approved=True).order_by(model.created_at.desc())
+
+
+def pending_reviews():
+    """Отзывы, ожидающие модерации"""
+    return Review.query.filter_by(is_approved=False)
+
+
+def apply_price_filter(query, options):
+    """Фильтр по разобранной сумме цены и сортировка по ней (объявления без суммы при этом не попадают).
+
+    Порядок по (price_amount, id) в одном направлении совпадает с индексом,
+    поэтому страница читается из индекса без сортировки всей выборки.
+    """
+    if not options:
+        return query
+    query = query.filter(Post.price_amount.is_not(None), Post.price_currency == options['currency'])
+    if 'min_price' in options:
+        query = query.filter(Post.price_amount >= options['min_price'])
+    if 'max_price' in options:
+        query = query.filter(Post.price_amount <= options['max_price'])
+    if options.get('sort') == 'price_asc':
+        query = query.order_by(None).order_by(Post.price_amount.asc(), Post.id.asc())
+    elif options.get('sort') == 'price_desc':
+        query = query.order_by(None).order_by(Post.price_amount.desc(), Post.id.desc())
+    return query
+
+
+def build_search_query(query, category, prices=None):
+    """Запрос поиска по активным объявлениям (с текстом - отсортирован по релевантности,
+    с сортировкой по цене - по цене)"""
+    search_query = active_posts(category)
+    if query:
+        search_query = apply_search(search_query, query)
+    return apply_price_filter(search_query, prices)
@@ -0,0 +1,62 @@
+from models import db
+
+# Строки плана, означающие полный просмотр таблицы
+SQLITE_FULL_SCAN = 'SCAN '
+SQLITE_TEMP_SORT = 'USE TEMP B-TREE FOR ORDER BY'
+POSTGRES_FULL_SCAN = 'Seq Scan'
+
+
+def driver_params(compiled, dialect):
+    """Параметры скомпилированного запроса в виде, который ждет драйвер.
+
+    Значения приводятся типами колонок так же, как при обычном выполнении
+    (например, UUID в 16 байт для SQLite); для драйверов с позиционными
+    параметрами - кортеж в порядке их появления в тексте запроса.
+    """
+    params = {}
+    for name, value in compiled.construct_params().items():
+        processor = compiled.binds[name].type.dialect_impl(dialect).bind_processor(dialect)
+        params[name] = processor(value) if processor else value
+    if compiled.positional:
+        return tuple(params[name] for name in compiled.positiontup)
+    return params
+
+
+def explain(query):
+    """План выполнения запроса в виде списка строк"""
+    statement = getattr(query, 'statement', query)
+    connection = db.session.connection()
+    compiled = statement.compile(dialect=connection.dialect)
+    params = driver_params(compiled, connection.dialect)
+
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}', params).all()
+        return [row[-1] for row in rows]
+
+    if dialect == 'postgresql':
+        # На маленькой базе планировщик предпочтет Seq Scan даже при наличии индекса,
+        # поэтому запрещаем его: если Seq Scan остался, подходящего индекса нет
+        connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+        rows = connection.exec_driver_sql(f'EXPLAIN {compiled}', params).all()
+        return [row[0] for row in rows]
+
+    raise ValueError(f'EXPLAIN не поддерживается для {dialect}')
+
+
+def full_scans(plan):
+    """Строки плана с полным просмотром таблицы.
+
+    В SQLite "SCAN t USING INDEX" допустим, только если индекс дает нужный
+    порядок сортировки (проход останавливается на LIMIT); если при этом
+    строится временное B-дерево для ORDER BY, это полный просмотр индекса.
+    """
+    sorts_in_memory = any(SQLITE_TEMP_SORT in line for line in plan)
+    scans = []
+    for line in plan:
+        if POSTGRES_FULL_SCAN in line:
+            scans.append(line)
+        elif line.startswith(SQLITE_FULL_SCAN) and 'VIRTUAL TABLE' not in line:
+            if 'USING' not in line or sorts_in_memory:
+                scans.append(line)
+    return scans
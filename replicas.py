@@ -0,0 +1,72 @@
+import random
+import time
+from flask import g, request, has_request_context
+from flask_sqlalchemy.session import Session
+
+# Реплики подключаются как binds с такими ключами (см. config.py)
+REPLICA_PREFIX = 'replica_'
+# Cookie со временем, до которого запросы пользователя идут в основную базу
+PRIMARY_COOKIE = 'db_primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingSession(Session):
+    """Сессия, направляющая чтение запроса на реплику, выбранную ReplicaRouter.
+
+    Запись (flush и UPDATE/DELETE/INSERT) всегда идет в основную базу.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not getattr(clause, 'is_dml', False):
+            key = g.get('db_replica') if has_request_context() else None
+            if key is not None:
+                return self._db.engines[key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaRouter:
+    """Выбор реплики для запросов на чтение (DATABASE_REPLICA_URLS).
+
+    Реплика выбирается один раз на запрос, чтобы все чтения шли в одну
+    базу. После записи пользователь на REPLICA_LAG_SECONDS секунд остается
+    на основной базе (cookie), поэтому видит свои изменения даже при
+    отставании реплик. Запросы вне HTTP (команды flask) идут в основную базу.
+    """
+
+    def __init__(self, app=None):
+        self.bind_keys = []
+        self.lag_seconds = 5
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.bind_keys = sorted(key for key in app.config.get('SQLALCHEMY_BINDS', {})
+                                if key.startswith(REPLICA_PREFIX))
+        self.lag_seconds = app.config.get('REPLICA_LAG_SECONDS', 5)
+        app.extensions['replicas'] = self
+        if not self.bind_keys:
+            return
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _recent_write(self):
+        try:
+            return float(request.cookies.get(PRIMARY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def _before_request(self):
+        if request.method in SAFE_METHODS and not self._recent_write():
+            g.db_replica = random.choice(self.bind_keys)
+
+    def _after_request(self, response):
+        if request.method not in SAFE_METHODS:
+            # Как и cookie сессии: Mini App в веб-версии Telegram открыт во фрейме
+            response.set_cookie(PRIMARY_COOKIE, str(int(time.time() + self.lag_seconds) + 1),
+                                max_age=self.lag_seconds + 1, httponly=True, secure=request.is_secure,
+                                samesite='None' if request.is_secure else 'Lax')
+        return response
+
+
+replicas = ReplicaRouter()
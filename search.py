@@ -0,0 +1,212 @@
+import re
+from sqlalchemy import event, DDL, text, literal_column
+from models import db, Post
+
+# Полнотекстовый поиск по объявлениям:
+#  - PostgreSQL: генерируемая колонка tsvector (конфигурация russian) + GIN индекс
+#  - SQLite: теневая таблица FTS5, синхронизируемая триггерами
+# На других СУБД используется обычный ILIKE.
+
+SEARCH_CONFIG = 'russian'
+
+POSTGRES_DDL = [
+    f"""ALTER TABLE post ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(content, '')), 'B')
+        ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_post_search_vector ON post USING GIN (search_vector)"
+]
+
+SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS post_fts USING fts5(
+        post_id UNINDEXED, title, content, tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS post_fts_insert AFTER INSERT ON post BEGIN
+        INSERT INTO post_fts (post_id, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS post_fts_delete AFTER DELETE ON post BEGIN
+        DELETE FROM post_fts WHERE post_id = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS post_fts_update AFTER UPDATE OF id, title, content ON post BEGIN
+        DELETE FROM post_fts WHERE post_id = old.id;
+        INSERT INTO post_fts (post_id, title, content) VALUES (new.id, new.title, new.content);
+    END"""
+]
+
+SQLITE_REBUILD = [
+    "DELETE FROM post_fts",
+    "INSERT INTO post_fts (post_id, title, content) SELECT id, title, content FROM post"
+]
+
+for statement in POSTGRES_DDL:
+    event.listen(Post.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+for statement in SQLITE_DDL:
+    event.listen(Post.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+
+
+# СТЕММИНГ (алгоритм Snowball для русского языка)
+_VOWELS = 'аеиоуыэюя'
+
+
+def _suffixes(after_a='', plain=''):
+    """Окончания, отсортированные по убыванию длины; after_a - только после 'а'/'я'"""
+    items = [(ending, True) for ending in after_a.split()] + [(ending, False) for ending in plain.split()]
+    return sorted(items, key=lambda item: len(item[0]), reverse=True)
+
+
+_PERFECTIVE_GERUND = _suffixes('в вши вшись', 'ив ивши ившись ыв ывши ывшись')
+_ADJECTIVE = _suffixes(plain='ее ие ые ое ими ыми ей ий ый ой ем им ым ом его ого ему ому '
+                             'их ых ую юю ая яя ою ею')
+_PARTICIPLE = _suffixes('ем нн вш ющ щ', 'ивш ывш ующ')
+_REFLEXIVE = _suffixes(plain='ся сь')
+_VERB = _suffixes('ла на ете йте ли й л ем н ло но ет ют ны ть ешь нно',
+                  'ила ыла ена ейте уйте ите или ыли ей уй ил ыл им ым ен ило ыло ено ят ует уют '
+                  'ит ыт ены ить ыть ишь ую ю')
+_NOUN = _suffixes(plain='а ев ов ие ье е иями ями ами еи ии и ией ей ой ий й иям ям ием ем ам ом о у '
+                        'ах иях ях ы ь ию ью ю ия ья я')
+_SUPERLATIVE = _suffixes(plain='ейш ейше')
+_DERIVATIONAL = _suffixes(plain='ост ость')
+
+
+def _regions(word):
+    """Начало областей RV и R2 слова"""
+    rv = r1 = r2 = len(word)
+    for i, char in enumerate(word):
+        if char in _VOWELS:
+            rv = i + 1
+            break
+    for i in range(1, len(word)):
+        if word[i - 1] in _VOWELS and word[i] not in _VOWELS:
+            r1 = i + 1
+            break
+    for i in range(r1 + 1, len(word)):
+        if word[i - 1] in _VOWELS and word[i] not in _VOWELS:
+            r2 = i + 1
+            break
+    return rv, r2
+
+
+def _strip(word, start, suffixes):
+    """Удаление самого длинного окончания из области word[start:]; None, если его нет"""
+    region = word[start:]
+    for ending, after_a in suffixes:
+        if region.endswith(ending):
+            if after_a and not region[:-len(ending)].endswith(('а', 'я')):
+                return None
+            return word[:-len(ending)]
+    return None
+
+
+def _strip_adjectival(word, start):
+    stem = _strip(word, start, _ADJECTIVE)
+    if stem is not None:
+        stem = _strip(stem, start, _PARTICIPLE) or stem
+    return stem
+
+
+def stem(word):
+    """Основа русского слова (для латиницы и чисел возвращается само слово)"""
+    word = word.lower().replace('ё', 'е')
+    rv, r2 = _regions(word)
+
+    stemmed = _strip(word, rv, _PERFECTIVE_GERUND)
+    if stemmed is None:
+        word = _strip(word, rv, _REFLEXIVE) or word
+        for strip in (_strip_adjectival,
+                      lambda w, start: _strip(w, start, _VERB),
+                      lambda w, start: _strip(w, start, _NOUN)):
+            stemmed = strip(word, rv)
+            if stemmed is not None:
+                break
+    word = stemmed if stemmed is not None else word
+
+    if word[rv:].endswith('и'):
+        word = word[:-1]
+
+    word = _strip(word, r2, _DERIVATIONAL) or word
+
+    if word[rv:].endswith('нн'):
+        word = word[:-1]
+    else:
+        superlative = _strip(word, rv, _SUPERLATIVE)
+        if superlative is not None:
+            word = superlative
+            if word[rv:].endswith('нн'):
+                word = word[:-1]
+        elif word[rv:].endswith('ь'):
+            word = word[:-1]
+
+    return word
+
+
+def search_terms(query):
+    """Нормализованные основы слов поискового запроса"""
+    return [stem(token) for token in re.findall(r'\w+', query.lower())]
+
+
+# ПОИСК
+def _dialect():
+    return db.engine.dialect.name
+
+
+def _fts5_match(query):
+    """Выражение MATCH для FTS5: все основы слов, с поиском по префиксу"""
+    terms = []
+    for term in search_terms(query):
+        if len(term) >= 3:
+            terms.append(f'"{term}"*')
+        elif term:
+            terms.append(f'"{term}"')
+    return ' '.join(terms)
+
+
+def apply_search(query, search_text):
+    """Фильтрация запроса объявлений по тексту с сортировкой по релевантности"""
+    dialect = _dialect()
+
+    if dialect == 'postgresql':
+        ts_query = db.func.websearch_to_tsquery(SEARCH_CONFIG, search_text)
+        search_vector = literal_column('post.search_vector')
+        return query.filter(search_vector.op('@@')(ts_query)).order_by(
+            db.func.ts_rank_cd(search_vector, ts_query).desc(),
+            Post.created_at.desc()
+        )
+
+    if dialect == 'sqlite':
+        match = _fts5_match(search_text)
+        if not match:
+            return query.filter(db.false())
+        # bm25: чем меньше значение, тем выше релевантность; заголовок весит больше текста
+        matches = db.select(
+            literal_column('post_id').label('post_id'),
+            literal_column('bm25(post_fts, 0.0, 10.0, 1.0)').label('rank')
+        ).select_from(text('post_fts')).where(
+            text('post_fts MATCH :match').bindparams(match=match)
+        ).subquery()
+        return query.join(matches, matches.c.post_id == Post.id).order_by(
+            matches.c.rank,
+            Post.created_at.desc()
+        )
+
+    return query.filter(
+        db.or_(
+            Post.title.ilike(f'%{search_text}%'),
+            Post.content.ilike(f'%{search_text}%')
+        )
+    ).order_by(Post.created_at.desc())
+
+
+def rebuild_index():
+    """Создание недостающих структур поиска и переиндексация всех объявлений"""
+    dialect = _dialect()
+
+    if dialect == 'postgresql':
+        for statement in POSTGRES_DDL:
+            db.session.execute(text(statement))
+    elif dialect == 'sqlite':
+        for statement in SQLITE_DDL + SQLITE_REBUILD:
+            db.session.execute(text(statement))
+
+    db.session.commit()
+    return dialect
@@ -0,0 +1,86 @@
+from sqlalchemy.orm import joinedload
+from models import Post
+from images import image_src
+
+CATEGORY_LABELS = dict(Post.CATEGORIES)
+EXCERPT_LENGTH = 150
+
+
+def _excerpt(post):
+    content = post.content or ''
+    if len(content) <= EXCERPT_LENGTH:
+        return content
+    return content[:EXCERPT_LENGTH] + '...'
+
+
+# Все поля, которые умеет отдавать API объявлений
+POST_FIELDS = {
+    'id': lambda post: post.id,
+    'title': lambda post: post.title,
+    'content': lambda post: post.content,
+    'excerpt': _excerpt,
+    'category': lambda post: post.category,
+    'category_display': lambda post: CATEGORY_LABELS.get(post.category, post.category),
+    'price': lambda post: post.price,
+    'price_amount': lambda post: post.price_amount,
+    'price_currency': lambda post: post.price_currency,
+    'contact_info': lambda post: post.contact_info,
+    'image_url': lambda post: image_src(post, 'detail'),
+    'thumbnail_url': lambda post: image_src(post, 'thumb'),
+    'created_at': lambda post: post.created_at.isoformat(),
+    'created_at_display': lambda post: post.created_at.strftime('%d.%m.%Y в %H:%M'),
+    'updated_at': lambda post: (post.updated_at or post.created_at).isoformat(),
+    'is_active': lambda post: post.is_active,
+    'user_id': lambda post: post.user_id,
+    'author': lambda post: post.author.first_name if post.author else 'Аноним',
+    'author_name': lambda post: post.author.first_name if post.author else 'Аноним',
+    'author_username': lambda post: f"@{post.author.username}" if post.author and post.author.username else None,
+    'author_rating': lambda post: post.author.average_rating if post.author else 0,
+    'author_reviews_count': lambda post: post.author.reviews_count if post.author else 0,
+    'average_rating': lambda post: post.author.average_rating if post.author else 0,
+    'reviews_count': lambda post: post.author.reviews_count if post.author else 0
+}
+
+# Наборы полей по умолчанию для каждого эндпоинта
+LIST_FIELDS = ('id', 'title', 'content', 'category', 'category_display', 'price', 'contact_info',
+               'thumbnail_url', 'created_at', 'created_at_display', 'author', 'author_username',
+               'author_rating', 'author_reviews_count')
+DETAIL_FIELDS = ('id', 'title', 'content', 'category', 'category_display', 'price', 'contact_info',
+                 'image_url', 'created_at', 'created_at_display', 'updated_at', 'is_active', 'user_id',
+                 'author_name', 'author_rating', 'author_reviews_count')
+USER_POST_FIELDS = ('id', 'title', 'content', 'category', 'category_display', 'price', 'contact_info',
+                    'thumbnail_url', 'created_at', 'created_at_display', 'is_active', 'average_rating', 'reviews_count')
+
+# Поля, которые не отправляются в режиме превью
+FULL_TEXT_FIELDS = ('content', 'contact_info')
+
+
+def with_authors(query):
+    """Загрузка авторов (и их рейтингов) тем же запросом, что и объявления"""
+    return query.options(joinedload(Post.author))
+
+
+def parse_fields(args, default):
+    """Разбор параметров ?fields= и ?excerpt= в список полей"""
+    requested = args.get('fields', '')
+    if requested:
+        fields = [name.strip() for name in requested.split(',') if name.strip() in POST_FIELDS]
+    else:
+        fields = list(default)
+
+    if args.get('excerpt', '').lower() in ('1', 'true', 'yes'):
+        fields = [name for name in fields if name not in FULL_TEXT_FIELDS]
+        if 'excerpt' not in fields:
+            fields.append('excerpt')
+
+    return fields
+
+
+def serialize_post(post, fields=DETAIL_FIELDS):
+    """Преобразование объявления в словарь для JSON"""
+    return {name: POST_FIELDS[name](post) for name in fields}
+
+
+def serialize_posts(posts, fields=LIST_FIELDS):
+    """Преобразование списка объявлений в список словарей"""
+    return [serialize_post(post, fields) for post in posts]
@@ -20,14 +20,13 @@ async function moderateReview(reviewId, action) {
     buttons.forEach(btn => btn.disabled = true);
 
     try {
-        const response = await fetch(`/api/review/${reviewId}/moderate`, {
+        const response = await authFetch(`/api/review/${reviewId}/moderate`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
             body: JSON.stringify({
-                action: action,
-                user_data: userData
+                action: action
             })
         });
 
@@ -62,6 +61,79 @@ async function moderateReview(reviewId, action) {
     }
 }
 
+// Массовая модерация выбранных отзывов одним запросом
+async function moderateSelected(action) {
+    const checkboxes = Array.from(document.querySelectorAll('.review-select:checked'));
+    if (checkboxes.length === 0) {
+        alert('Выберите отзывы');
+        return;
+    }
+
+    const confirmMessage = action === 'approve'
+        ? `Одобрить выбранные отзывы (${checkboxes.length})?`
+        : `Отклонить выбранные отзывы (${checkboxes.length})?`;
+
+    if (!confirm(confirmMessage)) {
+        return;
+    }
+
+    const reviewIds = checkboxes.map(checkbox => parseInt(checkbox.value, 10));
+    const buttons = document.querySelectorAll('.bulk-actions button');
+    buttons.forEach(btn => btn.disabled = true);
+
+    try {
+        const response = await authFetch('/api/reviews/moderate', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                action: action,
+                review_ids: reviewIds
+            })
+        });
+
+        const result = await response.json();
+
+        if (!result.success) {
+            throw new Error(result.error);
+        }
+
+        reviewIds.forEach(reviewId => {
+            const card = document.querySelector(`[data-review-id="${reviewId}"]`);
+            if (card) {
+                card.remove();
+            }
+        });
+        document.getElementById('selectAll').checked = false;
+
+        const message = action === 'approve'
+            ? `Одобрено отзывов: ${result.processed}`
+            : `Отклонено отзывов: ${result.processed}`;
+        if (window.showTelegramNotification) {
+            window.showTelegramNotification(message, 'info');
+        } else {
+            alert(message);
+        }
+
+        updateStats(result.processed);
+    } catch (error) {
+        console.error('Bulk moderation error:', error);
+
+        if (window.showTelegramNotification) {
+            window.showTelegramNotification('Ошибка: ' + error.message, 'error');
+        } else {
+            alert('Ошибка: ' + error.message);
+        }
+    } finally {
+        buttons.forEach(btn => btn.disabled = false);
+    }
+}
+
+function toggleSelectAll(checked) {
+    document.querySelectorAll('.review-select').forEach(checkbox => checkbox.checked = checked);
+}
+
 function showReviewDetails(reviewId) {
     const card = document.querySelector(`[data-review-id="${reviewId}"]`);
     const content = card.querySelector('.review-content').innerHTML;
@@ -74,11 +146,11 @@ function closeModal() {
     document.getElementById('reviewModal').style.display = 'none';
 }
 
-function updateStats() {
-    const remainingCards = document.querySelectorAll('.moderation-card').length;
+function updateStats(processed = 1) {
+    // На странице только часть очереди - уменьшаем общий счетчик
     const statsElement = document.querySelector('.stat-card h3');
     if (statsElement) {
-        statsElement.textContent = remainingCards;
+        statsElement.textContent = Math.max(0, parseInt(statsElement.textContent, 10) - processed);
     }
 }
 
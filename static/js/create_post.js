@@ -25,21 +25,12 @@ document.addEventListener('DOMContentLoaded', function() {
         submitBtn.textContent = 'Публикуем...';
 
         try {
+            // multipart/form-data: вместе с полями может уйти файл изображения
             const formData = new FormData(this);
 
-            const response = await fetch('/create', {
+            const response = await authFetch('/create', {
                 method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    title: formData.get('title'),
-                    category: formData.get('category'),
-                    content: formData.get('content'),
-                    price: formData.get('price'),
-                    contact_info: formData.get('contact_info'),
-                    user_data: userData
-                })
+                body: formData
             });
 
             const result = await response.json();
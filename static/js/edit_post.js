@@ -48,7 +48,7 @@ document.addEventListener('DOMContentLoaded', function() {
 
 async function loadPostData(postId, userData) {
     try {
-        const response = await fetch(`/api/post/${postId}?user_data=${encodeURIComponent(JSON.stringify(userData))}`);
+        const response = await authFetch(`/api/post/${postId}`);
         const result = await response.json();
 
         if (result.success) {
@@ -62,6 +62,13 @@ async function loadPostData(postId, userData) {
             document.getElementById('contact_info').value = post.contact_info;
             document.getElementById('is_active').checked = post.is_active;
 
+            if (post.image_url) {
+                const currentImage = document.getElementById('currentImage');
+                currentImage.src = post.image_url;
+                currentImage.style.display = 'block';
+                document.getElementById('removeImageLabel').style.display = 'block';
+            }
+
             // Обновляем счетчики
             document.getElementById('titleCount').textContent = post.title.length;
             document.getElementById('contentCount').textContent = post.content.length;
@@ -89,22 +96,14 @@ async function updatePost(postId, userData) {
     submitBtn.classList.add('loading');
 
     try {
+        // multipart/form-data: вместе с полями может уйти файл изображения
         const formData = new FormData(form);
+        formData.set('is_active', document.getElementById('is_active').checked ? '1' : '0');
+        formData.set('remove_image', document.getElementById('remove_image').checked ? '1' : '0');
 
-        const response = await fetch(`/api/post/${postId}`, {
+        const response = await authFetch(`/api/post/${postId}`, {
             method: 'PUT',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({
-                title: formData.get('title'),
-                category: formData.get('category'),
-                content: formData.get('content'),
-                price: formData.get('price'),
-                contact_info: formData.get('contact_info'),
-                is_active: formData.get('is_active') === 'on',
-                user_data: userData
-            })
+            body: formData
         });
 
         const result = await response.json();
@@ -147,14 +146,8 @@ async function deletePost(postId, userData) {
     deleteBtn.classList.add('loading');
 
     try {
-        const response = await fetch(`/api/post/${postId}`, {
-            method: 'DELETE',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({
-                user_data: userData
-            })
+        const response = await authFetch(`/api/post/${postId}`, {
+            method: 'DELETE'
         });
 
         const result = await response.json();
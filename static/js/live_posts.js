@@ -0,0 +1,43 @@
+// Живая лента на главной и в списке объявлений: снятые объявления скрываются,
+// о новых сообщает плашка (список не перестраивается под пользователем)
+document.addEventListener('DOMContentLoaded', function() {
+    const list = document.querySelector('[data-live-posts]');
+    const banner = document.getElementById('newPostsBanner');
+    if (!list || !banner) {
+        return;
+    }
+
+    const created = new Set();
+    let stale = false;
+
+    const category = list.dataset.category || '';
+
+    subscribePosts(category, function(type, post) {
+        if (type === 'post-created') {
+            created.add(post.id);
+        } else if (type === 'post-deactivated' || (type === 'post-updated' && category && post.category !== category)) {
+            // Снятое или перенесенное в другую категорию объявление уходит из ленты
+            const card = list.querySelector(`[data-post-id="${post.id}"]`);
+            if (card) {
+                card.remove();
+            }
+            created.delete(post.id);
+        } else if (type === 'post-updated' && category && post.previous_category) {
+            // Перенесено в эту категорию - для ленты это новое объявление
+            created.add(post.id);
+        } else if (type === 'reset') {
+            stale = true;
+        }
+
+        if (created.size > 0) {
+            banner.textContent = `🆕 Новых объявлений: ${created.size} - показать`;
+        } else if (stale) {
+            banner.textContent = '🔄 Лента изменилась - обновить';
+        }
+        banner.style.display = created.size > 0 || stale ? 'block' : 'none';
+    });
+
+    banner.addEventListener('click', function() {
+        window.location.reload();
+    });
+});
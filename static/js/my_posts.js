@@ -11,11 +11,56 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 
     loadUserPosts(userData.id);
+
+    // Объявление изменено в другом окне или устройстве - список перечитывается
+    subscribePosts('', function(type, post) {
+        if (type !== 'post-created' && postsContainer.querySelector(`[data-post-id="${post.id}"]`)) {
+            loadUserPosts(userData.id);
+        }
+    });
+
+    const archiveButton = document.getElementById('showArchive');
+    archiveButton.style.display = 'inline-block';
+    archiveButton.addEventListener('click', function() {
+        archiveButton.style.display = 'none';
+        loadArchivedPosts(userData.id);
+    });
 });
 
+// Архивные объявления (истекшие и давно снятые) загружаются только по запросу
+async function loadArchivedPosts(telegramId) {
+    const archiveContainer = document.getElementById('archiveContainer');
+    try {
+        const response = await fetch(`/api/user/${telegramId}/posts?excerpt=1&archived=1`);
+        const data = await response.json();
+
+        if (data.posts && data.posts.length > 0) {
+            let html = '<h2>📦 Архив</h2>';
+            data.posts.forEach(post => {
+                html += `
+                    <div class="post-card archived">
+                        <h3>${post.title}</h3>
+                        <p class="post-meta">
+                            📍 ${post.category_display} • ${post.created_at_display}
+                            ${post.price ? ` • 💰 ${post.price}` : ''}
+                        </p>
+                        <p>${post.excerpt}</p>
+                    </div>
+                `;
+            });
+            archiveContainer.innerHTML = html;
+        } else {
+            archiveContainer.innerHTML = '<p>В архиве пока нет объявлений.</p>';
+        }
+    } catch (error) {
+        console.error('Error loading archived posts:', error);
+        archiveContainer.innerHTML = '<p>Ошибка при загрузке архива</p>';
+    }
+}
+
 async function loadUserPosts(telegramId) {
     try {
-        const response = await fetch(`/api/user/${telegramId}/posts`);
+        const response = await fetch(`/api/user/${telegramId}/posts?excerpt=1`);
         const data = await response.json();
 
         console.log('Отладочная информация:', data);
@@ -27,14 +72,15 @@ async function loadUserPosts(telegramId) {
             data.posts.forEach(post => {
                 console.log('Пост:', post);
                 html += `
-                    <div class="post-card">
+                    <div class="post-card" data-post-id="${post.id}">
+                        ${post.thumbnail_url ? `<img src="${post.thumbnail_url}" alt="" class="post-thumbnail" loading="lazy">` : ''}
                         <h3>${post.title}</h3>
                         <p class="post-meta">
                             📍 ${post.category_display} • ${post.created_at_display}
                             ${post.price ? ` • 💰 ${post.price}` : ''}
                             ${post.reviews_count > 0 ? ` • ⭐ ${post.average_rating} (${post.reviews_count})` : ' • ⭐ Нет отзывов'}
                         </p>
-                        <p>${post.content.substring(0, 150)}${post.content.length > 150 ? '...' : ''}</p>
+                        <p>${post.excerpt}</p>
                         <div class="post-actions">
                             <a href="/post/${post.id}" class="btn btn-small">👁️ Просмотреть</a>
                             <a href="/edit_post/${post.id}" class="btn btn-small">✏️ Редактировать</a>
@@ -64,7 +64,7 @@ document.addEventListener('DOMContentLoaded', function() {
             try {
                 console.log('Sending review request...');
 
-                const response = await fetch('/api/review', {
+                const response = await authFetch('/api/review', {
                     method: 'POST',
                     headers: {
                         'Content-Type': 'application/json',
@@ -72,8 +72,7 @@ document.addEventListener('DOMContentLoaded', function() {
                     body: JSON.stringify({
                         post_id: postId,
                         rating: parseInt(rating),
-                        comment: comment,
-                        user_data: userData
+                        comment: comment
                     })
                 });
 
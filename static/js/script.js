@@ -23,10 +23,65 @@ function initTelegramApp() {
     return null;
 }
 
+// Сессия пользователя: подписанные Telegram initData обмениваются на токен
+async function refreshTelegramSession() {
+    const initData = sessionStorage.getItem('telegram_init_data')
+        || (window.Telegram && window.Telegram.WebApp && window.Telegram.WebApp.initData);
+    if (!initData) {
+        return null;
+    }
+
+    try {
+        const response = await fetch('/api/auth/telegram', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ init_data: initData })
+        });
+        const result = await response.json();
+        if (!result.success) {
+            console.error('Telegram auth error:', result.error);
+            return null;
+        }
+
+        localStorage.setItem('telegram_session', JSON.stringify({
+            token: result.token,
+            expires_at: Date.now() + result.expires_in * 1000
+        }));
+        return result.token;
+    } catch (error) {
+        console.error('Telegram auth error:', error);
+        return null;
+    }
+}
+
+async function getSessionToken() {
+    const session = JSON.parse(localStorage.getItem('telegram_session') || '{}');
+    // Обновляем токен заранее, за минуту до истечения
+    if (session.token && session.expires_at > Date.now() + 60000) {
+        return session.token;
+    }
+    return refreshTelegramSession();
+}
+
+// fetch с заголовком авторизации
+async function authFetch(url, options = {}) {
+    const token = await getSessionToken();
+    const headers = Object.assign({}, options.headers || {});
+    if (token) {
+        headers['Authorization'] = `Bearer ${token}`;
+    }
+    return fetch(url, Object.assign({}, options, { headers: headers }));
+}
+
 // Инициализация при загрузке страницы
 document.addEventListener('DOMContentLoaded', function() {
     const tg = initTelegramApp();
 
+    // Заранее получаем токен (и cookie сессии для обычных переходов по страницам)
+    getSessionToken();
+
     // Добавляем обработчики для всех кнопок
     document.querySelectorAll('.btn').forEach(btn => {
         btn.addEventListener('click', function() {
@@ -37,14 +92,31 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 });
 
-// Функция для загрузки объявлений
-async function loadPosts(category = '', page = 1) {
+// Функция для загрузки объявлений (cursor - значение next_cursor из предыдущего ответа)
+async function loadPosts(category = '', cursor = '') {
     try {
-        const response = await fetch(`/api/posts?category=${category}&page=${page}`);
+        const params = new URLSearchParams({ category: category, cursor: cursor, excerpt: 1 });
+        const response = await fetch(`/api/posts?${params}`);
         const data = await response.json();
         return data;
     } catch (error) {
         console.error('Error loading posts:', error);
-        return { posts: [], has_next: false, has_prev: false };
+        return { posts: [], has_next: false, has_prev: false, next_cursor: null };
     }
-}
\ No newline at end of file
+}
+
+// Подписка на изменения объявлений (/api/posts/stream) вместо периодического опроса /api/posts.
+// onEvent(type, post): type - 'post-created', 'post-updated', 'post-deactivated' или 'reset'
+// (пропущенные события потеряны - ленту нужно перечитать). Браузер сам переподключается
+// с Last-Event-ID. Возвращает функцию отписки.
+function subscribePosts(category, onEvent) {
+    if (!window.EventSource) {
+        return function() {};
+    }
+    const params = category ? `?${new URLSearchParams({ category: category })}` : '';
+    const source = new EventSource(`/api/posts/stream${params}`);
+    ['post-created', 'post-updated', 'post-deactivated', 'reset'].forEach(type => {
+        source.addEventListener(type, event => onEvent(type, JSON.parse(event.data)));
+    });
+    return function() { source.close(); };
+}
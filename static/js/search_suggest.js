@@ -0,0 +1,35 @@
+// Подсказки при вводе запроса (/api/search/suggest) в списке под полем поиска
+document.addEventListener('DOMContentLoaded', function() {
+    const input = document.querySelector('.search-input[list]');
+    const list = input && document.getElementById(input.getAttribute('list'));
+    if (!list) {
+        return;
+    }
+
+    let timer = null;
+    let controller = null;
+
+    input.addEventListener('input', function() {
+        clearTimeout(timer);
+        timer = setTimeout(async function() {
+            if (controller) {
+                controller.abort();
+            }
+            controller = new AbortController();
+            try {
+                const params = new URLSearchParams({ q: input.value });
+                const response = await fetch(`/api/search/suggest?${params}`, { signal: controller.signal });
+                const data = await response.json();
+                list.replaceChildren(...data.suggestions.map(suggestion => {
+                    const option = document.createElement('option');
+                    option.value = suggestion;
+                    return option;
+                }));
+            } catch (error) {
+                if (error.name !== 'AbortError') {
+                    console.error('Error loading suggestions:', error);
+                }
+            }
+        }, 80);
+    });
+});
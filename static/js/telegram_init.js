@@ -0,0 +1,33 @@
+// Инициализация Telegram Web App (подключается после telegram-web-app.js)
+let tg = window.Telegram.WebApp;
+tg.expand();
+tg.enableClosingConfirmation();
+
+// Получаем данные пользователя
+const user = tg.initDataUnsafe.user;
+
+// Сохраняем в localStorage для использования в приложении
+if (user) {
+    localStorage.setItem('telegram_user', JSON.stringify(user));
+}
+
+// Подписанные initData обмениваются на токен сессии (см. script.js)
+if (tg.initData) {
+    sessionStorage.setItem('telegram_init_data', tg.initData);
+}
+
+// Функция для показа уведомлений
+function showNotification(message, type = 'info') {
+    if (tg && tg.showPopup) {
+        tg.showPopup({
+            title: type === 'error' ? 'Ошибка' : 'Уведомление',
+            message: message,
+            buttons: [{ type: 'ok' }]
+        });
+    } else {
+        alert(message);
+    }
+}
+
+// Сохраняем функцию в глобальной области видимости
+window.showTelegramNotification = showNotification;
@@ -0,0 +1,236 @@
+import heapq
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import timezone
+from models import db, Post
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r'\w+')
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 40
+
+
+def normalize(text):
+    return text.lower().replace('ё', 'е')
+
+
+def title_terms(title):
+    """Различные слова заголовка для подсказок (без чисел и однобуквенных слов).
+
+    Строки интернируются: одно слово многих объявлений хранится один раз.
+    """
+    return {sys.intern(word) for word in _WORD.findall(normalize(title or ''))
+            if MIN_TERM_LENGTH <= len(word) <= MAX_TERM_LENGTH and not word.isdigit()}
+
+
+class PrefixIndex:
+    """Слова заголовков активных объявлений в отсортированном списке.
+
+    Подсказки для префикса - срез списка (bisect), из которого берутся
+    слова с наибольшим весом. Вес слова - сумма по объявлениям с ним
+    2 ** ((created_at - эпоха индекса) / half_life): частые слова и слова
+    свежих объявлений поднимаются выше, а веса уже учтенных объявлений не
+    нужно пересчитывать со временем. Слов не больше max_terms.
+    """
+
+    def __init__(self, max_terms=50000, half_life=7 * 86400):
+        self.max_terms = max_terms
+        self.half_life = half_life
+        self.epoch = time.time()
+        self._terms = []   # отсортированные слова
+        self._weights = {}  # слово -> [вес, объявлений]
+        self._posts = {}    # id объявления -> (слова в индексе, вклад в их вес)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._terms)
+
+    def _contribution(self, created_at):
+        timestamp = created_at.replace(tzinfo=timezone.utc).timestamp() if created_at else time.time()
+        return 2.0 ** ((timestamp - self.epoch) / self.half_life)
+
+    @classmethod
+    def build(cls, rows, max_terms=50000, half_life=7 * 86400):
+        """Индекс по строкам (id, title, created_at); при избытке слов остаются самые весомые"""
+        index = cls(max_terms, half_life)
+        posts = []
+        weights = {}
+        for post_id, title, created_at in rows:
+            terms = title_terms(title)
+            contribution = index._contribution(created_at)
+            posts.append((post_id, terms, contribution))
+            for term in terms:
+                weight = weights.setdefault(term, [0.0, 0])
+                weight[0] += contribution
+                weight[1] += 1
+
+        if len(weights) > max_terms:
+            kept = heapq.nlargest(max_terms, weights, key=lambda term: weights[term][0])
+            weights = {term: weights[term] for term in kept}
+        index._weights = weights
+        index._terms = sorted(weights)
+        index._posts = {post_id: (tuple(term for term in terms if term in weights), contribution)
+                        for post_id, terms, contribution in posts}
+        return index
+
+    def add(self, post_id, title, created_at):
+        with self._lock:
+            self._remove(post_id)
+            contribution = self._contribution(created_at)
+            indexed = []
+            for term in title_terms(title):
+                weight = self._weights.get(term)
+                if weight is None:
+                    if len(self._terms) >= self.max_terms:
+                        continue
+                    weight = self._weights[term] = [0.0, 0]
+                    insort(self._terms, term)
+                weight[0] += contribution
+                weight[1] += 1
+                indexed.append(term)
+            self._posts[post_id] = (tuple(indexed), contribution)
+
+    def remove(self, post_id):
+        with self._lock:
+            self._remove(post_id)
+
+    def _remove(self, post_id):
+        terms, contribution = self._posts.pop(post_id, ((), 0.0))
+        for term in terms:
+            weight = self._weights[term]
+            weight[1] -= 1
+            if weight[1] <= 0:
+                del self._weights[term]
+                del self._terms[bisect_left(self._terms, term)]
+            else:
+                weight[0] -= contribution
+
+    def suggest(self, prefix, limit=8):
+        """До limit слов, начинающихся с prefix, по убыванию веса"""
+        prefix = normalize(prefix)
+        with self._lock:
+            start = bisect_left(self._terms, prefix)
+            end = bisect_left(self._terms, prefix + '\U0010ffff', start)
+            candidates = self._terms[start:end]
+            return heapq.nlargest(limit, candidates, key=lambda term: self._weights[term][0])
+
+
+class SuggestIndex:
+    """Подсказки поиска по заголовкам активных объявлений в памяти процесса.
+
+    Индекс строится в фоне при первом запросе воркера (после fork) и до
+    готовности подсказки пусты. Создание, правка, удаление и архивация
+    объявлений в этом процессе меняют его сразу; изменения из других
+    воркеров попадают в индекс при перестроении раз в SUGGEST_REFRESH
+    секунд.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.index = None
+        self.max_terms = 50000
+        self.half_life = 7 * 86400
+        self.refresh = 600
+        self._pid = None
+        self._built_at = 0.0
+        self._building = False
+        self._pending = []  # изменения во время перестроения: применяются к новому индексу
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.max_terms = app.config.get('SUGGEST_MAX_TERMS', 50000)
+        self.half_life = app.config.get('SUGGEST_HALF_LIFE_DAYS', 7) * 86400
+        self.refresh = app.config.get('SUGGEST_REFRESH', 600)
+        app.extensions['suggest'] = self
+        if app.config.get('SUGGEST_ENABLED', True):
+            app.before_request(self._ensure_index)
+
+    def _ensure_index(self):
+        if self._pid == os.getpid() and (self._building or time.monotonic() - self._built_at < self.refresh):
+            return
+        with self._lock:
+            if self._building:
+                return
+            if self._pid != os.getpid():
+                # Индекс, унаследованный от мастера, не обновляется вместе с этим воркером
+                self._pid = os.getpid()
+                self.index = None
+            elif time.monotonic() - self._built_at < self.refresh:
+                return
+            self._building = True
+            self._pending = []
+        threading.Thread(target=self._build, name='suggest-index', daemon=True).start()
+
+    def build_now(self):
+        """Построение индекса в текущем потоке (замеры: подсказки готовы до первого запроса)"""
+        with self._lock:
+            self._pid = os.getpid()
+            self._building = True
+            self._pending = []
+        self._build()
+
+    def _build(self):
+        try:
+            with self.app.app_context():
+                started = time.perf_counter()
+                rows = db.session.execute(
+                    db.select(Post.id, Post.title, Post.created_at).where(Post.is_active == db.true()),
+                    execution_options={'yield_per': 1000}
+                )
+                index = PrefixIndex.build(rows, self.max_terms, self.half_life)
+                db.session.remove()
+                with self._lock:
+                    for change in self._pending:
+                        self._apply(index, *change)
+                    self.index = index
+                logger.info('Индекс подсказок: %s слов за %.2f с', len(index), time.perf_counter() - started)
+        except Exception:
+            logger.exception('Ошибка построения индекса подсказок')
+        finally:
+            with self._lock:
+                self._built_at = time.monotonic()
+                self._building = False
+                self._pending = []
+
+    @staticmethod
+    def _apply(index, post_id, title=None, created_at=None, is_active=False):
+        if is_active:
+            index.add(post_id, title, created_at)
+        else:
+            index.remove(post_id)
+
+    def _change(self, *change):
+        with self._lock:
+            if self._building:
+                self._pending.append(change)
+            index = self.index
+        if index is not None:
+            self._apply(index, *change)
+
+    def post_saved(self, post_id, title, created_at, is_active):
+        """Объявление создано или изменено в этом процессе (после commit)"""
+        self._change(post_id, title, created_at, is_active)
+
+    def post_deleted(self, post_id):
+        self._change(post_id)
+
+    def suggest(self, query, limit=8):
+        """Варианты запроса: последнее слово дополняется словами из заголовков"""
+        index = self.index
+        words = _WORD.findall(normalize(query))
+        if index is None or not words or query[-1:].isspace() or len(words[-1]) < MIN_TERM_LENGTH:
+            return []
+        head = ' '.join(words[:-1])
+        return [f'{head} {term}' if head else term for term in index.suggest(words[-1], limit)]
+
+
+suggestions = SuggestIndex()
@@ -0,0 +1,63 @@
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from flask_migrate import upgrade  # noqa: E402
+from app import create_app  # noqa: E402
+from auth import identity_cache, issue_session_token  # noqa: E402
+from cache import response_cache  # noqa: E402
+from config import Config, engine_options  # noqa: E402
+from models import db, User  # noqa: E402
+from pagination import clear_total_cache  # noqa: E402
+
+
+def make_config(database_uri, upload_folder):
+    """Настройки тестового приложения: отдельная база SQLite, без фоновых потоков и внешних сервисов"""
+
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = database_uri
+        SQLALCHEMY_ENGINE_OPTIONS = engine_options(database_uri)
+        DATABASE_REPLICA_URLS = []
+        SQLALCHEMY_BINDS = {}
+        CACHE_REDIS_URL = None
+        EVENTS_REDIS_URL = None
+        NOTIFICATIONS_ENABLED = False
+        SUGGEST_ENABLED = False
+        ARCHIVE_INTERVAL = 0
+        UPLOAD_FOLDER = upload_folder
+
+    return TestConfig
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    return f'sqlite:///{tmp_path / "board.db"}'
+
+
+@pytest.fixture
+def app(database_url, tmp_path):
+    app = create_app(make_config(database_url, str(tmp_path / 'uploads')))
+    with app.app_context():
+        upgrade(directory=os.path.join(ROOT, 'migrations'))
+    # Кэши - объекты модуля и переживают приложение предыдущего теста
+    response_cache.backend.clear()
+    identity_cache.clear()
+    clear_total_cache()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def auth_headers(app, user_id):
+    """Заголовок Authorization с токеном сессии пользователя"""
+    with app.app_context():
+        return {'Authorization': f'Bearer {issue_session_token(db.session.get(User, user_id))}'}
@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+from archive import archive_posts
+from events import events, POST_DEACTIVATED
+from models import db, User, Post, PostArchive
+from suggest import suggestions, PrefixIndex
+
+
+def test_archived_posts_leave_live_feed_and_suggestions(app, monkeypatch):
+    with app.app_context():
+        user = User(telegram_id=2002, first_name='Автор')
+        db.session.add(user)
+        db.session.flush()
+        now = datetime.utcnow()
+        expired = Post(title='Холодильник', content='Рабочий', category='продажа', contact_info='@author',
+                       user_id=user.id, created_at=now - timedelta(days=61), expires_at=now - timedelta(days=1))
+        current = Post(title='Холст', content='Новый', category='продажа', contact_info='@author',
+                       user_id=user.id, created_at=now, expires_at=now + timedelta(days=60))
+        db.session.add_all([expired, current])
+        db.session.commit()
+        expired_id = expired.id
+        monkeypatch.setattr(suggestions, 'index', PrefixIndex.build(
+            [(post.id, post.title, post.created_at) for post in (expired, current)]))
+        assert sorted(suggestions.suggest('хол')) == ['холодильник', 'холст']
+
+        assert archive_posts(inactive_days=0) == (1, 0)
+
+        assert db.session.get(PostArchive, expired_id) is not None
+        published = [(name, data) for _, name, data in events.log.wait(None, 0)]
+        assert published == [(POST_DEACTIVATED, published[0][1])]
+        assert published[0][1]['id'] == str(expired_id)
+        assert published[0][1]['category'] == 'продажа'
+        assert published[0][1]['is_active'] is False
+        assert suggestions.suggest('хол') == ['холст']
@@ -0,0 +1,45 @@
+from auth import issue_session_token
+from cache import SESSION_COOKIE
+from conftest import auth_headers
+from models import db, User, Post
+
+FORM = {'title': 'Велосипед', 'content': 'Горный', 'category': 'продажа', 'contact_info': '@seller'}
+
+
+def create_user(app):
+    with app.app_context():
+        user = User(telegram_id=3003, first_name='Продавец')
+        db.session.add(user)
+        db.session.commit()
+        return user.id, issue_session_token(user)
+
+
+def post_count(app):
+    with app.app_context():
+        return Post.query.count()
+
+
+def test_session_cookie_does_not_authorize_writes(app, client):
+    user_id, token = create_user(app)
+    client.set_cookie(SESSION_COOKIE, token)
+
+    # Форма чужого сайта: браузер приложит cookie, но не заголовок Authorization
+    response = client.post('/create', data=FORM, content_type='multipart/form-data')
+    assert response.get_json()['success'] is False
+    assert post_count(app) == 0
+
+    response = client.post('/create', data=FORM, content_type='multipart/form-data',
+                           headers=auth_headers(app, user_id))
+    assert response.get_json()['success'] is True
+    assert post_count(app) == 1
+
+
+def test_session_cookie_authorizes_page_views(app, client):
+    user_id, token = create_user(app)
+    client.set_cookie(SESSION_COOKIE, token)
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        user.is_admin = True
+        db.session.commit()
+
+    assert client.get('/admin/reviews').status_code == 200
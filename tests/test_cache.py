@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+from conftest import ROOT
+from models import db, User, Post
+
+# Запись из другого процесса (другой воркер gunicorn со своим кэшем в памяти)
+WRITER = '''
+import sys
+from app import create_app
+from models import db, Post
+
+app = create_app(cli=False)
+with app.app_context():
+    post = db.session.get(Post, __import__('uuid').UUID(sys.argv[1]))
+    post.title = 'Велосипед продан'
+    db.session.add(Post(title='Самокат', content='Почти новый', category='продажа',
+                        contact_info='@seller', user_id=post.user_id))
+    db.session.commit()
+'''
+
+
+def write_in_other_process(database_url, post_id):
+    env = dict(os.environ, DATABASE_URL=database_url, ARCHIVE_INTERVAL='0', SUGGEST_ENABLED='0',
+               NOTIFICATIONS_ENABLED='0', CACHE_REDIS_URL='', EVENTS_REDIS_URL='', DATABASE_REPLICA_URLS='')
+    subprocess.run([sys.executable, '-c', WRITER, str(post_id)], cwd=ROOT, env=env, check=True)
+
+
+def create_post(app):
+    with app.app_context():
+        user = User(telegram_id=1001, first_name='Продавец')
+        db.session.add(user)
+        db.session.flush()
+        post = Post(title='Велосипед', content='Горный', category='продажа', contact_info='@seller', user_id=user.id)
+        db.session.add(post)
+        db.session.commit()
+        return post.id
+
+
+def test_api_posts_fresh_after_write_in_other_process(app, client, database_url):
+    create_post(app)
+    first = client.get('/api/posts')
+    assert first.status_code == 200
+    assert [post['title'] for post in first.get_json()['posts']] == ['Велосипед']
+    assert client.get('/api/posts', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    write_in_other_process(database_url, first.get_json()['posts'][0]['id'])
+
+    # Старый ответ остался в кэше этого процесса, но не отдается ни с новым ETag, ни без валидаторов
+    fresh = client.get('/api/posts', headers={'If-None-Match': first.headers['ETag']})
+    assert fresh.status_code == 200
+    assert fresh.headers['ETag'] != first.headers['ETag']
+    assert sorted(post['title'] for post in fresh.get_json()['posts']) == ['Велосипед продан', 'Самокат']
+    assert client.get('/api/posts').get_data() == fresh.get_data()
+    assert client.get('/api/posts', headers={'If-None-Match': fresh.headers['ETag']}).status_code == 304
+
+
+def test_post_detail_fresh_after_write_in_other_process(app, client, database_url):
+    post_id = create_post(app)
+    first = client.get(f'/post/{post_id}')
+    assert first.status_code == 200
+    assert 'Велосипед' in first.get_data(as_text=True)
+
+    write_in_other_process(database_url, post_id)
+
+    fresh = client.get(f'/post/{post_id}', headers={'If-None-Match': first.headers['ETag']})
+    assert fresh.status_code == 200
+    assert fresh.headers['ETag'] != first.headers['ETag']
+    assert 'Велосипед продан' in fresh.get_data(as_text=True)
@@ -0,0 +1,49 @@
+import json
+from conftest import auth_headers
+from events import events, POST_UPDATED
+from models import db, User, Post
+
+
+def read_stream(client, category, last_event_id):
+    """События потока ?category= после last_event_id (поток закрывается по SSE_MAX_DURATION)"""
+    response = client.get(f'/api/posts/stream?category={category}', headers={'Last-Event-ID': last_event_id})
+    received = []
+    for block in response.get_data(as_text=True).split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if ': ' in line)
+        if 'event' in fields:
+            received.append((fields['event'], json.loads(fields['data'])))
+    return received
+
+
+def test_category_change_reaches_old_and_new_category_streams(app, client, monkeypatch):
+    monkeypatch.setattr(events, 'max_duration', 0.2)
+    monkeypatch.setattr(events, 'heartbeat', 0.05)
+    with app.app_context():
+        user = User(telegram_id=4004, first_name='Продавец')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+    headers = auth_headers(app, user_id)
+
+    response = client.post('/create', json={'title': 'Велосипед', 'content': 'Горный', 'category': 'продажа',
+                                            'contact_info': '@seller'}, headers=headers)
+    assert response.get_json()['success'] is True
+    created = events.log.last_id
+    with app.app_context():
+        post_id = str(Post.query.one().id)
+
+    response = client.put(f'/api/post/{post_id}', json={'category': 'даром'}, headers=headers)
+    assert response.get_json()['success'] is True
+
+    old = read_stream(client, 'продажа', created)
+    assert [(name, data['id'], data['category'], data['previous_category']) for name, data in old] == [
+        (POST_UPDATED, post_id, 'даром', 'продажа')]
+    assert [name for name, _ in read_stream(client, 'даром', created)] == [POST_UPDATED]
+    assert read_stream(client, 'услуги', created) == []
+
+    # Правка без смены категории прежнюю категорию не упоминает
+    marker = events.log.last_id
+    client.put(f'/api/post/{post_id}', json={'title': 'Велосипед горный'}, headers=headers)
+    assert read_stream(client, 'продажа', marker) == []
+    [(name, data)] = read_stream(client, 'даром', marker)
+    assert name == POST_UPDATED and 'previous_category' not in data
@@ -0,0 +1,50 @@
+import os
+import uuid
+import pytest
+from flask_migrate import upgrade
+from app import create_app
+from conftest import ROOT, make_config
+from models import db, User
+
+MIGRATIONS = os.path.join(ROOT, 'migrations')
+RATING_COLUMNS = ['rating_sum', 'rating_count', 'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5']
+
+
+def create_all_database(with_ratings):
+    """База, как ее оставили версии до миграций: таблицы из db.create_all(), без alembic_version.
+
+    with_ratings=True - версии с агрегатами рейтинга на User (create_all уже добавил колонки,
+    но значения в них не сходятся с отзывами).
+    """
+    upgrade(directory=MIGRATIONS, revision='3c1f8a2b9d10')
+    connection = db.session.connection()
+    connection.exec_driver_sql('DROP TABLE alembic_version')
+    if with_ratings:
+        for name in RATING_COLUMNS:
+            connection.exec_driver_sql(f'ALTER TABLE user ADD COLUMN {name} INTEGER NOT NULL DEFAULT 0')
+    connection.exec_driver_sql("INSERT INTO user (id, telegram_id, first_name) VALUES (1, 5001, 'Продавец'), "
+                               "(2, 5002, 'Покупатель'), (3, 5003, 'Покупатель')")
+    post_id = str(uuid.uuid4())
+    connection.exec_driver_sql(
+        "INSERT INTO post (id, title, content, category, user_id, is_active) "
+        f"VALUES ('{post_id}', 'Велосипед', 'Горный', 'продажа', 1, 1)")
+    connection.exec_driver_sql(
+        "INSERT INTO review (rating, is_approved, buyer_id, seller_id, post_id) "
+        f"VALUES (5, 1, 2, 1, '{post_id}'), (2, 1, 3, 1, '{post_id}')")
+    db.session.commit()
+
+
+@pytest.mark.parametrize('with_ratings', [False, True], ids=['before-ratings', 'create-all-ratings'])
+def test_upgrade_from_create_all_database_backfills_ratings(database_url, tmp_path, with_ratings):
+    app = create_app(make_config(database_url, str(tmp_path / 'uploads')))
+    with app.app_context():
+        create_all_database(with_ratings)
+
+        upgrade(directory=MIGRATIONS)
+
+        seller = db.session.get(User, 1)
+        assert (seller.rating_sum, seller.rating_count) == (7, 2)
+        assert (seller.rating_2, seller.rating_5) == (1, 1)
+        assert seller.average_rating == 3.5
+        assert db.session.get(User, 2).rating_count == 0
+        db.engine.dispose()
@@ -0,0 +1,47 @@
+import pytest
+import benchmark
+from cache import response_cache
+from conftest import auth_headers
+from models import db, User, Post, Review
+
+
+@pytest.fixture
+def seeded(app):
+    """Доска с объявлениями и отзывами; самый активный автор - администратор"""
+    with app.app_context():
+        benchmark.seed(users=40, posts=300, reviews=400)
+        author = db.session.execute(
+            db.select(Post.user_id).group_by(Post.user_id).order_by(db.func.count().desc()).limit(1)
+        ).scalar_one()
+        user = db.session.get(User, author)
+        user.is_admin = True
+        db.session.commit()
+        pending = Review.query.filter_by(is_approved=False).count()
+        own_posts = Post.query.filter_by(user_id=author).count()
+        assert pending > 50 and own_posts > 50
+        return user.id, user.telegram_id
+
+
+def count_statements(app, client, url, headers=None):
+    with app.app_context():
+        engines = list(db.engines.values())
+    with benchmark.StatementCounter(*engines) as counter:
+        response = benchmark.isolated_get(app, client, url, headers)
+    assert response.status_code == 200, url
+    return counter.count
+
+
+@pytest.mark.parametrize('path', ['/', '/my_posts', '/admin/reviews', '/api/posts', '/api/user/{telegram_id}/posts'])
+def test_statement_count_does_not_grow_with_page_size(app, client, seeded, monkeypatch, path):
+    # Кэш ответов скрыл бы запросы маршрута
+    monkeypatch.setattr(response_cache, 'enabled', False)
+    user_id, telegram_id = seeded
+    headers = auth_headers(app, user_id)
+    url = path.format(telegram_id=telegram_id)
+    separator = '&' if '?' in url else '?'
+
+    # Первый запрос заполняет кэши процесса (пользователь сессии, число объявлений)
+    count_statements(app, client, url, headers)
+    small = count_statements(app, client, f'{url}{separator}per_page=5', headers)
+    large = count_statements(app, client, f'{url}{separator}per_page=50', headers)
+    assert small == large
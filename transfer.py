@@ -0,0 +1,203 @@
+import csv
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+from itertools import groupby, islice
+from models import db, User, Post, Review, PostArchive, ReviewArchive, CategoryCounter, insert_on_conflict
+from ids import UUIDType
+from prices import parse_price
+from cache import response_cache
+from pagination import clear_total_cache
+
+# Порядок важен: пользователи, затем объявления, затем ссылающиеся на них отзывы
+TABLES = [User.__table__, Post.__table__, Review.__table__]
+# Архивные строки выгружаются вместе с рабочими: при загрузке они попадают в рабочие
+# таблицы, и архивация переносит их обратно по expires_at. Так рейтинги сходятся,
+# а id архивных отзывов не пересекаются с новыми id отзывов
+ARCHIVES = {'post': PostArchive.__table__, 'review': ReviewArchive.__table__}
+# Агрегаты рейтинга не переносятся: после импорта они пересчитываются по отзывам
+RATING_COLUMNS = {'rating_sum', 'rating_count'} | {f'rating_{stars}' for stars in range(1, 6)}
+# Уникальные ключи, по которым повторно загружаемые строки пропускаются
+CONFLICT_COLUMNS = {'user': ['telegram_id'], 'post': ['id'], 'review': ['buyer_id', 'post_id']}
+
+
+def _dump_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _load_value(column, value):
+    if value is None:
+        return None
+    column_type = column.type
+    if isinstance(column_type, db.DateTime):
+        return datetime.fromisoformat(value)
+    if isinstance(column_type, db.Boolean):
+        return value if isinstance(value, bool) else value.lower() in ('1', 'true')
+    if isinstance(column_type, db.Integer):
+        return int(value)
+    if isinstance(column_type, UUIDType):
+        return uuid.UUID(value)
+    return value
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+# ЭКСПОРТ
+def iter_rows(table, batch_size=1000):
+    """Строки таблицы (и ее архива) словарями; yield_per читает их серверным курсором пачками"""
+    names = [column.name for column in table.columns]
+    sources = [table] + ([ARCHIVES[table.name]] if table.name in ARCHIVES else [])
+    for source in sources:
+        statement = db.select(*[source.c[name] for name in names]).order_by(*source.primary_key.columns)
+        result = db.session.execute(statement, execution_options={'yield_per': batch_size})
+        for row in result.mappings():
+            yield {name: _dump_value(value) for name, value in row.items()}
+
+
+def export_ndjson(stream, batch_size=1000):
+    """Выгрузка в NDJSON: строка {"table": ..., "row": {...}} на запись. Возвращает {таблица: строк}"""
+    counts = {}
+    for table in TABLES:
+        counts[table.name] = 0
+        for row in iter_rows(table, batch_size):
+            stream.write(json.dumps({'table': table.name, 'row': row}, ensure_ascii=False) + '\n')
+            counts[table.name] += 1
+    return counts
+
+
+def export_csv(directory, batch_size=1000):
+    """Выгрузка в каталог: файл <таблица>.csv на таблицу. Возвращает {таблица: строк}"""
+    os.makedirs(directory, exist_ok=True)
+    counts = {}
+    for table in TABLES:
+        counts[table.name] = 0
+        with open(os.path.join(directory, f'{table.name}.csv'), 'w', newline='', encoding='utf-8') as file:
+            writer = csv.DictWriter(file, fieldnames=[column.name for column in table.columns])
+            writer.writeheader()
+            for row in iter_rows(table, batch_size):
+                writer.writerow({name: _csv_value(value) for name, value in row.items()})
+                counts[table.name] += 1
+    return counts
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return value
+
+
+# ИМПОРТ
+def read_ndjson(stream):
+    """Записи (таблица, строка) из NDJSON"""
+    for line in stream:
+        if line.strip():
+            record = json.loads(line)
+            yield record['table'], record['row']
+
+
+def read_csv(directory):
+    """Записи (таблица, строка) из каталога CSV; пустое поле - NULL для необязательных колонок"""
+    for table in TABLES:
+        path = os.path.join(directory, f'{table.name}.csv')
+        if not os.path.exists(path):
+            continue
+        nullable = {column.name for column in table.columns if column.nullable}
+        with open(path, newline='', encoding='utf-8') as file:
+            for row in csv.DictReader(file):
+                yield table.name, {name: None if value == '' and name in nullable else value
+                                   for name, value in row.items()}
+
+
+class Importer:
+    """Пакетная загрузка записей экспорта в текущую базу.
+
+    Пользователи сопоставляются по telegram_id (существующие не меняются),
+    id объявлений (UUID) сохраняются, отзывы получают новые id. Каждая
+    пачка - один executemany и отдельная транзакция; повторный импорт
+    того же файла ничего не дублирует (ON CONFLICT DO NOTHING).
+    """
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.user_ids = {}          # id в файле -> id в базе
+        self.skipped_posts = set()  # объявления без автора в базе: их отзывы тоже пропускаются
+        self.stats = {}
+
+    def run(self, records):
+        tables = {table.name: table for table in TABLES}
+        for name, rows in groupby(records, key=lambda record: record[0]):
+            table = tables[name]
+            stats = self.stats.setdefault(name, {'rows': 0, 'skipped': 0, 'seconds': 0.0})
+            started = time.perf_counter()
+            for chunk in _chunks((row for _, row in rows), self.batch_size):
+                batch = [self._prepare(table, row) for row in chunk]
+                values = [row for row in batch if row is not None]
+                stats['skipped'] += len(batch) - len(values)
+                if values:
+                    self._insert(table, chunk, values)
+                stats['rows'] += len(chunk)
+                db.session.commit()
+            stats['seconds'] += time.perf_counter() - started
+
+        for chunk in _chunks(set(self.user_ids.values()), 500):
+            User.rebuild_ratings(chunk)
+        CategoryCounter.reconcile()
+        db.session.commit()
+        response_cache.invalidate()
+        clear_total_cache()
+        return self.stats
+
+    def _prepare(self, table, row):
+        """Строка для вставки с id, переведенными в id этой базы (None - пропустить)"""
+        values = {column.name: _load_value(column, row.get(column.name))
+                  for column in table.columns if column.name in row}
+        if table is User.__table__:
+            return {name: value for name, value in values.items()
+                    if name != 'id' and name not in RATING_COLUMNS}
+
+        if table is Post.__table__:
+            if 'price_amount' not in row:
+                # Выгрузка до появления разобранной цены
+                values['price_amount'], values['price_currency'] = parse_price(values.get('price'))
+            values['user_id'] = self.user_ids.get(values['user_id'])
+            if values['user_id'] is None:
+                self.skipped_posts.add(values['id'])
+                return None
+            return values
+
+        values.pop('id', None)
+        values['buyer_id'] = self.user_ids.get(values['buyer_id'])
+        values['seller_id'] = self.user_ids.get(values['seller_id'])
+        values['moderated_by'] = self.user_ids.get(values.get('moderated_by'))
+        if values['buyer_id'] is None or values['seller_id'] is None or values['post_id'] in self.skipped_posts:
+            return None
+        return values
+
+    def _insert(self, table, rows, values):
+        statement = insert_on_conflict(table).on_conflict_do_nothing(index_elements=CONFLICT_COLUMNS[table.name])
+        db.session.execute(statement, values)
+
+        if table is User.__table__:
+            telegram_ids = [value['telegram_id'] for value in values]
+            existing = dict(db.session.execute(
+                db.select(table.c.telegram_id, table.c.id).where(table.c.telegram_id.in_(telegram_ids))
+            ).all())
+            for row in rows:
+                self.user_ids[int(row['id'])] = existing[int(row['telegram_id'])]
+
+
+def import_data(records, batch_size=1000):
+    """Загрузка записей (таблица, строка); {таблица: {'rows', 'skipped', 'seconds'}}"""
+    return Importer(batch_size).run(records)
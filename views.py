@@ -0,0 +1,805 @@
+from flask import Blueprint, current_app, render_template, request, jsonify, redirect, url_for, abort, send_file
+from models import db, User, Post, Review, PostArchive, ReviewArchive, CategoryCounter, insert_on_conflict
+from serializers import (with_authors, parse_fields, serialize_post, serialize_posts,
+                         LIST_FIELDS, DETAIL_FIELDS, USER_POST_FIELDS)
+from pagination import paginate_request, page_meta
+from queries import (latest_posts, active_posts, post_by_id, post_reviews, buyer_review, user_by_telegram_id,
+                     user_posts, seller_reviews, pending_reviews, apply_price_filter, build_search_query)
+from cache import response_cache
+from conditional import conditional
+from notifications import notifications
+from metrics import metrics
+from images import images, ImageError
+from assets import assets
+from archive import expiry_for
+from events import events, post_event, POST_CREATED, POST_UPDATED, POST_DEACTIVATED
+from suggest import suggestions
+from prices import DEFAULT_CURRENCY
+from ids import parse_uuid
+from auth import (current_identity, identity_cache, issue_session_token, resolve_user,
+                  validate_init_data, TelegramAuthError, SESSION_COOKIE)
+from sqlalchemy.orm import joinedload
+from datetime import datetime
+import hmac
+
+bp = Blueprint('main', __name__)
+
+# Максимум отзывов в одном запросе массовой модерации
+MODERATION_BATCH_LIMIT = 500
+# Срок кэширования файлов, URL которых меняется вместе с содержимым (год)
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+def price_filter():
+    """Параметры фильтра и сортировки по цене из запроса (только заданные, для ссылок пагинации)"""
+    options = {}
+    for name in ('min_price', 'max_price'):
+        value = request.args.get(name, type=int)
+        if value is not None and value >= 0:
+            options[name] = value
+    if request.args.get('sort') in ('price_asc', 'price_desc'):
+        options['sort'] = request.args['sort']
+    if options:
+        options['currency'] = (request.args.get('currency') or DEFAULT_CURRENCY).upper()[:3]
+    return options
+
+
+def get_current_user():
+    """Текущий пользователь по подписанному токену сессии (Identity или None)"""
+    return current_identity()
+
+
+def is_user_admin(user):
+    """Проверка, является ли пользователь администратором"""
+    return user and user.is_admin
+
+
+@bp.route('/')
+@response_cache.cached
+def index():
+    """Главная страница с последними объявлениями"""
+    posts = latest_posts().all()
+    return render_template('index.html', posts=posts, categories=Post.CATEGORIES)
+
+
+@bp.route('/posts')
+@response_cache.cached
+def posts():
+    """Страница со всеми объявлениями с пагинацией"""
+    category = request.args.get('category', '')
+
+    prices = price_filter()
+
+    query = active_posts(category)
+
+    posts_pagination = paginate_request(apply_price_filter(query, prices),
+                                        total_key=('posts', category, *sorted(prices.items())),
+                                        keyset='sort' not in prices)
+
+    return render_template('posts.html',
+                           posts=posts_pagination,
+                           categories=Post.CATEGORIES,
+                           current_category=category,
+                           price_filter=prices)
+
+
+@bp.route('/post/<uuid:post_id>')
+@conditional(per_user=True)
+@response_cache.cached(anonymous_only=True)
+def post_detail(post_id):
+    """Страница детального просмотра объявления"""
+    post = post_by_id(post_id).first_or_404()
+
+    # Если пост неактивен, показываем 404 (кроме автора)
+    if not post.is_active:
+        current_user = get_current_user()
+        if not current_user or current_user.id != post.user_id:
+            return render_template('404.html'), 404
+
+    # Получаем только одобренные отзывы
+    reviews = post_reviews(post_id).all()
+
+    # Проверяем, может ли текущий пользователь оставить отзыв
+    can_review = False
+    current_user = get_current_user()
+
+    if current_user and current_user.id != post.user_id:
+        # Проверяем, не оставлял ли уже пользователь отзыв на это объявление
+        existing_review = buyer_review(post_id, current_user.id).first()
+        can_review = not existing_review
+
+    return render_template('post_detail.html',
+                           post=post,
+                           reviews=reviews,
+                           can_review=can_review,
+                           current_user=current_user)
+
+
+def request_data():
+    """Поля запроса: JSON или multipart/form-data (когда прикреплено изображение)"""
+    if request.mimetype == 'multipart/form-data':
+        return request.form
+    return request.get_json(silent=True) or {}
+
+
+def parse_bool(value):
+    """Флаг из JSON (true/false) или из поля формы ('1', 'true', 'on')"""
+    if isinstance(value, str):
+        return value.lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+
+
+@bp.route('/create', methods=['GET', 'POST'])
+def create_post():
+    """Создание нового объявления"""
+    if request.method == 'POST':
+        try:
+            # Пользователь подтвержден подписью Telegram при входе
+            user = get_current_user()
+
+            if not user:
+                return jsonify({
+                    'success': False,
+                    'error': 'Данные пользователя не найдены. Пожалуйста, откройте приложение через Telegram.'
+                })
+
+            # Валидация обязательных полей
+            data = request_data()
+            required_fields = ['title', 'content', 'category', 'contact_info']
+            for field in required_fields:
+                if not data.get(field):
+                    return jsonify({
+                        'success': False,
+                        'error': f'Поле "{field}" обязательно для заполнения'
+                    })
+
+            # Создаем объявление
+            post = Post(
+                title=data['title'].strip(),
+                content=data['content'].strip(),
+                category=data['category'],
+                price=(data.get('price') or '').strip(),
+                contact_info=data['contact_info'].strip(),
+                user_id=user.id
+            )
+            post.expires_at = expiry_for(post.category)
+
+            image = request.files.get('image')
+            if image and image.filename:
+                post.image_key = images.save(image)
+
+            db.session.add(post)
+            db.session.flush()
+            CategoryCounter.adjust(post.category, post.created_at, 1)
+            event = post_event(post)
+            indexed = (post.id, post.title, post.created_at, post.is_active)
+            db.session.commit()
+            response_cache.invalidate()
+            events.publish(POST_CREATED, event)
+            suggestions.post_saved(*indexed)
+
+            return jsonify({
+                'success': True,
+                'post_id': event['id'],
+                'message': 'Объявление успешно опубликовано!'
+            })
+
+        except ImageError as e:
+            return jsonify({'success': False, 'error': str(e)})
+
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.exception('Ошибка при создании объявления')
+            return jsonify({
+                'success': False,
+                'error': f'Ошибка при создании объявления: {str(e)}'
+            })
+
+    return render_template('create_post.html', categories=Post.CATEGORIES)
+
+
+# CRUD ОПЕРАЦИИ ДЛЯ ОБЪЯВЛЕНИЙ
+@bp.route('/api/post/<uuid:post_id>', methods=['GET', 'PUT', 'DELETE'])
+@conditional(per_user=True)
+def manage_post(post_id):
+    """CRUD операции для объявлений"""
+
+    if request.method == 'GET':
+        """Получение информации об объявлении"""
+        post = with_authors(Post.query).filter_by(id=post_id).first_or_404()
+
+        # Проверяем доступ (активно или автор)
+        current_user = get_current_user()
+        if not post.is_active and (not current_user or current_user.id != post.user_id):
+            return jsonify({'success': False, 'error': 'Объявление не найдено'}), 404
+
+        return jsonify({
+            'success': True,
+            'post': serialize_post(post, parse_fields(request.args, DETAIL_FIELDS))
+        })
+
+    elif request.method == 'PUT':
+        """Обновление объявления"""
+        try:
+            data = request_data()
+            # Блокировка строки: счетчики категорий меняются от зафиксированного состояния
+            post = Post.query.filter_by(id=post_id).with_for_update().first_or_404()
+
+            # Проверка прав
+            current_user = get_current_user()
+            if not current_user or current_user.id != post.user_id:
+                return jsonify({'success': False, 'error': 'Нет прав для редактирования этого объявления'})
+            counted = (post.category, bool(post.is_active))
+
+            # Обновление полей
+            if 'title' in data:
+                post.title = data['title'].strip()
+            if 'content' in data:
+                post.content = data['content'].strip()
+            if 'category' in data and data['category'] != post.category:
+                post.category = data['category']
+                post.expires_at = expiry_for(post.category, post.created_at)
+            if 'price' in data:
+                post.price = data['price'].strip() if data['price'] else None
+            if 'contact_info' in data:
+                post.contact_info = data['contact_info'].strip()
+            if 'is_active' in data:
+                post.is_active = parse_bool(data['is_active'])
+            image = request.files.get('image')
+            if image and image.filename:
+                post.image_key = images.save(image)
+            elif parse_bool(data.get('remove_image')):
+                post.image_key = None
+
+            if (post.category, bool(post.is_active)) != counted:
+                if counted[1]:
+                    CategoryCounter.adjust(counted[0], post.created_at, -1)
+                if post.is_active:
+                    CategoryCounter.adjust(post.category, post.created_at, 1)
+            db.session.flush()
+            event = post_event(post)
+            if post.category != counted[0]:
+                # Подписчики прежней категории тоже получают событие и убирают объявление
+                event['previous_category'] = counted[0]
+            indexed = (post.id, post.title, post.created_at, post.is_active)
+            db.session.commit()
+            response_cache.invalidate()
+            # Снятое объявление подписчики убирают из ленты
+            events.publish(POST_UPDATED if event['is_active'] else POST_DEACTIVATED, event)
+            suggestions.post_saved(*indexed)
+
+            return jsonify({
+                'success': True,
+                'message': 'Объявление успешно обновлено',
+                'post_id': event['id']
+            })
+
+        except ImageError as e:
+            db.session.rollback()
+            return jsonify({'success': False, 'error': str(e)})
+
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'success': False, 'error': f'Ошибка при обновлении: {str(e)}'})
+
+    elif request.method == 'DELETE':
+        """Удаление объявления"""
+        try:
+            post = Post.query.filter_by(id=post_id).with_for_update().first_or_404()
+
+            # Проверка прав
+            current_user = get_current_user()
+            if not current_user or current_user.id != post.user_id:
+                return jsonify({'success': False, 'error': 'Нет прав для удаления этого объявления'})
+
+            # Отзывы удаляются вместе с объявлением - убираем их из рейтинга продавца
+            approved_ratings = db.session.query(Review.rating, db.func.count(Review.id)).filter_by(
+                post_id=post.id, is_approved=True
+            ).group_by(Review.rating).all()
+            for rating, count in approved_ratings:
+                User.adjust_rating(post.user_id, rating, -count)
+
+            if post.is_active:
+                CategoryCounter.adjust(post.category, post.created_at, -1)
+            event = dict(post_event(post), is_active=False)
+            db.session.delete(post)
+            db.session.commit()
+            response_cache.invalidate()
+            events.publish(POST_DEACTIVATED, event)
+            suggestions.post_deleted(post_id)
+
+            return jsonify({'success': True, 'message': 'Объявление успешно удалено'})
+
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'success': False, 'error': f'Ошибка при удалении: {str(e)}'})
+
+
+# АВТОРИЗАЦИЯ ЧЕРЕЗ TELEGRAM
+@bp.route('/api/auth/telegram', methods=['POST'])
+def auth_telegram():
+    """Обмен подписанных initData Telegram WebApp на токен сессии"""
+    bot_token = current_app.config.get('TELEGRAM_BOT_TOKEN')
+    if not bot_token:
+        return jsonify({'success': False, 'error': 'Авторизация через Telegram не настроена'}), 503
+
+    data = request.get_json(silent=True) or {}
+    try:
+        user_data = validate_init_data(data.get('init_data'), bot_token, current_app.config['TELEGRAM_INIT_DATA_MAX_AGE'])
+    except TelegramAuthError as e:
+        return jsonify({'success': False, 'error': str(e)}), 401
+
+    # Находим или создаем пользователя, обновляя данные профиля из Telegram
+    user = resolve_user(user_data)
+    # До commit: после него атрибуты user истекли бы и перечитывались из базы
+    identity = identity_cache.remember(user)
+    token = issue_session_token(user)
+    db.session.commit()
+    max_age = current_app.config['SESSION_TOKEN_MAX_AGE']
+
+    response = jsonify({
+        'success': True,
+        'token': token,
+        'expires_in': max_age,
+        'user': identity._asdict()
+    })
+    # Cookie - для переходов по страницам; запросы на изменение ею не подтверждаются (см. request_session_token)
+    response.set_cookie(SESSION_COOKIE, token, max_age=max_age, httponly=True,
+                        secure=request.is_secure, samesite='None' if request.is_secure else 'Lax')
+    return response
+
+
+# СИСТЕМА ОТЗЫВОВ И МОДЕРАЦИИ
+@bp.route('/api/review', methods=['POST'])
+def add_review():
+    """Добавление отзыва к объявлению (с модерацией)"""
+    try:
+        data = request.json
+
+        post_id = parse_uuid(data.get('post_id'))
+        rating = data.get('rating')
+        comment = data.get('comment', '').strip()
+        buyer = get_current_user()
+
+        if not buyer:
+            return jsonify({
+                'success': False,
+                'error': 'Необходима авторизация через Telegram'
+            })
+
+        # Проверяем обязательные поля
+        if not all([post_id, rating]):
+            return jsonify({
+                'success': False,
+                'error': 'Заполните все обязательные поля'
+            })
+
+        # Проверяем корректность рейтинга
+        if not (1 <= int(rating) <= 5):
+            return jsonify({
+                'success': False,
+                'error': 'Рейтинг должен быть от 1 до 5'
+            })
+
+        # Проверяем, существует ли объявление
+        post = db.session.execute(db.select(Post.user_id, Post.title).where(Post.id == post_id)).first()
+        if not post:
+            return jsonify({
+                'success': False,
+                'error': 'Объявление не найдено'
+            })
+
+        # Нельзя оставлять отзыв на свое объявление
+        if buyer.id == post.user_id:
+            return jsonify({
+                'success': False,
+                'error': 'Нельзя оставлять отзыв на свое объявление'
+            })
+
+        # Создаем отзыв (не одобрен, требует модерации; в рейтинг продавца пока не входит).
+        # Повторный отзыв отсекает ограничение unique_review_per_buyer_post: строка не вставится
+        statement = insert_on_conflict(Review).values(
+            rating=int(rating),
+            comment=comment,
+            buyer_id=buyer.id,
+            seller_id=post.user_id,
+            post_id=post_id,
+            is_approved=False
+        ).on_conflict_do_nothing(index_elements=[Review.buyer_id, Review.post_id]).returning(Review.id)
+        review_id = db.session.scalar(statement)
+
+        if review_id is None:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'error': 'Вы уже оставляли отзыв на это объявление'
+            })
+        db.session.commit()
+
+        notifications.notify_admins(
+            f'📝 Новый отзыв на модерации: {int(rating)}★ к объявлению «{post.title}»'
+        )
+
+        return jsonify({
+            'success': True,
+            'message': 'Отзыв отправлен на модерацию! Он появится после проверки администратором.',
+            'review_id': review_id,
+            'needs_moderation': True
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.exception('Ошибка при добавлении отзыва')
+        return jsonify({
+            'success': False,
+            'error': f'Ошибка при добавлении отзыва: {str(e)}'
+        })
+
+
+def moderate_reviews(review_ids, action, moderator):
+    """Одобрение или отклонение отзывов одним UPDATE/DELETE в текущей транзакции (без commit).
+
+    Возвращает число обработанных отзывов и только что одобренные отзывы
+    (для уведомления продавцов).
+    """
+    if action not in ('approve', 'reject'):
+        raise ValueError('Неверное действие')
+
+    rows = db.session.execute(
+        db.select(Review.id, Review.seller_id, Review.rating, Review.is_approved, Post.title)
+        .join(Post, Review.post_id == Post.id)
+        .where(Review.id.in_(review_ids))
+        .with_for_update(of=Review)
+    ).all()
+    ids = [row.id for row in rows]
+    if not ids:
+        return 0, []
+
+    if action == 'approve':
+        approved_now = [row for row in rows if not row.is_approved]
+        changed_sellers = {row.seller_id for row in approved_now}
+        statement = db.update(Review).where(Review.id.in_(ids)).values(
+            is_approved=True, moderated_by=moderator.id, moderated_at=datetime.utcnow())
+    else:
+        approved_now = []
+        changed_sellers = {row.seller_id for row in rows if row.is_approved}
+        statement = db.delete(Review).where(Review.id.in_(ids))
+    db.session.execute(statement.execution_options(synchronize_session=False))
+
+    if changed_sellers:
+        User.rebuild_ratings(changed_sellers)
+    return len(ids), approved_now
+
+
+def notify_sellers(approved_reviews):
+    for review in approved_reviews:
+        notifications.notify(
+            review.seller_id,
+            f'⭐ О вас опубликован новый отзыв: {review.rating}★ к объявлению «{review.title}»'
+        )
+
+
+@bp.route('/api/review/<review_id>/moderate', methods=['POST'])
+def moderate_review(review_id):
+    """Модерация отзыва администратором"""
+    try:
+        data = request.json
+        action = data.get('action')  # 'approve' или 'reject'
+
+        review = Review.query.get_or_404(review_id)
+        moderator = get_current_user()
+
+        if not moderator or not moderator.is_admin:
+            return jsonify({'success': False, 'error': 'Требуются права администратора'})
+
+        _, approved_now = moderate_reviews([review.id], action, moderator)
+        db.session.commit()
+        response_cache.invalidate()
+        notify_sellers(approved_now)
+
+        message = 'Отзыв одобрен и опубликован' if action == 'approve' else 'Отзыв отклонен и удален'
+        return jsonify({'success': True, 'message': message})
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)})
+
+
+@bp.route('/api/reviews/moderate', methods=['POST'])
+def moderate_reviews_batch():
+    """Массовая модерация: {"action": "approve" | "reject", "review_ids": [...]}"""
+    moderator = get_current_user()
+    if not moderator or not moderator.is_admin:
+        return jsonify({'success': False, 'error': 'Требуются права администратора'}), 403
+
+    data = request.get_json(silent=True) or {}
+    review_ids = data.get('review_ids')
+    if (not isinstance(review_ids, list) or not review_ids
+            or not all(isinstance(review_id, int) and not isinstance(review_id, bool) for review_id in review_ids)):
+        return jsonify({'success': False, 'error': 'Укажите список id отзывов'}), 400
+    review_ids = set(review_ids)
+    if len(review_ids) > MODERATION_BATCH_LIMIT:
+        return jsonify({'success': False, 'error': f'Не более {MODERATION_BATCH_LIMIT} отзывов за раз'}), 400
+
+    try:
+        processed, approved_now = moderate_reviews(review_ids, data.get('action'), moderator)
+        db.session.commit()
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    if processed:
+        response_cache.invalidate()
+    notify_sellers(approved_now)
+    return jsonify({'success': True, 'processed': processed, 'missing': len(review_ids) - processed})
+
+
+@bp.route('/admin/reviews')
+def admin_reviews():
+    """Страница модерации отзывов для администратора"""
+    # Проверка прав администратора
+    current_user = get_current_user()
+    if not current_user or not current_user.is_admin:
+        return render_template('403.html'), 403
+
+    pending = pending_reviews()
+    page = paginate_request(
+        pending.options(joinedload(Review.buyer), joinedload(Review.seller), joinedload(Review.post)),
+        per_page=50,
+        model=Review
+    )
+    return render_template('admin_reviews.html', reviews=page.items, pagination=page,
+                           pending_count=pending.count())
+
+
+@bp.route('/api/reviews/approved')
+def get_approved_reviews():
+    """Получение только одобренных отзывов"""
+    post_id = request.args.get('post_id')
+    user_id = request.args.get('user_id')
+
+    query = Review.query.filter_by(is_approved=True)
+
+    if post_id:
+        query = query.filter_by(post_id=parse_uuid(post_id))
+    elif user_id:
+        user = user_by_telegram_id(user_id).first()
+        if user:
+            query = query.filter_by(seller_id=user.id)
+
+    reviews = query.order_by(Review.created_at.desc()).all()
+
+    reviews_data = []
+    for review in reviews:
+        reviews_data.append({
+            'id': review.id,
+            'rating': review.rating,
+            'comment': review.comment,
+            'created_at': review.created_at.strftime('%d.%m.%Y'),
+            'buyer_name': review.buyer.first_name,
+            'buyer_username': f"@{review.buyer.username}" if review.buyer.username else None,
+            'post_title': review.post.title,
+            'is_approved': review.is_approved
+        })
+
+    return jsonify({'reviews': reviews_data})
+
+
+# API ДЛЯ ПОЛЬЗОВАТЕЛЕЙ
+@bp.route('/api/user/<telegram_id>/reviews')
+def get_user_reviews(telegram_id):
+    """Получение отзывов пользователя (только одобренные; ?archived=1 - к архивным объявлениям)"""
+    user = user_by_telegram_id(telegram_id).first()
+    if not user:
+        return jsonify({'reviews': []})
+
+    model = ReviewArchive if parse_bool(request.args.get('archived', '')) else Review
+    reviews = seller_reviews(user.id, model).all()
+
+    reviews_data = []
+    for review in reviews:
+        reviews_data.append({
+            'id': review.id,
+            'rating': review.rating,
+            'comment': review.comment,
+            'created_at': review.created_at.strftime('%d.%m.%Y'),
+            'buyer_name': review.buyer.first_name,
+            'buyer_username': f"@{review.buyer.username}" if review.buyer.username else None,
+            'post_title': review.post.title
+        })
+
+    return jsonify({
+        'reviews': reviews_data,
+        'average_rating': user.average_rating,
+        'total_reviews': user.reviews_count
+    })
+
+
+@bp.route('/api/user/<telegram_id>/posts')
+@conditional
+def get_user_posts(telegram_id):
+    """Получение объявлений пользователя (?archived=1 - архивных)"""
+    user = user_by_telegram_id(telegram_id).first()
+    if not user:
+        return jsonify({'posts': []})
+
+    if parse_bool(request.args.get('archived', '')):
+        posts = PostArchive.query.options(joinedload(PostArchive.author)).filter_by(
+            user_id=user.id).order_by(PostArchive.created_at.desc()).all()
+    else:
+        posts = user_posts(user.id).all()
+    posts_data = serialize_posts(posts, parse_fields(request.args, USER_POST_FIELDS))
+
+    return jsonify({'posts': posts_data})
+
+
+@bp.route('/my_posts')
+def my_posts():
+    """Страница с объявлениями текущего пользователя"""
+    return render_template('my_posts.html', categories=Post.CATEGORIES)
+
+
+# ДОПОЛНИТЕЛЬНЫЕ API ЭНДПОИНТЫ
+@bp.route('/api/posts')
+@conditional
+@response_cache.cached
+def api_posts():
+    """API endpoint для получения объявлений (для AJAX)"""
+    category = request.args.get('category', '')
+
+    prices = price_filter()
+
+    query = active_posts(category)
+
+    posts = paginate_request(apply_price_filter(query, prices),
+                             total_key=('posts', category, *sorted(prices.items())),
+                             keyset='sort' not in prices)
+
+    posts_data = serialize_posts(posts.items, parse_fields(request.args, LIST_FIELDS))
+
+    return jsonify({'posts': posts_data, **page_meta(posts)})
+
+
+@bp.route('/api/posts/stream')
+def api_posts_stream():
+    """Новые, измененные и снятые объявления (Server-Sent Events) вместо опроса /api/posts.
+
+    ?category= ограничивает поток категорией; после разрыва браузер
+    переподключается с заголовком Last-Event-ID и получает пропущенное.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    return events.stream(last_event_id, request.args.get('category') or None)
+
+
+@bp.route('/api/categories')
+@response_cache.cached
+def api_categories():
+    """API endpoint для получения категорий с числом активных объявлений (всего и за сутки)"""
+    counts = CategoryCounter.counts()
+    categories = [{'value': value, 'label': label,
+                   'count': counts.get(value, (0, 0))[0], 'recent_count': counts.get(value, (0, 0))[1]}
+                  for value, label in Post.CATEGORIES]
+    return jsonify({'categories': categories})
+
+
+@bp.route('/search')
+def search_posts():
+    """Поиск объявлений"""
+    query = request.args.get('q', '').strip()
+    category = request.args.get('category', '')
+    prices = price_filter()
+
+    posts = paginate_request(build_search_query(query, category, prices),
+                             total_key=('search', query, category, *sorted(prices.items())),
+                             keyset=not query and 'sort' not in prices)
+
+    return render_template('search.html',
+                           posts=posts,
+                           categories=Post.CATEGORIES,
+                           search_query=query,
+                           current_category=category,
+                           price_filter=prices)
+
+
+@bp.route('/api/search')
+def api_search():
+    """API endpoint для полнотекстового поиска объявлений"""
+    query = request.args.get('q', '').strip()
+    category = request.args.get('category', '')
+    prices = price_filter()
+
+    posts = paginate_request(build_search_query(query, category, prices),
+                             total_key=('search', query, category, *sorted(prices.items())),
+                             keyset=not query and 'sort' not in prices)
+
+    return jsonify({
+        'query': query,
+        'posts': serialize_posts(posts.items, parse_fields(request.args, LIST_FIELDS)),
+        **page_meta(posts)
+    })
+
+
+@bp.route('/api/search/suggest')
+def api_search_suggest():
+    """Подсказки при вводе запроса: из индекса слов заголовков в памяти, без запросов к базе"""
+    query = request.args.get('q', '')[:100]
+    limit = min(request.args.get('limit', 8, type=int), 20)
+    return jsonify({'query': query, 'suggestions': suggestions.suggest(query, max(limit, 1))})
+
+
+@bp.route('/media/<key>/<variant>')
+def media(key, variant):
+    """Изображения объявлений: уменьшенные варианты (WebP или JPEG по заголовку Accept) и оригинал"""
+    accept_webp = 'image/webp' in request.headers.get('Accept', '')
+    resolved = images.resolve(key, variant, accept_webp)
+    if resolved is None:
+        abort(404)
+
+    path, mimetype, immutable = resolved
+    # Ключ - хэш содержимого: готовый вариант по этому URL никогда не изменится;
+    # пока вариант готовится, вместо него ненадолго отдается оригинал
+    response = send_file(path, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE if immutable else 60)
+    response.cache_control.immutable = immutable
+    response.headers['Vary'] = 'Accept'
+    return response
+
+
+@bp.route('/assets/<path:filename>', endpoint='assets')
+def serve_asset(filename):
+    """Собранная статика: имя содержит хэш содержимого, сжатая копия выбирается по Accept-Encoding"""
+    resolved = assets.resolve(filename, request.accept_encodings)
+    if resolved is None:
+        abort(404)
+
+    path, mimetype, encoding = resolved
+    response = send_file(path, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+    response.cache_control.immutable = True
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+@bp.route('/metrics')
+def metrics_endpoint():
+    """Метрики маршрутов в формате Prometheus"""
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return 'Unauthorized', 401
+    return metrics.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+
+# СТАТИЧЕСКИЕ СТРАНИЦЫ
+@bp.route('/home')
+def home():
+    """Редирект на главную страницу"""
+    return redirect(url_for('main.index'))
+
+
+@bp.route('/about')
+def about():
+    """Страница о приложении"""
+    return render_template('about.html')
+
+
+# ОБРАБОТЧИКИ ОШИБОК
+@bp.app_errorhandler(404)
+def not_found_error(error):
+    """Обработчик 404 ошибки"""
+    return render_template('404.html'), 404
+
+
+@bp.app_errorhandler(403)
+def forbidden_error(error):
+    """Обработчик 403 ошибки"""
+    return render_template('403.html'), 403
+
+
+@bp.app_errorhandler(500)
+def internal_error(error):
+    """Обработчик 500 ошибки"""
+    db.session.rollback()
+    return render_template('500.html'), 500